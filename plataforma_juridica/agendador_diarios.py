@@ -0,0 +1,167 @@
+import datetime
+import itertools
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+
+class LimitadorPorHost:
+    """
+    Espaça as requisições a cada host para no máximo `requisicoes_por_segundo`, entre todas as threads.
+
+    Cada chamada a aguardar() reserva o próximo horário livre do host e dorme até ele, fora do lock,
+    então hosts diferentes não esperam uns pelos outros.
+    """
+
+    def __init__(self, requisicoes_por_segundo=2.0, por_host=None, relogio=time.monotonic, dormir=time.sleep):
+        """
+        :param requisicoes_por_segundo: Limite padrão para qualquer host.
+        :param por_host: Dicionário opcional host -> limite próprio (ex: {'data.queridodiario.ok.org.br': 5}).
+        """
+        self.requisicoes_por_segundo = requisicoes_por_segundo
+        self.por_host = por_host or {}
+        self._relogio = relogio
+        self._dormir = dormir
+        self._proximo = {}
+        self._lock = threading.Lock()
+
+    def aguardar(self, url):
+        host = urlsplit(url).netloc
+        intervalo = 1.0 / self.por_host.get(host, self.requisicoes_por_segundo)
+        with self._lock:
+            agora = self._relogio()
+            horario = max(agora, self._proximo.get(host, agora))
+            self._proximo[host] = horario + intervalo
+        if horario > agora:
+            self._dormir(horario - agora)
+
+
+class Tarefa(NamedTuple):
+    municipio: str
+    inicio: datetime.date
+    fim: datetime.date
+
+
+class MarcasDagua:
+    """
+    Última data já coletada por município, persistida em SQLite.
+
+    A marca só avança sobre um intervalo contínuo de tarefas concluídas, então uma tarefa que falhou
+    é refeita na próxima execução junto com tudo que vem depois dela.
+    """
+
+    def __init__(self, caminho_banco):
+        self._conn = sqlite3.connect(caminho_banco)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS marcas (municipio TEXT PRIMARY KEY, ate TEXT NOT NULL)")
+        self._conn.commit()
+
+    def obter(self, municipio):
+        linha = self._conn.execute("SELECT ate FROM marcas WHERE municipio = ?", (municipio,)).fetchone()
+        return datetime.date.fromisoformat(linha[0]) if linha else None
+
+    def avancar(self, municipio, ate):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO marcas VALUES (?, ?) ON CONFLICT (municipio) DO UPDATE SET ate = excluded.ate "
+                "WHERE excluded.ate > marcas.ate",
+                (municipio, ate.isoformat()),
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+def dividir_tarefas(municipios, inicio, fim, marcas=None, dias_por_tarefa=31, dias_revisao=0):
+    """
+    Divide a coleta em tarefas (município, intervalo de datas), começando após a marca d'água de cada município.
+
+    Diários de uma data podem ser publicados ou indexados dias depois dela; com `dias_revisao` os
+    últimos dias antes da marca são buscados de novo a cada execução. Os diários já baixados são
+    reconhecidos pela URL ou pelo conteúdo (ver pipeline_diarios.ArmazemDiarios) e não são reprocessados.
+
+    :param municipios: IDs dos municípios.
+    :param inicio: Primeira data da janela (datetime.date).
+    :param fim: Última data da janela, inclusive.
+    :param marcas: MarcasDagua opcional; municípios já coletados até `fim` não geram tarefas.
+    :param dias_por_tarefa: Tamanho máximo do intervalo de cada tarefa.
+    :param dias_revisao: Quantos dias até a marca d'água (inclusive) são buscados novamente.
+    :return: Lista de Tarefa, em ordem de município e data.
+    """
+    tarefas = []
+    passo = datetime.timedelta(days=dias_por_tarefa)
+    for municipio in municipios:
+        marca = marcas.obter(municipio) if marcas is not None else None
+        atual = max(inicio, marca + datetime.timedelta(days=1 - dias_revisao)) if marca else inicio
+        while atual <= fim:
+            ultimo = min(atual + passo - datetime.timedelta(days=1), fim)
+            tarefas.append(Tarefa(municipio, atual, ultimo))
+            atual = ultimo + datetime.timedelta(days=1)
+    return tarefas
+
+
+def executar_tarefas(client, tarefas, ao_concluir, marcas=None, workers=8):
+    """
+    Executa as buscas das tarefas em um pool e entrega os diários de cada uma a `ao_concluir`.
+
+    As buscas correm em até `workers` threads; ao_concluir(tarefa, diarios) é chamado na thread de
+    quem chamou esta função, na ordem em que as primeiras páginas chegam. O pool busca só a primeira
+    página de cada tarefa: `diarios` é um iterador e as páginas seguintes são lidas enquanto
+    ao_concluir o consome, sem acumular todos os diários da tarefa em memória. Quando a busca e o processamento de
+    uma tarefa dão certo, a marca d'água do município avança até o fim do maior prefixo contínuo de
+    tarefas concluídas.
+
+    :param client: QueridoDiarioClient (o limite por host e as novas tentativas ficam nele).
+    :param tarefas: Tarefas de dividir_tarefas.
+    :param ao_concluir: Função chamada com a tarefa e um iterador dos diários encontrados; uma falha
+                        na leitura das páginas seguintes é levantada durante a iteração.
+    :param marcas: MarcasDagua opcional a ser atualizada.
+    :param workers: Número de buscas simultâneas.
+    :return: Dicionário com os totais de tarefas concluídas, com erro e diários encontrados.
+    """
+    totais = {"concluidas": 0, "erros": 0, "diarios": 0}
+    por_municipio = {}
+    for tarefa in tarefas:
+        por_municipio.setdefault(tarefa.municipio, []).append(tarefa)
+    concluidas = set()
+
+    def buscar(tarefa):
+        diarios = iter(client.buscar_diarios_por_municipio_e_data(
+            tarefa.municipio, tarefa.inicio.isoformat(), tarefa.fim.isoformat(), ignorar_falhas=False,
+        ))
+        primeiro = next(diarios, None)
+        return iter(()) if primeiro is None else itertools.chain([primeiro], diarios)
+
+    def contar(diarios, contagem):
+        for diario in diarios:
+            contagem[0] += 1
+            yield diario
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agendador-diarios") as executor:
+        futuros = {executor.submit(buscar, tarefa): tarefa for tarefa in tarefas}
+        for futuro in as_completed(futuros):
+            tarefa = futuros[futuro]
+            contagem = [0]
+            try:
+                ao_concluir(tarefa, contar(futuro.result(), contagem))
+            except Exception as e:
+                print(f"  [ERRO] Tarefa {tarefa.municipio} {tarefa.inicio}..{tarefa.fim} falhou: {e}")
+                totais["erros"] += 1
+                continue
+            totais["concluidas"] += 1
+            totais["diarios"] += contagem[0]
+            concluidas.add(tarefa)
+            if marcas is not None:
+                ultima = None
+                for anterior in por_municipio[tarefa.municipio]:
+                    if anterior not in concluidas:
+                        break
+                    ultima = anterior
+                if ultima is not None:
+                    marcas.avancar(tarefa.municipio, ultima.fim)
+
+    print(f"Agendador: {totais['concluidas']} tarefa(s) concluída(s), {totais['erros']} com erro, "
+          f"{totais['diarios']} diário(s) encontrado(s).")
+    return totais
@@ -1,16 +1,28 @@
 import requests
+import metrics
 
 class ApiCamaraClient:
     """
     Um cliente para interagir com a API de Dados Abertos da Câmara dos Deputados.
     """
-    def __init__(self, base_url):
+    def __init__(self, base_url, snapshot=None):
         """
         Inicializa o cliente da API.
 
         :param base_url: A URL base da API da Câmara.
+        :param snapshot: SnapshotCamara opcional com os arquivos de dados abertos importados.
+                         As consultas são respondidas por ele e só vão à API o que faltar na cópia local.
         """
         self.base_url = base_url
+        self.snapshot = snapshot
+
+    def _consultar_snapshot(self, metodo, *args):
+        """Consulta a cópia local, se houver; retorna None quando o item não está nela."""
+        if self.snapshot is None:
+            return None
+        resultado = getattr(self.snapshot, metodo)(*args)
+        metrics.record_cache_lookup('camara_snapshot', resultado is not None)
+        return resultado
 
     def _fazer_requisicao(self, endpoint, params=None):
         """
@@ -22,8 +34,9 @@ class ApiCamaraClient:
         """
         url = f"{self.base_url}{endpoint}"
         try:
-            response = requests.get(url, params=params, headers={'Accept': 'application/json'})
-            response.raise_for_status()  # Lança uma exceção para erros HTTP (4xx ou 5xx)
+            with metrics.time_http_request('camara'):
+                response = requests.get(url, params=params, headers={'Accept': 'application/json'})
+                response.raise_for_status()  # Lança uma exceção para erros HTTP (4xx ou 5xx)
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Erro ao fazer a requisição para {url}: {e}")
@@ -38,6 +51,10 @@ class ApiCamaraClient:
         :param ano: O ano da proposição.
         :return: Um dicionário com os dados da primeira proposição encontrada ou None.
         """
+        local = self._consultar_snapshot('buscar_proposicao', sigla_tipo, numero, ano)
+        if local is not None:
+            return local
+
         params = {
             'siglaTipo': sigla_tipo,
             'numero': numero,
@@ -57,6 +74,10 @@ class ApiCamaraClient:
         :param id_proposicao: O ID da proposição.
         :return: Um dicionário com os detalhes da proposição ou None.
         """
+        local = self._consultar_snapshot('obter_detalhes_proposicao', id_proposicao)
+        if local is not None:
+            return local
+
         data = self._fazer_requisicao(f'/proposicoes/{id_proposicao}')
         return data.get('dados') if data else None
 
@@ -67,5 +88,9 @@ class ApiCamaraClient:
         :param id_proposicao: O ID da proposição.
         :return: Uma lista de dicionários, cada um representando um autor, ou None.
         """
+        local = self._consultar_snapshot('obter_autores_proposicao', id_proposicao)
+        if local is not None:
+            return local
+
         data = self._fazer_requisicao(f'/proposicoes/{id_proposicao}/autores')
         return data.get('dados') if data else None
\ No newline at end of file
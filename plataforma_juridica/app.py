@@ -1,11 +1,18 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response
 from elasticsearch import Elasticsearch
 from pydantic import BaseModel
 from typing import List, Optional
 import os
+import time
 from groq import Groq
+from neo4j import AsyncGraphDatabase
 import logging # Import logging module
 import logging_config # Import our logging configuration
+import metrics
+from llm_analysis import AnalysisCache, GroqBackend, LLMAnalyzer, RateLimitedBackend, RateLimiter, StubBackend
+from batch_analysis import BatchAnalysisManager
+from graph_queries import CITABLE_LABELS, GraphQueryService
 
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
@@ -18,6 +25,31 @@ ES_INDEX = "cnj_processes"
 # Groq API Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY") # Load API key from environment variable
 GROQ_MODEL = "llama3-8b-8192" # Default Groq model
+DEFAULT_ANALYSIS_PROMPT = "Analyze the following legal text and provide a concise summary and key insights."
+
+# LLM analysis cache and chunking
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+LLM_CHUNK_CHARS = int(os.getenv("LLM_CHUNK_CHARS", "12000")) # ~3k tokens, leaves room for the completion
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# LLM backend ("groq" or "stub" for local testing) and its per-minute budget (0 = unlimited)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "30000"))
+
+# Batch analysis jobs
+AI_BATCH_WORKERS = int(os.getenv("AI_BATCH_WORKERS", "4"))
+AI_ANALYSIS_INDEX = os.getenv("AI_ANALYSIS_INDEX") or None # Side index for results; unset stores them on the process documents
+
+# Neo4j citation graph (read-only); ingestion bumps the graph version, which invalidates the query cache
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE") or None
+GRAPH_CACHE_MAX_ENTRIES = int(os.getenv("GRAPH_CACHE_MAX_ENTRIES", "1024"))
+GRAPH_CACHE_TTL_SECONDS = float(os.getenv("GRAPH_CACHE_TTL_SECONDS", "300"))
+GRAPH_VERSION_CHECK_SECONDS = float(os.getenv("GRAPH_VERSION_CHECK_SECONDS", "5"))
 
 # --- FastAPI App Initialization ---
 app = FastAPI(
@@ -26,6 +58,22 @@ app = FastAPI(
     version="0.1.0"
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Use the route template (e.g. /ai-analyze/jobs/{job_id}) to keep label cardinality bounded
+        route = request.scope.get("route")
+        metrics.HTTP_SERVER_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method, route=route.path if route else "unmatched", status=status,
+        )
+
 # --- Elasticsearch Client ---
 es_client = None
 try:
@@ -38,15 +86,47 @@ except Exception as e:
 
 # --- Groq Client ---
 groq_client = None
-if GROQ_API_KEY:
+llm_backend = None
+if LLM_BACKEND == "stub":
+    llm_backend = StubBackend()
+    logger.warning("LLM_BACKEND=stub: AI analysis will return stub results.")
+elif GROQ_API_KEY:
     try:
         groq_client = Groq(api_key=GROQ_API_KEY)
+        llm_backend = GroqBackend(groq_client)
         logger.info("Groq client initialized!")
     except Exception as e:
         logger.error(f"Could not initialize Groq client: {e}", exc_info=True)
 else:
     logger.warning("GROQ_API_KEY not found in environment variables. Groq API functionality will be disabled.")
 
+# --- Neo4j Graph Client ---
+graph_service = None
+try:
+    # The async driver connects lazily, so an unavailable Neo4j only fails the /graph endpoints
+    graph_service = GraphQueryService(
+        AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)),
+        cache=AnalysisCache(max_entries=GRAPH_CACHE_MAX_ENTRIES, ttl_seconds=GRAPH_CACHE_TTL_SECONDS, name="graph"),
+        database=NEO4J_DATABASE,
+        version_check_seconds=GRAPH_VERSION_CHECK_SECONDS,
+    )
+except Exception as e:
+    logger.error(f"Could not initialize Neo4j driver for graph queries: {e}", exc_info=True)
+
+llm_analyzer = None
+batch_manager = None
+if llm_backend:
+    llm_analyzer = LLMAnalyzer(
+        RateLimitedBackend(llm_backend, RateLimiter(LLM_REQUESTS_PER_MINUTE or None, LLM_TOKENS_PER_MINUTE or None)),
+        cache=AnalysisCache(max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS),
+        chunk_chars=LLM_CHUNK_CHARS,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+    )
+    if es_client:
+        batch_manager = BatchAnalysisManager(
+            llm_analyzer, es_client, ES_INDEX, result_index=AI_ANALYSIS_INDEX, workers=AI_BATCH_WORKERS
+        )
+
 
 # --- Pydantic Models for Request/Response ---
 class SearchQuery(BaseModel):
@@ -71,28 +151,28 @@ class SearchResponse(BaseModel):
 
 class AIAnalysisRequest(BaseModel):
     text: str
-    prompt: Optional[str] = "Analyze the following legal text and provide a concise summary and key insights."
+    prompt: Optional[str] = DEFAULT_ANALYSIS_PROMPT
     model: Optional[str] = GROQ_MODEL
+    temperature: Optional[float] = 0.7
 
 class AIAnalysisResponse(BaseModel):
     analysis: str
     model_used: str
+    cached: bool = False
+    chunks: int = 1
 
-# --- API Endpoints ---
-
-@app.get("/")
-async def read_root():
-    logger.info("Root endpoint accessed.")
-    return {"message": "Welcome to the CNJ DataJud Search API!"}
+class BatchAnalysisRequest(BaseModel):
+    numeros_processo: Optional[List[str]] = None
+    search: Optional[SearchQuery] = None
+    prompt: Optional[str] = DEFAULT_ANALYSIS_PROMPT
+    model: Optional[str] = GROQ_MODEL
+    temperature: Optional[float] = 0.7
+    max_documents: int = 5000
 
-@app.post("/search", response_model=SearchResponse)
-async def search_processes(search_query: SearchQuery):
-    logger.info(f"Search request received: {search_query.dict()}")
-    if not es_client:
-        logger.error("Elasticsearch client not available for search.")
-        raise HTTPException(status_code=500, detail="Elasticsearch connection not established.")
+# --- Helpers ---
 
-    # Build Elasticsearch query
+def build_es_query(search_query: SearchQuery) -> dict:
+    """Builds the Elasticsearch query for the filters of a SearchQuery."""
     es_query = {
         "match_all": {}
     }
@@ -112,6 +192,28 @@ async def search_processes(search_query: SearchQuery):
 
     if must_clauses:
         es_query = {"bool": {"must": must_clauses}}
+    return es_query
+
+# --- API Endpoints ---
+
+@app.get("/")
+async def read_root():
+    logger.info("Root endpoint accessed.")
+    return {"message": "Welcome to the CNJ DataJud Search API!"}
+
+@app.get("/metrics")
+async def read_metrics():
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.post("/search", response_model=SearchResponse)
+async def search_processes(search_query: SearchQuery):
+    logger.info(f"Search request received: {search_query.dict()}")
+    if not es_client:
+        logger.error("Elasticsearch client not available for search.")
+        raise HTTPException(status_code=500, detail="Elasticsearch connection not established.")
+
+    # Build Elasticsearch query
+    es_query = build_es_query(search_query)
 
     # Pagination
     from_ = (search_query.page - 1) * search_query.size
@@ -178,31 +280,94 @@ async def get_aggregations():
 @app.post("/ai-analyze", response_model=AIAnalysisResponse)
 async def ai_analyze_text(request: AIAnalysisRequest):
     logger.info(f"AI analysis request received for text length: {len(request.text)}")
-    if not groq_client:
+    if not llm_analyzer:
         logger.error("Groq API client not initialized. GROQ_API_KEY might be missing.")
         raise HTTPException(status_code=503, detail="Groq API client not initialized. Please set GROQ_API_KEY environment variable.")
     
     try:
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": request.prompt,
-                },
-                {
-                    "role": "user",
-                    "content": request.text,
-                },
-            ],
-            model=request.model,
-            temperature=0.7,
-            max_tokens=1024,
-        )
-        
-        analysis_content = chat_completion.choices[0].message.content
-        logger.info(f"AI analysis completed using model: {request.model}")
-        return AIAnalysisResponse(analysis=analysis_content, model_used=request.model)
+        result = await llm_analyzer.analyze(request.text, request.prompt, request.model, request.temperature)
+        logger.info(f"AI analysis completed using model: {request.model} (cached: {result.cached}, chunks: {result.chunks})")
+        return AIAnalysisResponse(analysis=result.analysis, model_used=request.model, cached=result.cached, chunks=result.chunks)
 
     except Exception as e:
         logger.error(f"Error during Groq API call: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error during AI analysis: {e}")
+
+@app.post("/ai-analyze/jobs", status_code=202)
+async def submit_batch_analysis(request: BatchAnalysisRequest):
+    logger.info(f"Batch AI analysis request received (ids: {len(request.numeros_processo or [])}, search: {request.search is not None})")
+    if not batch_manager:
+        logger.error("Batch analysis unavailable: LLM backend or Elasticsearch client not initialized.")
+        raise HTTPException(status_code=503, detail="Batch analysis requires both the LLM backend and Elasticsearch.")
+    if not request.numeros_processo and request.search is None:
+        raise HTTPException(status_code=422, detail="Provide either 'numeros_processo' or 'search'.")
+
+    job = batch_manager.submit(
+        request.prompt, request.model, request.temperature,
+        numeros_processo=request.numeros_processo,
+        es_query=build_es_query(request.search) if request.search else None,
+        max_documents=request.max_documents,
+    )
+    return job.to_dict()
+
+@app.get("/ai-analyze/jobs")
+async def list_batch_analyses():
+    if not batch_manager:
+        return []
+    return [job.to_dict() for job in batch_manager.jobs.values()]
+
+@app.get("/ai-analyze/jobs/{job_id}")
+async def get_batch_analysis(job_id: str):
+    job = batch_manager.get(job_id) if batch_manager else None
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job.to_dict()
+
+@app.delete("/ai-analyze/jobs/{job_id}")
+async def cancel_batch_analysis(job_id: str):
+    if not batch_manager or not batch_manager.get(job_id):
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    if not batch_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is no longer running.")
+    logger.info(f"Batch analysis job {job_id} cancellation requested.")
+    return batch_manager.get(job_id).to_dict()
+
+# --- Graph Endpoints ---
+
+async def run_graph_query(description: str, query):
+    """Runs query(graph_service), mapping unknown labels to 422 and Neo4j failures to 503."""
+    if not graph_service:
+        raise HTTPException(status_code=503, detail="Neo4j graph client not initialized.")
+    try:
+        return await query(graph_service)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error during graph query '{description}': {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail=f"Error querying the graph: {e}")
+
+@app.get("/graph/most-cited")
+async def graph_most_cited(label: str = Query("Lei", description=f"One of: {', '.join(CITABLE_LABELS)}"),
+                           limit: int = Query(20, ge=1, le=200), skip: int = Query(0, ge=0),
+                           year: Optional[int] = Query(None, ge=1800, le=2100,
+                                                       description="Rank by citations from documents of this year")):
+    return await run_graph_query("most-cited", lambda service: service.most_cited(label, limit, skip, year))
+
+@app.get("/graph/citing")
+async def graph_documents_citing(label: str, id: str, limit: int = Query(20, ge=1, le=200), skip: int = Query(0, ge=0)):
+    return await run_graph_query("citing", lambda service: service.documents_citing(label, id, limit, skip))
+
+@app.get("/graph/co-cited")
+async def graph_co_cited(label: str, id: str, limit: int = Query(20, ge=1, le=200), skip: int = Query(0, ge=0)):
+    return await run_graph_query("co-cited", lambda service: service.co_cited(label, id, limit, skip))
+
+@app.get("/graph/lawyers/{oab}/processes")
+async def graph_lawyer_processes(oab: str, limit: int = Query(20, ge=1, le=200), skip: int = Query(0, ge=0)):
+    return await run_graph_query("lawyer-processes", lambda service: service.lawyer_processes(oab, limit, skip))
+
+@app.post("/graph/cache/invalidate")
+async def invalidate_graph_cache():
+    if not graph_service:
+        raise HTTPException(status_code=503, detail="Neo4j graph client not initialized.")
+    graph_service.invalidate()
+    return {"invalidated": True}
@@ -0,0 +1,96 @@
+import hashlib
+import re
+import sqlite3
+from datetime import datetime
+from typing import NamedTuple
+
+CAMINHO_BANCO_PADRAO = 'conteudo_juridico.db'
+
+# WAL deixa leitores (API, sincronização com o grafo) consultarem o banco durante a gravação;
+# synchronous=NORMAL é seguro com WAL e evita um fsync por transação.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA busy_timeout = 5000",
+)
+
+_ESPACOS = re.compile(r"\s+")
+
+
+class SumulaAlterada(NamedTuple):
+    numero: str
+    texto: str
+    hash_conteudo: str
+    nova: bool
+
+
+def hash_sumula(texto):
+    """SHA-256 do texto da súmula com os espaços normalizados (quebras de linha do HTML não contam como mudança)."""
+    return hashlib.sha256(_ESPACOS.sub(" ", texto).strip().encode("utf-8")).hexdigest()
+
+
+def abrir_banco(caminho=CAMINHO_BANCO_PADRAO):
+    """
+    Abre o banco de súmulas com WAL e os pragmas de PRAGMAS, criando a tabela se necessário.
+
+    Bancos criados pelas versões antigas dos scripts ganham a coluna hash_conteudo; as linhas sem hash
+    são tratadas como alteradas na primeira sincronização.
+
+    :param caminho: Caminho do arquivo SQLite.
+    :return: A conexão aberta.
+    """
+    conn = sqlite3.connect(caminho)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sumulas_vinculantes (
+            numero TEXT PRIMARY KEY,
+            texto TEXT,
+            data_atualizacao DATETIME,
+            hash_conteudo TEXT
+        )
+    ''')
+    colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(sumulas_vinculantes)")}
+    if "hash_conteudo" not in colunas:
+        conn.execute("ALTER TABLE sumulas_vinculantes ADD COLUMN hash_conteudo TEXT")
+    conn.commit()
+    return conn
+
+
+def sincronizar_sumulas(conn, sumulas):
+    """
+    Grava as súmulas extraídas, alterando apenas as que são novas ou tiveram o texto modificado.
+
+    Os hashes gravados são comparados com os das súmulas recebidas e só as diferentes entram em um
+    único executemany (UPSERT) dentro de uma transação; as inalteradas mantêm a data_atualizacao.
+
+    :param conn: Conexão de abrir_banco().
+    :param sumulas: Iterável de tuplas (numero, texto, data) como as devolvidas pelos extratores.
+    :return: Lista de SumulaAlterada, na ordem recebida, para atualização do grafo.
+    """
+    existentes = dict(conn.execute("SELECT numero, hash_conteudo FROM sumulas_vinculantes"))
+    alteradas = []
+    linhas = []
+    for numero, texto, data in sumulas:
+        hash_conteudo = hash_sumula(texto)
+        if existentes.get(numero) == hash_conteudo:
+            continue
+        alteradas.append(SumulaAlterada(numero, texto, hash_conteudo, numero not in existentes))
+        # Súmula repetida na mesma extração: a segunda ocorrência igual não é gravada de novo
+        existentes[numero] = hash_conteudo
+        data = data.isoformat(sep=" ") if isinstance(data, datetime) else data
+        linhas.append((numero, texto, data, hash_conteudo))
+
+    with conn:
+        conn.executemany('''
+            INSERT INTO sumulas_vinculantes (numero, texto, data_atualizacao, hash_conteudo)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (numero) DO UPDATE SET
+                texto = excluded.texto,
+                data_atualizacao = excluded.data_atualizacao,
+                hash_conteudo = excluded.hash_conteudo
+            WHERE sumulas_vinculantes.hash_conteudo IS NOT excluded.hash_conteudo
+        ''', linhas)
+    return alteradas
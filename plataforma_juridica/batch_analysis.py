@@ -0,0 +1,289 @@
+import asyncio
+import logging # Import logging module
+import uuid
+from datetime import datetime, timezone
+import logging_config # Import our logging configuration
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH_SIZE = 500 # Documents per mget/search page
+PERSIST_BATCH_SIZE = 100 # Results per bulk request
+MAX_ERRORS_KEPT = 20 # Most recent errors exposed in the job status
+MAX_FINISHED_JOBS_KEPT = 100 # Finished jobs kept for status queries; older ones are evicted
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def render_process_text(source: dict) -> str:
+    """
+    Renders a DataJud process document as plain text for LLM analysis.
+
+    DataJud documents only carry structured metadata, so the text lists the class, court,
+    subjects and the chronological list of movements.
+    """
+    lines = [f"Processo: {source.get('numeroProcesso')}"]
+    classe = source.get("classe") or {}
+    if classe.get("nome"):
+        lines.append(f"Classe: {classe['nome']}")
+    orgao = source.get("orgaoJulgador") or {}
+    if orgao.get("nome"):
+        lines.append(f"Órgão julgador: {orgao['nome']}")
+    for field, label in (("tribunal", "Tribunal"), ("grau", "Grau"), ("dataAjuizamento", "Data de ajuizamento")):
+        if source.get(field):
+            lines.append(f"{label}: {source[field]}")
+    assuntos = [a.get("nome") for a in source.get("assuntos") or [] if a.get("nome")]
+    if assuntos:
+        lines.append("Assuntos: " + "; ".join(assuntos))
+    movimentos = source.get("movimentos") or []
+    if movimentos:
+        lines.append("Movimentos:")
+        for movimento in sorted(movimentos, key=lambda m: m.get("dataHora") or ""):
+            lines.append(f"- {movimento.get('dataHora', '')} {movimento.get('nome', '')}".rstrip())
+    return "\n".join(lines)
+
+
+class AnalysisJob:
+    """Progress and outcome of one batch analysis job."""
+
+    def __init__(self, prompt: str, model: str, temperature: float):
+        self.id = uuid.uuid4().hex
+        self.prompt = prompt
+        self.model = model
+        self.temperature = temperature
+        self.status = "pending"
+        self.total = 0
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cached = 0
+        self.errors = []
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+
+    def record_error(self, numero_processo, error):
+        self.failed += 1
+        self.errors.append({"numeroProcesso": numero_processo, "error": str(error)})
+        del self.errors[:-MAX_ERRORS_KEPT]
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "model": self.model,
+            "total": self.total,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cached": self.cached,
+            "progress": round(self.processed / self.total, 4) if self.total else 0.0,
+            "errors": list(self.errors),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class BatchAnalysisManager:
+    """
+    Runs LLM analysis jobs over Elasticsearch documents.
+
+    Documents are streamed from Elasticsearch, analyzed by a pool of workers sharing one LLMAnalyzer
+    (whose backend enforces the requests/tokens-per-minute budget) and the results are written back
+    with bulk requests, either onto the process documents (field ai_analysis) or into a side index.
+    A result only counts as succeeded once its bulk item is persisted; results of a failed bulk
+    request are kept and retried with the next one, and whatever is left is flushed when the job ends,
+    however it ends.
+
+    Args:
+        analyzer (LLMAnalyzer): Analyzer used for every document.
+        es_client: Elasticsearch client.
+        index (str): Index holding the process documents.
+        result_index (str): Side index for results. None stores results on the process documents.
+        workers (int): Number of documents analyzed concurrently.
+        text_renderer: Callable turning a document _source into the text sent to the LLM.
+    """
+
+    def __init__(self, analyzer, es_client, index: str, result_index: str = None, workers: int = 4,
+                 text_renderer=render_process_text):
+        self.analyzer = analyzer
+        self.es_client = es_client
+        self.index = index
+        self.result_index = result_index
+        self.workers = workers
+        self.text_renderer = text_renderer
+        self.jobs = {}
+
+    def submit(self, prompt: str, model: str, temperature: float = 0.7, numeros_processo=None,
+               es_query: dict = None, max_documents: int = 5000) -> AnalysisJob:
+        """Creates a job and schedules it on the running event loop."""
+        if not numeros_processo and es_query is None:
+            raise ValueError("Either numeros_processo or es_query must be provided.")
+        self._evict_finished_jobs()
+        job = AnalysisJob(prompt, model, temperature)
+        self.jobs[job.id] = job
+        if numeros_processo:
+            numeros_processo = list(dict.fromkeys(numeros_processo))[:max_documents]
+            job.total = len(numeros_processo)
+        job.task = asyncio.ensure_future(self._run(job, numeros_processo, es_query, max_documents))
+        logger.info("Batch analysis job %s submitted.", job.id)
+        return job
+
+    def _evict_finished_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS_KEPT + 1)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if not job or job.status not in ("pending", "running"):
+            return False
+        job.task.cancel()
+        return True
+
+    async def _run(self, job, numeros_processo, es_query, max_documents):
+        job.status = "running"
+        job.started_at = _now()
+        queue = asyncio.Queue(maxsize=self.workers * 4)
+        results = []
+        workers = [asyncio.ensure_future(self._worker(job, queue, results)) for _ in range(self.workers)]
+        try:
+            if numeros_processo:
+                documents = self._fetch_by_ids(numeros_processo)
+            else:
+                job.total = await asyncio.to_thread(self._count, es_query, max_documents)
+                documents = self._fetch_by_query(es_query, max_documents)
+            async for numero, source in documents:
+                if source is None:
+                    job.processed += 1
+                    job.record_error(numero, "document not found")
+                    continue
+                await queue.put((numero, source))
+            await queue.join()
+            await self._flush(job, results)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Batch analysis job {job.id} failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.record_error(None, e)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await self._flush_remaining(job, results)
+            job.finished_at = _now()
+            logger.info("Batch analysis job %s finished with status %s (%d/%d processed, %d failed).",
+                        job.id, job.status, job.processed, job.total, job.failed)
+
+    async def _worker(self, job, queue, results):
+        while True:
+            numero, source = await queue.get()
+            try:
+                result = await self.analyzer.analyze(self.text_renderer(source), job.prompt, job.model, job.temperature)
+            except Exception as e:
+                logger.warning("Analysis of process %s failed in job %s: %s", numero, job.id, e)
+                job.record_error(numero, e)
+            else:
+                results.append((numero, result.analysis))
+                if result.cached:
+                    job.cached += 1
+                if len(results) >= PERSIST_BATCH_SIZE:
+                    try:
+                        await self._flush(job, results)
+                    except Exception as e:
+                        logger.warning("Persisting results of job %s failed, retrying with the next batch: %s", job.id, e)
+            finally:
+                job.processed += 1
+                queue.task_done()
+
+    async def _fetch_by_ids(self, numeros_processo):
+        for start in range(0, len(numeros_processo), FETCH_BATCH_SIZE):
+            batch = numeros_processo[start:start + FETCH_BATCH_SIZE]
+            response = await asyncio.to_thread(self.es_client.mget, index=self.index, ids=batch)
+            for doc in response["docs"]:
+                yield doc["_id"], doc["_source"] if doc.get("found") else None
+
+    def _count(self, es_query, max_documents):
+        response = self.es_client.count(index=self.index, body={"query": es_query})
+        return min(response["count"], max_documents)
+
+    async def _fetch_by_query(self, es_query, max_documents):
+        fetched = 0
+        search_after = None
+        while fetched < max_documents:
+            body = {
+                "query": es_query,
+                "size": min(FETCH_BATCH_SIZE, max_documents - fetched),
+                "sort": [{"_doc": "asc"}],
+            }
+            if search_after:
+                body["search_after"] = search_after
+            response = await asyncio.to_thread(self.es_client.search, index=self.index, body=body)
+            hits = response["hits"]["hits"]
+            if not hits:
+                break
+            for hit in hits:
+                yield hit["_id"], hit["_source"]
+            fetched += len(hits)
+            search_after = hits[-1]["sort"]
+
+    async def _flush_remaining(self, job, results):
+        """Flushes the results left at the end of a job; those that still cannot be persisted are errors."""
+        try:
+            await self._flush(job, results)
+        except Exception as e:
+            logger.error(f"Could not persist {len(results)} analysis results of job {job.id}: {e}", exc_info=True)
+            for numero, _ in results:
+                job.record_error(numero, f"analysis not persisted: {e}")
+            del results[:]
+
+    async def _flush(self, job, results):
+        """
+        Persists the buffered results with one bulk request.
+
+        The batch is taken out of the shared buffer so concurrent flushes never send the same result
+        twice, and put back if the request fails. Failed bulk items are recorded per process.
+        """
+        if not results:
+            return
+        batch = results[:]
+        del results[:]
+        analyzed_at = _now()
+        operations = []
+        for numero, analysis in batch:
+            result_doc = {
+                "analysis": analysis,
+                "model": job.model,
+                "prompt": job.prompt,
+                "job_id": job.id,
+                "analyzed_at": analyzed_at,
+            }
+            if self.result_index:
+                operations.append({"index": {"_index": self.result_index, "_id": numero}})
+                operations.append({"numeroProcesso": numero, **result_doc})
+            else:
+                operations.append({"update": {"_index": self.index, "_id": numero}})
+                operations.append({"doc": {"ai_analysis": result_doc}})
+        try:
+            response = await asyncio.to_thread(self.es_client.bulk, operations=operations)
+        except BaseException:
+            # Also on cancellation: the results are kept for the final flush (writes are idempotent by _id)
+            results[:0] = batch
+            raise
+        failed = 0
+        if response.get("errors"):
+            for (numero, _), item in zip(batch, response.get("items", [])):
+                outcome = next(iter(item.values()))
+                if outcome.get("error"):
+                    failed += 1
+                    job.record_error(numero, outcome["error"])
+        job.succeeded += len(batch) - failed
+        logger.debug("Persisted %d analysis results for job %s.", len(batch), job.id)
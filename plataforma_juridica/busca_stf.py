@@ -0,0 +1,268 @@
+import copy
+import hashlib
+import json
+import math
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+
+CAMINHO_REQUISICAO_PADRAO = 'cache/requisicao_busca_stf.json'
+PAGINA_BUSCA = "https://jurisprudencia.stf.jus.br/pages/search?base=sumulas"
+TAMANHO_PAGINA = 50
+# Cabeçalhos da requisição capturada que dependem da sessão do navegador e não devem ser repetidos
+CABECALHOS_DESCARTADOS = frozenset({"cookie", "content-length", "host", "connection", "accept-encoding"})
+# O portal responde 401/403 quando a sessão não tem os cookies do desafio anti-robô
+STATUS_SEM_SESSAO = {401, 403}
+
+_NUMERO = re.compile(r"\d+")
+
+
+def carregar_requisicao(caminho=CAMINHO_REQUISICAO_PADRAO):
+    """
+    Lê a requisição de busca capturada do navegador (ver teste_acesso_sumulas_stf_v3.py).
+
+    :return: Dicionário com 'url', 'headers' e 'corpo' (o JSON enviado no POST).
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        requisicao = json.load(f)
+    corpo = requisicao.get("corpo", requisicao.get("post_data"))
+    if isinstance(corpo, str):
+        corpo = json.loads(corpo)
+    headers = {k: v for k, v in requisicao.get("headers", {}).items() if k.lower() not in CABECALHOS_DESCARTADOS}
+    return {"url": requisicao["url"], "headers": headers, "corpo": corpo}
+
+
+def _chave_gravacao(corpo):
+    return hashlib.sha256(json.dumps(corpo, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def _hits(resposta):
+    """Localiza o bloco 'hits' da resposta (no topo ou dentro de 'result', conforme a versão do portal)."""
+    return (resposta.get("result") or resposta).get("hits") or {}
+
+
+def total_de_resultados(resposta):
+    total = _hits(resposta).get("total", 0)
+    return total.get("value", 0) if isinstance(total, dict) else int(total)
+
+
+def resultados_da_pagina(resposta):
+    return [hit.get("_source", hit) for hit in _hits(resposta).get("hits", [])]
+
+
+def mapear_sumula(fonte, data=None):
+    """
+    Converte um resultado da busca de súmulas em (numero, texto, data), o formato de armazenamento_sumulas.
+
+    O número vem de 'numero' ou do título ("Súmula Vinculante 13"); o texto, do primeiro campo de
+    enunciado presente. Resultados sem número ou texto retornam None, assim como os que não são
+    súmulas vinculantes ('is_vinculante' falso ou, sem esse campo, título sem "Vinculante"): a
+    numeração das súmulas comuns é outra, e "Súmula 13" seria gravada como a Súmula Vinculante 13.
+    """
+    vinculante = fonte.get("is_vinculante")
+    if vinculante is None:
+        vinculante = "vinculante" in (fonte.get("titulo") or "").lower()
+    if not vinculante:
+        return None
+    numero = fonte.get("numero")
+    if numero is None:
+        m = _NUMERO.search(fonte.get("titulo") or "")
+        numero = m.group() if m else None
+    texto = next((fonte[c] for c in ("sumula_texto", "texto", "enunciado") if fonte.get(c)), None)
+    if numero is None or texto is None:
+        return None
+    return str(numero), " ".join(texto.split()), data or datetime.now()
+
+
+def cookies_via_navegador(url=PAGINA_BUSCA, headless=False):
+    """
+    Abre a página de busca no navegador para obter cookies de sessão válidos.
+
+    Com headless=False a janela fica visível para que um eventual CAPTCHA seja resolvido à mão.
+    """
+    from raspagem_stf import RaspadorStf
+
+    with RaspadorStf(headless=headless) as raspador:
+        raspador.pagina.goto(url, wait_until="networkidle")
+        if not headless:
+            input("⏳ Resolva o CAPTCHA, se houver, e pressione [ENTER] para continuar...")
+        return raspador.cookies()
+
+
+class SessaoGravada:
+    """
+    Substituto offline de requests.Session que responde com as gravações de ClienteBuscaStf(gravar_em=...).
+
+    Útil em testes e para desenvolver os mapeamentos sem acessar o portal.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.cookies = requests.cookies.RequestsCookieJar()
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        caminho = os.path.join(self.diretorio, f"{_chave_gravacao(json)}.json")
+        resposta = requests.Response()
+        resposta.url = url
+        if os.path.exists(caminho):
+            with open(caminho, "rb") as f:
+                resposta._content = f.read()
+            resposta.status_code = 200
+        else:
+            resposta._content = b"{}"
+            resposta.status_code = 404
+        return resposta
+
+    def close(self):
+        pass
+
+
+class ClienteBuscaStf:
+    """
+    Cliente HTTP da busca de jurisprudência do STF, sem navegador.
+
+    Repete a requisição capturada do portal trocando apenas a paginação ('from'/'size' do corpo).
+    A primeira página informa o total e as demais são buscadas em paralelo por uma sessão com pool
+    de conexões. O navegador só é aberto quando o portal recusa a sessão (401/403), para obter cookies,
+    e sempre na thread que consome resultados(): o Playwright síncrono e o input() do CAPTCHA não
+    podem rodar nas threads do pool, que apenas repassam a recusa.
+    """
+
+    def __init__(self, requisicao, max_paralelo=4, tamanho_pagina=TAMANHO_PAGINA, sessao=None,
+                 obter_cookies=cookies_via_navegador, gravar_em=None):
+        """
+        :param requisicao: Dicionário de carregar_requisicao().
+        :param max_paralelo: Máximo de páginas buscadas ao mesmo tempo.
+        :param tamanho_pagina: Resultados por página.
+        :param sessao: Sessão HTTP (requests.Session ou SessaoGravada); por padrão uma nova Session.
+        :param obter_cookies: Função sem argumentos obrigatórios que retorna cookies no formato do
+                              Playwright; None desativa o recurso ao navegador.
+        :param gravar_em: Diretório onde cada resposta é gravada para reprodução com SessaoGravada.
+        """
+        self.requisicao = requisicao
+        self.max_paralelo = max_paralelo
+        self.tamanho_pagina = tamanho_pagina
+        self.obter_cookies = obter_cookies
+        self.gravar_em = gravar_em
+        if sessao is None:
+            sessao = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_paralelo, pool_maxsize=max_paralelo)
+            sessao.mount('https://', adapter)
+        self.sessao = sessao
+        self._geracao_cookies = 0
+
+    def fechar(self):
+        self.sessao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _corpo(self, inicio):
+        corpo = copy.deepcopy(self.requisicao["corpo"])
+        corpo["from"] = inicio
+        corpo["size"] = self.tamanho_pagina
+        return corpo
+
+    def _renovar_cookies(self, geracao):
+        # Chamado só pela thread de resultados(). Várias páginas recusadas com os mesmos cookies
+        # (mesma geração) renovam uma única vez.
+        if geracao != self._geracao_cookies:
+            return
+        print("Sessão recusada pelo portal do STF; obtendo cookies pelo navegador...")
+        for cookie in self.obter_cookies():
+            self.sessao.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"),
+                                    path=cookie.get("path", "/"))
+        self._geracao_cookies += 1
+
+    def _sessao_recusada(self, erro):
+        return (self.obter_cookies is not None and erro.response is not None
+                and erro.response.status_code in STATUS_SEM_SESSAO)
+
+    def _buscar(self, corpo, renovar=True):
+        """
+        Busca uma página. Com renovar=False (threads do pool) uma recusa da sessão é levantada como
+        HTTPError para que resultados() renove os cookies.
+        """
+        geracao = self._geracao_cookies
+        for tentativa in range(2):
+            with metrics.time_http_request('stf'):
+                resposta = self.sessao.post(self.requisicao["url"], json=corpo, headers=self.requisicao["headers"])
+            if resposta.status_code in STATUS_SEM_SESSAO and tentativa == 0 and renovar and self.obter_cookies is not None:
+                self._renovar_cookies(geracao)
+                continue
+            resposta.raise_for_status()
+            dados = resposta.json()
+            if self.gravar_em:
+                os.makedirs(self.gravar_em, exist_ok=True)
+                with open(os.path.join(self.gravar_em, f"{_chave_gravacao(corpo)}.json"), "w", encoding="utf-8") as f:
+                    json.dump(dados, f, ensure_ascii=False)
+            return dados
+
+    def resultados(self):
+        """
+        Gera os resultados ('_source') de todas as páginas, na ordem da busca.
+
+        :return: Um gerador de dicionários.
+        """
+        primeira = self._buscar(self._corpo(0))
+        yield from resultados_da_pagina(primeira)
+        paginas = math.ceil(total_de_resultados(primeira) / self.tamanho_pagina)
+        if paginas <= 1:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_paralelo, thread_name_prefix="busca-stf") as executor:
+            pendentes = deque()  # (corpo, geração dos cookies no envio, futuro)
+            proxima = 1
+            while proxima < paginas or pendentes:
+                while proxima < paginas and len(pendentes) < 2 * self.max_paralelo:
+                    corpo = self._corpo(proxima * self.tamanho_pagina)
+                    pendentes.append((corpo, self._geracao_cookies, executor.submit(self._buscar, corpo, False)))
+                    proxima += 1
+                corpo, geracao, futuro = pendentes.popleft()
+                try:
+                    dados = futuro.result()
+                except requests.exceptions.HTTPError as e:
+                    if not self._sessao_recusada(e):
+                        raise
+                    # Os cookies expiraram durante a busca: renova aqui e repete a página
+                    self._renovar_cookies(geracao)
+                    dados = self._buscar(corpo, renovar=False)
+                yield from resultados_da_pagina(dados)
+
+    def sumulas(self, mapear=mapear_sumula):
+        """Gera (numero, texto, data) para cada resultado reconhecido como súmula."""
+        data = datetime.now()
+        for fonte in self.resultados():
+            sumula = mapear(fonte, data)
+            if sumula is not None:
+                yield sumula
+
+
+def carregar_no_banco(cliente, conn):
+    """
+    Busca todas as súmulas pelo cliente e grava no banco de súmulas (ver armazenamento_sumulas).
+
+    :return: Lista de SumulaAlterada com as súmulas novas ou alteradas.
+    """
+    from armazenamento_sumulas import sincronizar_sumulas
+
+    sumulas = list(cliente.sumulas())
+    alteradas = sincronizar_sumulas(conn, sumulas)
+    print(f"✅ {len(sumulas)} súmulas obtidas da busca do STF, {len(alteradas)} novas ou alteradas.")
+    return alteradas
+
+
+if __name__ == "__main__":
+    from contextlib import closing
+    from armazenamento_sumulas import abrir_banco
+
+    with ClienteBuscaStf(carregar_requisicao()) as cliente, closing(abrir_banco()) as conn:
+        carregar_no_banco(cliente, conn)
@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import metrics
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional; sem ele o cache usa gzip
+    zstandard = None
+
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+
+def hash_arquivo(caminho):
+    """Calcula o SHA-256 do conteúdo do arquivo, lendo em blocos de 1 MiB."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class CacheTextoPdf:
+    """
+    Cache em disco do texto extraído de PDFs, endereçado pelo conteúdo.
+
+    A chave é o hash do arquivo mais a versão do extrator (backend, versão do pacote e
+    extracao_pdf.VERSAO_EXTRACAO), então renomear ou mover um PDF não invalida o cache e trocar
+    de backend ou de versão gera uma entrada nova. Cada entrada guarda a lista de textos das
+    páginas em JSON comprimido com zstd (se instalado) ou gzip.
+    """
+
+    def __init__(self, diretorio, compressao=None):
+        """
+        :param diretorio: Diretório raiz do cache (criado se não existir).
+        :param compressao: 'zstd' ou 'gzip'. Se None, usa zstd quando disponível.
+        """
+        if compressao is None:
+            compressao = "zstd" if zstandard is not None else "gzip"
+        if compressao == "zstd" and zstandard is None:
+            raise ImportError("Compressão 'zstd' requer o pacote 'zstandard', que não está instalado.")
+        if compressao not in ("zstd", "gzip"):
+            raise ValueError(f"Compressão desconhecida: '{compressao}'. Opções: zstd, gzip.")
+        self.diretorio = diretorio
+        self.compressao = compressao
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, hash_pdf, versao_extrator, compressao):
+        extensao = "zst" if compressao == "zstd" else "gz"
+        return os.path.join(self.diretorio, hash_pdf[:2], f"{hash_pdf}-{versao_extrator}.json.{extensao}")
+
+    def obter(self, hash_pdf, versao_extrator):
+        """Retorna a lista de textos das páginas ou None se não houver entrada válida."""
+        # Aceita entradas gravadas com a outra compressão (ex.: cache criado antes de instalar o zstandard)
+        for compressao in (self.compressao, "gzip" if self.compressao == "zstd" else "zstd"):
+            caminho = self._caminho(hash_pdf, versao_extrator, compressao)
+            if not os.path.exists(caminho):
+                continue
+            try:
+                with open(caminho, "rb") as f:
+                    dados = f.read()
+                if compressao == "zstd":
+                    if zstandard is None:
+                        continue
+                    dados = zstandard.ZstdDecompressor().decompress(dados)
+                else:
+                    dados = gzip.decompress(dados)
+                paginas = json.loads(dados)
+            except (OSError, ValueError, EOFError) as e:
+                # Entrada corrompida (ex.: disco cheio durante a gravação): trata como ausente
+                print(f"Aviso: entrada de cache inválida '{caminho}' ignorada: {e}")
+                continue
+            metrics.record_cache_lookup("pdf_text", True)
+            return paginas
+        metrics.record_cache_lookup("pdf_text", False)
+        return None
+
+    def gravar(self, hash_pdf, versao_extrator, paginas):
+        """Grava a lista de textos das páginas de forma atômica (arquivo temporário + rename)."""
+        dados = json.dumps(list(paginas), ensure_ascii=False).encode("utf-8")
+        if self.compressao == "zstd":
+            dados = zstandard.ZstdCompressor(level=10).compress(dados)
+        else:
+            dados = gzip.compress(dados, compresslevel=6)
+        caminho = self._caminho(hash_pdf, versao_extrator, self.compressao)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dados)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+        return caminho
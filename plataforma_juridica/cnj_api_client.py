@@ -2,6 +2,7 @@ import requests
 import json
 import logging # Import logging module
 import logging_config # Import our logging configuration
+import metrics
 
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
@@ -29,11 +30,14 @@ class CNJAPIClient:
             dict: The JSON response from the API, or None if an error occurs.
         """
         url = f"{self.BASE_URL}{tribunal_endpoint}"
-        logger.debug(f"Sending request to CNJ API: {url} with query: {json.dumps(query)}")
+        if logger.isEnabledFor(logging.DEBUG): # Avoid serializing the query when debug is off
+            logger.debug("Sending request to CNJ API: %s with query: %s", url, json.dumps(query))
         try:
-            response = requests.post(url, headers=self.headers, json=query)
-            response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-            logger.debug(f"Received response from CNJ API (status: {response.status_code}): {response.text[:200]}...") # Log first 200 chars
+            with metrics.time_http_request("cnj"):
+                response = requests.post(url, headers=self.headers, json=query)
+                response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received response from CNJ API (status: %s): %s...", response.status_code, response.text[:200]) # Log first 200 chars
             return response.json()
         except requests.exceptions.HTTPError as http_err:
             logger.error(f"HTTP error occurred during CNJ API call: {http_err} - Response: {response.text}")
@@ -0,0 +1,245 @@
+import hashlib
+import logging # Import logging module
+import re
+import sqlite3
+import unicodedata
+import logging_config # Import our logging configuration
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# Words that do not tell two parties apart ("Banco do Brasil" and "Banco Brasil" are the same name)
+STOPWORDS = frozenset({"DE", "DA", "DO", "DAS", "DOS", "E", "DI", "DU"})
+# Company-type suffixes and their canonical spelling, applied before punctuation is removed
+CORPORATE_SUFFIXES = (
+    (re.compile(r"\bS\s*[./]\s*A\b\.?|\bS\s+A\b"), " SA "),
+    (re.compile(r"\bLTDA\b\.?|\bLIMITADA\b"), " LTDA "),
+    (re.compile(r"\bCOMPANHIA\b|\bCIA\b\.?"), " CIA "),
+    (re.compile(r"\bEIRELI\b|\bE\.I\.R\.E\.L\.I\.?"), " EIRELI "),
+)
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+_DIGITS = re.compile(r"\D")
+
+CREATE_INDEX_TABLE = """
+CREATE TABLE IF NOT EXISTS blocks (
+    key TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    PRIMARY KEY (key, entity_id)
+) WITHOUT ROWID
+"""
+# Unique constraints make the MERGE on the canonical id an index lookup and serialize only
+# writers of the same entity.
+PARTY_CONSTRAINTS = (
+    "CREATE CONSTRAINT pessoa_fisica_id IF NOT EXISTS FOR (p:PessoaFisica) REQUIRE p.id IS UNIQUE",
+    "CREATE CONSTRAINT pessoa_juridica_id IF NOT EXISTS FOR (p:PessoaJuridica) REQUIRE p.id IS UNIQUE",
+)
+PARTY_LABELS = ("PessoaFisica", "PessoaJuridica")
+# Party nodes loaded before canonical ids were keyed on the raw name and have no id property
+LEGACY_PARTIES_QUERY = """
+MATCH (p:{label}) WHERE p.id IS NULL
+RETURN elementId(p) AS node, p.nome AS nome, p.documento AS documento
+SKIP $skip LIMIT $limit
+"""
+# Moves a legacy node's TEM_PARTE and REPRESENTA edges onto the canonical node and deletes it.
+# TEM_PARTE keeps being keyed on tipoParticipacao, like Neo4jClient.create_relationship does.
+MIGRATE_PARTIES_QUERY = """
+UNWIND $rows AS row
+MATCH (old:{label}) WHERE elementId(old) = row.node
+MERGE (party:{label} {{id: row.id}})
+ON CREATE SET party.nome = old.nome, party.tipoPessoa = old.tipoPessoa, party.documento = old.documento
+WITH old, party
+OPTIONAL MATCH (processo:Processo)-[r:TEM_PARTE]->(old)
+FOREACH (tipo IN CASE WHEN r.tipoParticipacao IS NULL THEN [] ELSE [r.tipoParticipacao] END |
+    MERGE (processo)-[:TEM_PARTE {{tipoParticipacao: tipo}}]->(party))
+FOREACH (_ IN CASE WHEN r IS NOT NULL AND r.tipoParticipacao IS NULL THEN [1] ELSE [] END |
+    MERGE (processo)-[:TEM_PARTE]->(party))
+WITH DISTINCT old, party
+OPTIONAL MATCH (advogado:Advogado)-[:REPRESENTA]->(old)
+FOREACH (_ IN CASE WHEN advogado IS NULL THEN [] ELSE [1] END | MERGE (advogado)-[:REPRESENTA]->(party))
+WITH DISTINCT old
+DETACH DELETE old
+"""
+
+
+def normalize_name(name: str) -> str:
+    """
+    Uppercases, strips accents and punctuation and canonicalizes company suffixes.
+
+    "Banco do Brasil S.A." and "BANCO DO BRASIL SA" both become "BANCO DO BRASIL SA".
+    """
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).upper()
+    for pattern, replacement in CORPORATE_SUFFIXES:
+        text = pattern.sub(replacement, text)
+    return " ".join(_NON_ALNUM.sub(" ", text).split())
+
+
+def name_tokens(name: str) -> list:
+    """Sorted distinct tokens of the normalized name, without stopwords ("SILVA, JOSE" == "JOSE DA SILVA")."""
+    return sorted({t for t in normalize_name(name).split() if t not in STOPWORDS})
+
+
+def normalize_document(document: str):
+    """
+    Returns the digits of a complete CPF (11) or CNPJ (14), or None.
+
+    Masked ("***.222.333-**") or truncated numbers are treated as missing: they cannot tell two
+    parties apart.
+    """
+    if not document or "*" in document or "X" in document.upper():
+        return None
+    digits = _DIGITS.sub("", document)
+    return digits if len(digits) in (11, 14) else None
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+
+
+def _kind(person_type: str) -> str:
+    return "PF" if person_type == "FISICA" else "PJ"
+
+
+def document_entity_id(person_type: str, document: str) -> str:
+    """
+    Canonical id derived from a normalized document number.
+
+    Companies are keyed by the CNPJ root (first 8 digits), so every branch of the same company is one
+    node. CPFs are hashed so the id does not expose them.
+    """
+    if len(document) == 14:
+        return f"PJ-{document[:8]}"
+    return f"{_kind(person_type)}-{_hash(document)}"
+
+
+class EntityResolver:
+    """
+    Assigns stable canonical ids to parties before they are loaded into the graph.
+
+    Parties with a complete CPF/CNPJ get an id derived from it. Parties without one get an id derived
+    from their blocking key (person type plus the sorted normalized name tokens), so name variants
+    collapse into one node but a name alone is never attached to a documented entity. Ids depend
+    only on the party itself, never on what was seen before, so they are the same in every run.
+
+    The blocking index is a SQLite table (key, entity_id) recording every entity seen under each key,
+    so candidates() can list the documented entities an undocumented party may be without comparing
+    it against every party. Lookups are memoized in memory and new entries are written in batches.
+
+    Args:
+        path (str): SQLite file of the blocking index, ":memory:" for a throwaway index.
+        batch_size (int): Pending index entries written per executemany.
+    """
+
+    def __init__(self, path: str = "entity_index.sqlite", batch_size: int = 5000):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(CREATE_INDEX_TABLE)
+        self.batch_size = batch_size
+        self._blocks = {}
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def blocking_key(self, name: str, person_type: str):
+        tokens = name_tokens(name)
+        return f"{_kind(person_type)}|{' '.join(tokens)}" if tokens else None
+
+    def _entities(self, key: str) -> set:
+        if key not in self._blocks:
+            rows = self.conn.execute("SELECT entity_id FROM blocks WHERE key = ?", (key,))
+            self._blocks[key] = {row[0] for row in rows}
+        return self._blocks[key]
+
+    def _add(self, key: str, entity_id: str):
+        entities = self._entities(key)
+        if entity_id not in entities:
+            entities.add(entity_id)
+            self._pending.append((key, entity_id))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def resolve(self, name: str, person_type: str, document: str = None):
+        """
+        Returns the canonical id of a party, or None if it has neither a usable name nor document.
+
+        Args:
+            name (str): Party name as found in the source.
+            person_type (str): "FISICA" or "JURIDICA".
+            document (str): CPF/CNPJ in any formatting; masked values are ignored.
+        """
+        key = self.blocking_key(name, person_type)
+        digits = normalize_document(document)
+        if digits:
+            entity_id = document_entity_id(person_type, digits)
+        elif key:
+            entity_id = f"{_kind(person_type)}-N{_hash(key)}"
+        else:
+            return None
+        if key:
+            self._add(key, entity_id)
+        return entity_id
+
+    def candidates(self, name: str, person_type: str) -> set:
+        """
+        Ids of every entity seen under the same blocking key as the given name.
+
+        These are possible matches for manual review; resolve() never merges them automatically.
+        """
+        key = self.blocking_key(name, person_type)
+        return set(self._entities(key)) if key else set()
+
+    def flush(self):
+        if self._pending:
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO blocks (key, entity_id) VALUES (?, ?)", self._pending)
+            logger.debug("Wrote %d entity index entries.", len(self._pending))
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def migrate_name_keyed_parties(run_query, resolver: EntityResolver, batch_size: int = 1000) -> int:
+    """
+    Rewrites party nodes loaded before canonical ids onto their canonical nodes.
+
+    Graphs loaded by earlier versions of process_for_graph key PessoaFisica/PessoaJuridica on the raw
+    name; without this one-off migration every party would end up duplicated next to its new
+    id-keyed node. Legacy nodes are resolved with the same rules as new loads, their edges are moved
+    and they are deleted, in batches. Nodes with neither a name nor a document are left untouched.
+
+    Args:
+        run_query: Callable executing one Cypher statement, e.g. Neo4jClient.run_query.
+        resolver (EntityResolver): Resolver used by the loads.
+        batch_size (int): Legacy nodes migrated per statement.
+
+    Returns:
+        int: Number of legacy nodes migrated.
+    """
+    migrated = 0
+    for label in PARTY_LABELS:
+        person_type = "FISICA" if label == "PessoaFisica" else "JURIDICA"
+        unresolved = 0
+        while True:
+            records = run_query(LEGACY_PARTIES_QUERY.format(label=label), {"skip": unresolved, "limit": batch_size})
+            if not records:
+                break
+            rows = []
+            for record in records:
+                entity_id = resolver.resolve(record["nome"], person_type, record["documento"])
+                if entity_id is None:
+                    unresolved += 1
+                else:
+                    rows.append({"node": record["node"], "id": entity_id})
+            if rows:
+                run_query(MIGRATE_PARTIES_QUERY.format(label=label), {"rows": rows})
+                migrated += len(rows)
+            logger.info("Migrated %d legacy %s node(s) so far.", migrated, label)
+    resolver.flush()
+    return migrated
@@ -0,0 +1,227 @@
+import re
+
+TAMANHO_LOTE = 500
+# Quantos nós co-citados cada nó guarda como arestas CO_CITADO_COM
+TOP_K = 20
+# datetime() é o início da transação de gravar_citacoes, que pode ser confirmada depois do "agora"
+# lido por uma execução em andamento; cada execução relê os documentos desta margem anterior à marca.
+# Recalcular um nó é idempotente, então a sobreposição só custa trabalho repetido.
+MARGEM_MARCA_SEGUNDOS = 600
+
+_ROTULO = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Documento.atualizado_em é gravado por gravar_citacoes depois das arestas CITA; com o índice, cada
+# execução encontra só os documentos gravados desde a anterior.
+INDICE_DOCUMENTO = "CREATE INDEX documento_atualizado_em IF NOT EXISTS FOR (d:Documento) ON (d.atualizado_em)"
+INDICE_CONTAGEM = "CREATE INDEX {indice}_{propriedade} IF NOT EXISTS FOR (n:{rotulo}) ON (n.{propriedade})"
+
+# A marca d'água fica no mesmo nó da versão do grafo (ver graph_queries); "agora" vem do servidor para
+# não depender do relógio da máquina que executa o job.
+CONSULTA_MARCA = """
+OPTIONAL MATCH (m:GrafoMeta {id: 'grafo'})
+RETURN m.estatisticas_ate AS desde, datetime() AS agora
+"""
+AVANCAR_MARCA = "MERGE (m:GrafoMeta {id: 'grafo'}) SET m.estatisticas_ate = $ate"
+
+TODOS_DOCUMENTOS = "MATCH (d:Documento) RETURN d.nome AS nome"
+DOCUMENTOS_ALTERADOS = """
+MATCH (d:Documento)
+WHERE d.atualizado_em > $desde - duration({seconds: $margem}) AND d.atualizado_em <= $ate
+RETURN d.nome AS nome
+"""
+# Nós citados hoje e nós que o documento deixou de citar (Documento.citacoes_removidas, gravado por
+# pipeline_extracao_grafo.gravar_citacoes), como chaves "Rotulo:id" (ver chave_no).
+NOS_CITADOS = """
+UNWIND $nomes AS nome
+MATCH (d:Documento {nome: nome})
+OPTIONAL MATCH (d)-[:CITA]->(n)
+WITH d, collect(labels(n)[0] + ':' + n.id) + coalesce(d.citacoes_removidas, []) AS chaves
+UNWIND chaves AS chave
+RETURN DISTINCT chave
+"""
+
+# Contagens por ano do documento citante; documentos sem ano contam só no total.
+CONTAGENS = """
+UNWIND $ids AS id
+MATCH (n:{rotulo} {{id: id}})<-[r:CITA]-(d:Documento)
+RETURN n.id AS id, d.ano AS ano, count(r) AS documentos, sum(r.count) AS total
+"""
+# Propriedades por ano já gravadas: as de anos que não têm mais citações são removidas.
+PROPRIEDADES_ANO = """
+UNWIND $ids AS id
+MATCH (n:{rotulo} {{id: id}})
+RETURN n.id AS id, [p IN keys(n) WHERE p STARTS WITH 'citacoes_'] AS propriedades
+"""
+GRAVAR_CONTAGENS = """
+UNWIND $linhas AS l
+MATCH (n:{rotulo} {{id: l.id}})
+SET n += l.propriedades
+"""
+
+# Peso de um par = número de documentos que citam os dois nós. Só os k mais pesados de cada nó
+# saem do servidor.
+COCITACOES = """
+UNWIND $ids AS id
+MATCH (n:{rotulo} {{id: id}})<-[:CITA]-(d:Documento)-[:CITA]->(m)
+WHERE m <> n
+WITH n, m, count(d) AS peso
+ORDER BY peso DESC, m.id
+WITH n, collect({{rotulo: labels(m)[0], id: m.id, peso: peso}})[..$k] AS pares
+RETURN n.id AS id, pares
+"""
+# A aresta (a)-[:CO_CITADO_COM]->(b) significa "b está entre os k mais co-citados com a"; as arestas
+# de saída de um nó são sempre regravadas juntas, então a lista de cada nó nunca fica parcialmente velha.
+REMOVER_COCITACOES = """
+UNWIND $ids AS id
+MATCH (:{rotulo} {{id: id}})-[c:CO_CITADO_COM]->()
+DELETE c
+"""
+GRAVAR_COCITACOES = """
+UNWIND $pares AS p
+MATCH (a:{rotulo} {{id: p.origem}})
+MATCH (b:{rotulo_alvo} {{id: p.alvo}})
+CREATE (a)-[:CO_CITADO_COM {{peso: p.peso}}]->(b)
+"""
+
+
+def propriedade_ano(ano):
+    """Nome da propriedade com as citações de um ano ("citacoes_2024")."""
+    return f"citacoes_{int(ano)}"
+
+
+def chave_no(rotulo, id_no):
+    """Identifica um nó citado por rótulo e id ("Lei:Lei nº 8.078/1990")."""
+    return f"{rotulo}:{id_no}"
+
+
+def _lotes(itens, tamanho=TAMANHO_LOTE):
+    itens = list(itens)
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def documentos_alterados(run_query, desde, ate, margem=MARGEM_MARCA_SEGUNDOS):
+    """Nomes dos documentos gravados depois de `desde` menos `margem` segundos (todos, se `desde` é None)."""
+    if desde is None:
+        registros = run_query(TODOS_DOCUMENTOS)
+    else:
+        registros = run_query(DOCUMENTOS_ALTERADOS, {"desde": desde, "ate": ate, "margem": margem})
+    return [r["nome"] for r in registros]
+
+
+def nos_afetados(run_query, nomes):
+    """
+    Agrupa por rótulo os nós citados pelos documentos informados ou que eles deixaram de citar.
+
+    :return: Dicionário rótulo -> conjunto de ids.
+    """
+    afetados = {}
+    for lote in _lotes(nomes):
+        for r in run_query(NOS_CITADOS, {"nomes": lote}):
+            rotulo, _, id_no = r["chave"].partition(":")
+            if _ROTULO.match(rotulo):
+                afetados.setdefault(rotulo, set()).add(id_no)
+    return afetados
+
+
+def atualizar_contagens(run_query, rotulo, ids):
+    """
+    Recalcula total_citacoes, documentos_citantes e citacoes_<ano> dos nós informados.
+
+    Nós sem citações ficam com os totais zerados e as propriedades de anos sem citações são removidas
+    (gravadas como null), para que citações que mudaram de ano ou deixaram de existir não fiquem contadas.
+
+    :return: Conjunto dos anos encontrados, para a criação dos índices.
+    """
+    anos = set()
+    for lote in _lotes(sorted(ids)):
+        propriedades = {
+            r["id"]: {**dict.fromkeys(r["propriedades"]), "total_citacoes": 0, "documentos_citantes": 0}
+            for r in run_query(PROPRIEDADES_ANO.format(rotulo=rotulo), {"ids": lote})
+        }
+        for r in run_query(CONTAGENS.format(rotulo=rotulo), {"ids": lote}):
+            p = propriedades.setdefault(r["id"], {"total_citacoes": 0, "documentos_citantes": 0})
+            p["total_citacoes"] += r["total"]
+            p["documentos_citantes"] += r["documentos"]
+            if r["ano"] is not None:
+                p[propriedade_ano(r["ano"])] = r["total"]
+                anos.add(int(r["ano"]))
+        linhas = [{"id": id_no, "propriedades": p} for id_no, p in propriedades.items()]
+        if linhas:
+            run_query(GRAVAR_CONTAGENS.format(rotulo=rotulo), {"linhas": linhas})
+    return anos
+
+
+def atualizar_cocitacoes(run_query, rotulo, ids, k=TOP_K):
+    """Regrava as arestas CO_CITADO_COM de saída dos nós informados com os k pares mais pesados."""
+    for lote in _lotes(sorted(ids)):
+        por_rotulo_alvo = {}
+        for r in run_query(COCITACOES.format(rotulo=rotulo), {"ids": lote, "k": k}):
+            for par in r["pares"]:
+                if _ROTULO.match(par["rotulo"] or ""):
+                    por_rotulo_alvo.setdefault(par["rotulo"], []).append(
+                        {"origem": r["id"], "alvo": par["id"], "peso": par["peso"]}
+                    )
+        run_query(REMOVER_COCITACOES.format(rotulo=rotulo), {"ids": lote})
+        for rotulo_alvo, pares in por_rotulo_alvo.items():
+            run_query(GRAVAR_COCITACOES.format(rotulo=rotulo, rotulo_alvo=rotulo_alvo), {"pares": pares})
+
+
+def atualizar_estatisticas(run_query, k=TOP_K, completo=False, margem=MARGEM_MARCA_SEGUNDOS):
+    """
+    Materializa as estatísticas de citação dos nós citados por documentos novos ou regravados.
+
+    Só os nós citados (ou deixados de citar) pelos documentos com Documento.atualizado_em posterior à
+    marca d'água menos `margem` são recalculados: um par co-citado só muda de peso quando um documento
+    que cita ou citava os dois muda, e esse documento torna os dois nós afetados. A marca só avança ao
+    final, então uma execução interrompida é refeita por inteiro na próxima.
+
+    :param run_query: Função que executa uma instrução Cypher e retorna os registros, como
+                      Neo4jConnection.execute_query ou Neo4jClient.run_query.
+    :param k: Quantos co-citados manter por nó.
+    :param completo: Ignora a marca d'água e recalcula todos os nós citados.
+    :param margem: Segundos antes da marca d'água relidos a cada execução (ver MARGEM_MARCA_SEGUNDOS).
+    :return: Número de nós recalculados.
+    """
+    run_query(INDICE_DOCUMENTO)
+    marca = run_query(CONSULTA_MARCA)
+    if not marca:
+        return 0
+    desde = None if completo else marca[0]["desde"]
+    ate = marca[0]["agora"]
+
+    nomes = documentos_alterados(run_query, desde, ate, margem)
+    afetados = nos_afetados(run_query, nomes)
+    total = 0
+    for rotulo, ids in afetados.items():
+        anos = atualizar_contagens(run_query, rotulo, ids)
+        for propriedade in ["total_citacoes"] + [propriedade_ano(ano) for ano in sorted(anos)]:
+            run_query(INDICE_CONTAGEM.format(indice=rotulo.lower(), propriedade=propriedade, rotulo=rotulo))
+        atualizar_cocitacoes(run_query, rotulo, ids, k)
+        total += len(ids)
+
+    run_query(AVANCAR_MARCA, {"ate": ate})
+    print(f"Estatísticas de citação: {len(nomes)} documento(s) novo(s) ou alterado(s), {total} nó(s) recalculado(s).")
+    return total
+
+
+def main():
+    import sys
+    from pipeline_extracao_grafo import Neo4jConnection, ler_configuracoes
+    from graph_queries import BUMP_GRAPH_VERSION_QUERY
+
+    print("--- Materializando estatísticas de citação ---")
+    try:
+        config = ler_configuracoes()
+        neo4j_conn = Neo4jConnection(config['NEO4J']['URI'], config['NEO4J']['USER'], config['NEO4J']['PASSWORD'])
+    except (FileNotFoundError, KeyError) as e:
+        print(f"[ERRO] Erro ao ler o arquivo de configuração: {e}")
+        return
+
+    if atualizar_estatisticas(neo4j_conn.execute_query, completo="--completo" in sys.argv[1:]):
+        neo4j_conn.execute_query(BUMP_GRAPH_VERSION_QUERY)
+    neo4j_conn.close()
+
+
+if __name__ == "__main__":
+    main()
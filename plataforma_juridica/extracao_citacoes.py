@@ -0,0 +1,319 @@
+import re
+from typing import NamedTuple
+import normalizacao
+
+
+class Citacao(NamedTuple):
+    """Uma citação encontrada no texto: regra (LEI, ARTIGO, ...), texto original e posição em caracteres."""
+    regra: str
+    texto: str
+    inicio: int
+    fim: int
+
+
+def criar_matcher(vocab):
+    """Cria o Matcher com os padrões de citação (LEI, ARTIGO, SUMULA, CONSTITUICAO, CODIGO)."""
+    from spacy.matcher import Matcher  # Importado aqui para que o MotorRegex funcione sem spaCy instalado
+    matcher = Matcher(vocab)
+
+    pattern_lei = [{"LOWER": {"IN": ["lei", "decreto-lei"]}}, {"LOWER": "nº"}, {"TEXT": {"REGEX": "^\\d{1,3}(\\.\\d{3})*\\/\\d{4}$"}}]
+    matcher.add("LEI", [pattern_lei])
+
+    # Número do artigo: "5", "5º" e, acima de 999, com separador de milhar ("1.228")
+    pattern_artigo = [{"LOWER": {"IN": ["artigo", "art.", "art"]}}, {"TEXT": {"REGEX": "^(\\d+|\\d{1,3}(\\.\\d{3})+)(º\\.?)?$"}}]
+    matcher.add("ARTIGO", [pattern_artigo])
+
+    pattern_sumula = [{"LOWER": {"IN": ["súmula", "sv"]}}, {"LOWER": "vinculante", "OP": "?"}, {"LOWER": {"IN": ["nº", "n."]}, "OP": "?"}, {"IS_DIGIT": True}]
+    matcher.add("SUMULA", [pattern_sumula])
+
+    pattern_cf_completa = [{"LOWER": "constituição"}, {"LOWER": "da"}, {"LOWER": "república"}, {"LOWER": "federativa"}, {"LOWER": "do"}, {"LOWER": "brasil"}]
+    pattern_cf_federal = [{"LOWER": "constituição"}, {"LOWER": "federal"}]
+    pattern_cf_88 = [{"LOWER": "constituição"}, {"LOWER": "de"}, {"LOWER": "1988"}]
+    pattern_cf_sigla = [{"TEXT": {"IN": ["CF", "CRFB", "CF/88"]}}]
+    matcher.add("CONSTITUICAO", [pattern_cf_completa, pattern_cf_federal, pattern_cf_88, pattern_cf_sigla])
+
+    pattern_codigo_simples = [{"LOWER": "código"}, {"LOWER": {"IN": ["civil", "penal", "tributário", "eleitoral", "florestal"]}}]
+    pattern_codigo_processo = [{"LOWER": "código"}, {"LOWER": "de"}, {"LOWER": "processo"}, {"LOWER": {"IN": ["civil", "penal"]}}]
+    pattern_codigo_consumidor = [{"LOWER": "código"}, {"LOWER": "de"}, {"LOWER": "defesa"}, {"LOWER": "do"}, {"LOWER": "consumidor"}]
+    matcher.add("CODIGO", [pattern_codigo_simples, pattern_codigo_processo, pattern_codigo_consumidor])
+
+    return matcher
+
+
+# Todo padrão do Matcher começa por um destes tokens. A busca ignora maiúsculas e exige que a
+# palavra-chave não esteja colada a outras letras ("parte", "leilão" não geram candidatos).
+PREFILTRO = re.compile(
+    r"(?<![^\W\d_])(?:decreto-lei|lei|artigo|art|súmula|sv|constituição|código|crfb|cf)(?![^\W\d_])",
+    re.IGNORECASE,
+)
+# O padrão mais longo (Constituição da República Federativa do Brasil) tem 6 tokens; cada trecho
+# sem espaços gera pelo menos um token, então 6 trechos a partir da palavra-chave cobrem qualquer citação.
+TRECHOS_POR_JANELA = 6
+_JANELA = re.compile(r"\S+(?:\s+\S+){0,%d}" % (TRECHOS_POR_JANELA - 1))
+
+
+def janelas_candidatas(texto):
+    """
+    Retorna intervalos (inicio, fim) do texto que podem conter citações, já mesclados.
+
+    As janelas começam e terminam em espaços em branco. Como o tokenizador do spaCy trata cada
+    trecho entre espaços de forma independente, tokenizar só as janelas produz os mesmos tokens
+    que tokenizar o texto inteiro.
+    """
+    janelas = []
+    for m in PREFILTRO.finditer(texto):
+        inicio = m.start()
+        while inicio > 0 and not texto[inicio - 1].isspace():
+            inicio -= 1
+        fim = _JANELA.match(texto, inicio).end()
+        if janelas and inicio <= janelas[-1][1]:
+            # Sobrepõe a janela anterior: mescla, para não tokenizar nem casar o mesmo trecho duas vezes
+            janelas[-1] = (janelas[-1][0], max(janelas[-1][1], fim))
+        else:
+            janelas.append((inicio, fim))
+    return janelas
+
+
+class MotorSpacy:
+    """
+    Extrai citações com o Matcher do spaCy usando apenas o tokenizador.
+
+    Os padrões só usam LOWER/TEXT/IS_DIGIT/REGEX, então tagger, parser e NER do modelo completo não
+    são necessários. Com `prefiltro`, só as janelas em torno de palavras-chave são tokenizadas.
+    """
+
+    def __init__(self, nlp, prefiltro=True):
+        self.nlp = nlp
+        self.prefiltro = prefiltro
+        self.matcher = criar_matcher(nlp.vocab)
+
+    def _citacoes_do_doc(self, doc, deslocamento=0):
+        for match_id, start, end in self.matcher(doc):
+            span = doc[start:end]
+            yield Citacao(self.nlp.vocab.strings[match_id], span.text,
+                          deslocamento + span.start_char, deslocamento + span.end_char)
+
+    def citacoes(self, texto):
+        """Gera as citações (Citacao) encontradas em um texto, na ordem do Matcher."""
+        if not self.prefiltro:
+            yield from self._citacoes_do_doc(self.nlp.make_doc(texto))
+            return
+        for inicio, fim in janelas_candidatas(texto):
+            yield from self._citacoes_do_doc(self.nlp.make_doc(texto[inicio:fim]), inicio)
+
+    def citacoes_por_pagina(self, paginas):
+        """Gera (indice_pagina, Citacao) para um iterável de textos de página."""
+        for indice, texto in enumerate(paginas):
+            for citacao in self.citacoes(texto):
+                yield indice, citacao
+
+
+def citacoes_com_contexto(motor, paginas):
+    """
+    Gera (numero_pagina, texto_pagina, Citacao) para pares (indice, texto) de extracao_pdf.iterar_paginas.
+
+    numero_pagina é indice + 1, o número da página no PDF: páginas omitidas (em branco) não deslocam
+    a numeração das seguintes, e a ordem de chegada das páginas é preservada.
+    """
+    for indice, texto in paginas:
+        for citacao in motor.citacoes(texto):
+            yield indice + 1, texto, citacao
+
+
+# --- Motor sem spaCy ---
+# Os padrões abaixo reproduzem os do Matcher sobre o texto bruto, imitando o tokenizador do spaCy:
+# tokens consecutivos de um padrão são separados por exatamente um espaço (quebras de linha e espaços
+# duplos viram tokens próprios no spaCy) e cada token termina em espaço, fim do texto ou pontuação
+# que o tokenizador separa como sufixo.
+_INICIO = r"(?<![^\s(\[{\"'«“‘])"
+_SUFIXOS = r"[.,;:!?)\]}\"'»”’…]"
+_FIM = rf"(?={_SUFIXOS}*(?:\s|$))"
+# "12%", "12°" e "12/STJ" também são separados pelo tokenizador; "12.5", "12ª" e "12-A" não
+_NUMERO = rf"[0-9]+(?=[%°]*{_SUFIXOS}*(?:\s|$)|/[^\W\d_])"
+# Com "º" o tokenizador não separa "%" nem "/STJ" e mantém o ponto final no token ("5º."); sem ele, "1.228." vira "1.228" + "."
+_NUMERO_ARTIGO = (
+    rf"(?:[0-9]{{1,3}}(?:\.[0-9]{{3}})+|[0-9]+)"
+    rf"(?:º(?:\.(?=\s|$))?(?={_SUFIXOS}*(?:\s|$))|(?=[%°]*{_SUFIXOS}*(?:\s|$)|/[^\W\d_]))"
+)
+
+PADROES_REGEX = {
+    "LEI": [rf"(?:decreto-lei|lei) nº [0-9]{{1,3}}(?:\.[0-9]{{3}})*/[0-9]{{4}}{_FIM}"],
+    "ARTIGO": [rf"(?:artigo|art\.|art) {_NUMERO_ARTIGO}"],
+    "SUMULA": [rf"(?:súmula|sv)(?: vinculante)?(?: (?:nº|n\.))? {_NUMERO}"],
+    "CONSTITUICAO": [
+        rf"constituição da república federativa do brasil{_FIM}",
+        rf"constituição federal{_FIM}",
+        rf"constituição de 1988{_FIM}",
+        rf"(?-i:CF/88|CRFB|CF){_FIM}",
+    ],
+    "CODIGO": [
+        rf"código (?:civil|penal|tributário|eleitoral|florestal){_FIM}",
+        rf"código de processo (?:civil|penal){_FIM}",
+        rf"código de defesa do consumidor{_FIM}",
+    ],
+}
+
+# Maior trecho que uma citação pode ocupar; define quanto texto é retido entre blocos no modo em fluxo
+MARGEM_FLUXO = 256
+
+
+class MotorRegex:
+    """
+    Extrai citações apenas com expressões regulares, sem spaCy.
+
+    Produz as mesmas citações que o MotorSpacy (ver tests/test_extracao_citacoes.py) a uma fração do
+    custo, para corpora grandes. Todos os padrões são compilados em uma única alternância com um grupo
+    nomeado por regra, então o texto é percorrido uma só vez. Como nenhuma citação contém a palavra-chave
+    de outra, as correspondências não se sobrepõem e saem na mesma ordem do Matcher.
+    """
+
+    def __init__(self):
+        alternativas = "|".join(
+            f"(?P<{regra}>{'|'.join(padroes)})" for regra, padroes in PADROES_REGEX.items()
+        )
+        self._padrao = re.compile(f"{_INICIO}(?:{alternativas})", re.IGNORECASE)
+
+    def _buscar(self, texto, deslocamento=0, limite=None):
+        encontradas = []
+        for m in self._padrao.finditer(texto):
+            if limite is not None and m.start() >= limite:
+                break
+            encontradas.append(Citacao(m.lastgroup, m.group(), deslocamento + m.start(), deslocamento + m.end()))
+        return encontradas
+
+    def citacoes(self, texto):
+        """Gera as citações (Citacao) encontradas em um texto, ordenadas por posição."""
+        yield from self._buscar(texto)
+
+    def citacoes_por_pagina(self, paginas):
+        """Gera (indice_pagina, Citacao) para um iterável de textos de página."""
+        for indice, texto in enumerate(paginas):
+            for citacao in self._buscar(texto):
+                yield indice, citacao
+
+    def citacoes_em_fluxo(self, blocos):
+        """
+        Gera as citações de um texto recebido em blocos de tamanho arbitrário (ex.: leitura de um
+        arquivo grande), sem montá-lo inteiro em memória. As posições são relativas ao texto completo.
+
+        Os últimos MARGEM_FLUXO caracteres de cada bloco são retidos e reprocessados com o próximo, a
+        partir de um espaço em branco, para encontrar citações que atravessam a divisa entre blocos.
+        """
+        pendente = ""
+        deslocamento = 0
+        for bloco in blocos:
+            pendente += bloco
+            corte = len(pendente) - MARGEM_FLUXO
+            while corte > 0 and not pendente[corte].isspace():
+                corte -= 1
+            if corte <= 0:
+                continue
+            yield from self._buscar(pendente, deslocamento, limite=corte)
+            pendente = pendente[corte:]
+            deslocamento += corte
+        yield from self._buscar(pendente, deslocamento)
+
+
+# --- Citações compostas de artigos ---
+# "art. 5º, inciso LV, da CF" e "art. 927 do CPC" são resolvidos em (diploma, artigo, parágrafo, inciso),
+# para que cada artigo vire um nó próprio do seu diploma em vez de um "Art. 5" compartilhado por todos.
+
+# Nome canônico -> (rótulo no grafo, nomes por extenso, siglas). Os nomes canônicos são os mesmos de
+# normalizar_entidade, para que o diploma do artigo seja o mesmo nó das citações diretas; leis
+# numeradas passam pelo mesmo normalizacao.normalizar("LEI", ...) das citações diretas.
+DIPLOMAS = {
+    "Constituição Federal de 1988": ("Constituicao", [
+        "Constituição da República Federativa do Brasil", "Constituição Federal", "Constituição da República",
+        "Constituição de 1988", "Carta Magna",
+    ], ["CRFB/88", "CRFB/1988", "CF/88", "CF/1988", "CRFB", "CF"]),
+    "Código de Processo Civil": ("Codigo", ["Código de Processo Civil"], ["CPC/2015", "CPC/15", "CPC"]),
+    "Código de Processo Penal": ("Codigo", ["Código de Processo Penal"], ["CPP"]),
+    "Código Civil": ("Codigo", ["Código Civil"], ["CC/2002", "CC/02", "CC"]),
+    "Código Penal": ("Codigo", ["Código Penal"], ["CP"]),
+    "Código Tributário Nacional": ("Codigo", ["Código Tributário Nacional", "Código Tributário"], ["CTN"]),
+    "Código de Defesa do Consumidor": ("Codigo", ["Código de Defesa do Consumidor"], ["CDC"]),
+    "Consolidação das Leis do Trabalho": ("Codigo", ["Consolidação das Leis do Trabalho"], ["CLT"]),
+}
+
+_NOMES_DIPLOMAS = {}
+_SIGLAS_DIPLOMAS = {}
+for _canonico, (_rotulo, _nomes, _siglas) in DIPLOMAS.items():
+    _NOMES_DIPLOMAS.update({nome.lower(): _canonico for nome in _nomes})
+    _SIGLAS_DIPLOMAS.update({sigla: _canonico for sigla in _siglas})
+
+_SEM_LETRA_APOS = r"(?![^\W\d_])"
+_DIPLOMA = re.compile(
+    r"\s*,?\s*(?:(?:d[oa]s?|desta|deste)\s+)?(?:"
+    r"(?P<lei>(?P<tipo_lei>decreto-lei|lei complementar|lei)\s*(?:n[º°o.]*\s*)?"
+    r"(?P<numero_lei>\d{1,3}(?:\.\d{3})*|\d+)\s*/\s*(?P<ano_lei>\d{4}|\d{2}))" + _SEM_LETRA_APOS + "|"
+    r"(?P<nome>" + "|".join(re.escape(n) for n in sorted(_NOMES_DIPLOMAS, key=len, reverse=True)) + ")" + _SEM_LETRA_APOS + "|"
+    r"(?-i:(?P<sigla>" + "|".join(re.escape(s) for s in sorted(_SIGLAS_DIPLOMAS, key=len, reverse=True)) + "))"
+    + _SEM_LETRA_APOS + ")",
+    re.IGNORECASE,
+)
+_ARTIGO = re.compile(
+    r"(?:artigo|art\.?)\s*(?P<numero>\d{1,3}(?:\.\d{3})+|\d+)\s*[º°]?",
+    re.IGNORECASE,
+)
+_PARAGRAFO = re.compile(
+    r"\s*,?\s*(?:§\s*(?P<numero>\d+)\s*[º°]?|par[áa]grafo\s+(?:(?P<unico>[úu]nico)|(?P<numero_extenso>\d+)\s*[º°]?))",
+    re.IGNORECASE,
+)
+# "inciso LV" ou só o numeral romano após a vírgula ("art. 5º, LV, da CF"); este último precisa ser um
+# numeral bem formado em maiúsculas e não pode ser a sigla de um diploma ("art. 186, CC").
+_ROMANO = r"(?=[IVXLCDM])M{0,3}(?:CM|CD|D?C{0,3})(?:XC|XL|L?X{0,3})(?:IX|IV|V?I{0,3})"
+_INCISO = re.compile(
+    r"\s*,?\s*(?:inciso|inc\.)\s*(?P<inciso>[IVXLCDM]+)(?![^\W\d_])|"
+    r"\s*,\s*(?-i:(?P<romano>" + _ROMANO + r"))(?![^\W\d_])",
+    re.IGNORECASE,
+)
+
+
+class ReferenciaArtigo(NamedTuple):
+    """Dispositivo citado: diploma (nome canônico ou None se não identificado), artigo, parágrafo e inciso."""
+    diploma: str
+    rotulo_diploma: str
+    artigo: str
+    paragrafo: str = None
+    inciso: str = None
+
+
+def _diploma_de(m):
+    if m.group("lei"):
+        return normalizacao.normalizar("LEI", m.group("lei")), "Lei"
+    canonico = _NOMES_DIPLOMAS[m.group("nome").lower()] if m.group("nome") else _SIGLAS_DIPLOMAS[m.group("sigla")]
+    return canonico, DIPLOMAS[canonico][0]
+
+
+def resolver_artigo(texto, citacao):
+    """
+    Lê o texto a partir de uma citação ARTIGO e resolve parágrafo, inciso e diploma que a seguem.
+
+    Reconhece a ordem usual "art. N[, § M | parágrafo único][, [inciso] X][,] da/do DIPLOMA". Quando o
+    diploma não aparece logo após o dispositivo, ReferenciaArtigo.diploma é None.
+
+    :param texto: Texto em que a citação foi encontrada (as posições da citação são relativas a ele).
+    :param citacao: Citacao com regra ARTIGO.
+    :return: ReferenciaArtigo, ou None se o trecho não for um artigo.
+    """
+    m = _ARTIGO.match(texto, citacao.inicio)
+    if not m:
+        return None
+    artigo = m.group("numero").replace(".", "")
+    posicao = m.end()
+
+    paragrafo = inciso = None
+    m = _PARAGRAFO.match(texto, posicao)
+    if m:
+        paragrafo = "único" if m.group("unico") else (m.group("numero") or m.group("numero_extenso"))
+        posicao = m.end()
+    m = _INCISO.match(texto, posicao)
+    if m and m.group("romano") not in _SIGLAS_DIPLOMAS:
+        inciso = (m.group("inciso") or m.group("romano")).upper()
+        posicao = m.end()
+
+    m = _DIPLOMA.match(texto, posicao)
+    if not m:
+        return ReferenciaArtigo(None, None, artigo, paragrafo, inciso)
+    diploma, rotulo = _diploma_de(m)
+    return ReferenciaArtigo(diploma, rotulo, artigo, paragrafo, inciso)
@@ -0,0 +1,255 @@
+import importlib.metadata
+import importlib.util
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from cache_texto_pdf import hash_arquivo
+from ocr_pdf import completar_com_ocr
+
+# Ordem de preferência quando nenhum backend é indicado: pdfium (C++) é o mais rápido,
+# pypdf é puro Python e sempre instalado junto com o pipeline, pdfminer é o mais lento.
+ORDEM_PREFERENCIA = ("pdfium", "pypdf", "pdfminer")
+
+# Abaixo deste número de páginas o custo de iniciar processos não compensa
+MIN_PAGINAS_PARALELO = 64
+PAGINAS_POR_LOTE = 16
+
+# Incrementar quando a pós-extração mudar (ex.: normalização de quebras de linha), para invalidar o cache
+VERSAO_EXTRACAO = 1
+
+
+# Cada backend implementa contar_paginas(caminho) e extrair_paginas(caminho, inicio, fim), um gerador
+# que abre o arquivo uma única vez e produz o texto das páginas [inicio, fim) em ordem.
+
+class BackendPypdf:
+    """Extração com pypdf (puro Python)."""
+    nome = "pypdf"
+    modulo = "pypdf"
+    distribuicao = "pypdf"
+
+    def contar_paginas(self, caminho):
+        from pypdf import PdfReader
+        return len(PdfReader(caminho).pages)
+
+    def extrair_paginas(self, caminho, inicio, fim):
+        from pypdf import PdfReader
+        reader = PdfReader(caminho)
+        for i in range(inicio, fim):
+            yield reader.pages[i].extract_text() or ""
+
+
+class BackendPdfium:
+    """Extração com pypdfium2 (bindings do PDFium, usado pelo Chrome)."""
+    nome = "pdfium"
+    modulo = "pypdfium2"
+    distribuicao = "pypdfium2"
+
+    def contar_paginas(self, caminho):
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(caminho)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def extrair_paginas(self, caminho, inicio, fim):
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(caminho)
+        try:
+            for i in range(inicio, fim):
+                pagina = pdf[i]
+                textpage = pagina.get_textpage()
+                texto = textpage.get_text_range().replace("\r\n", "\n")
+                textpage.close()
+                pagina.close()
+                yield texto
+        finally:
+            pdf.close()
+
+
+class BackendPdfminer:
+    """Extração com pdfminer.six."""
+    nome = "pdfminer"
+    modulo = "pdfminer"
+    distribuicao = "pdfminer.six"
+
+    def contar_paginas(self, caminho):
+        from pdfminer.pdfpage import PDFPage
+        with open(caminho, "rb") as f:
+            return sum(1 for _ in PDFPage.get_pages(f))
+
+    def extrair_paginas(self, caminho, inicio, fim):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        for layout in extract_pages(caminho, page_numbers=range(inicio, fim)):
+            yield "".join(e.get_text() for e in layout if isinstance(e, LTTextContainer)).strip("\n")
+
+
+BACKENDS = {backend.nome: backend for backend in (BackendPdfium, BackendPypdf, BackendPdfminer)}
+
+
+def backends_disponiveis():
+    """Retorna os nomes dos backends instalados, na ordem de preferência."""
+    return [nome for nome in ORDEM_PREFERENCIA if importlib.util.find_spec(BACKENDS[nome].modulo) is not None]
+
+
+def obter_backend(nome=None):
+    """
+    Retorna uma instância do backend de extração.
+
+    :param nome: 'pdfium', 'pypdf' ou 'pdfminer'. Se None, usa o mais rápido instalado.
+    :return: A instância do backend.
+    """
+    if nome is None:
+        disponiveis = backends_disponiveis()
+        if not disponiveis:
+            raise ImportError("Nenhum backend de extração de PDF instalado (pypdfium2, pypdf ou pdfminer.six).")
+        nome = disponiveis[0]
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de PDF desconhecido: '{nome}'. Opções: {', '.join(BACKENDS)}.")
+    if importlib.util.find_spec(BACKENDS[nome].modulo) is None:
+        raise ImportError(f"O backend '{nome}' requer o pacote '{BACKENDS[nome].modulo}', que não está instalado.")
+    return BACKENDS[nome]()
+
+
+def versao_extrator(backend):
+    """Identifica o extrator (backend, versão do pacote e VERSAO_EXTRACAO) para compor a chave do cache."""
+    try:
+        versao_pacote = importlib.metadata.version(backend.distribuicao)
+    except importlib.metadata.PackageNotFoundError:
+        versao_pacote = "desconhecida"
+    return f"{backend.nome}-{versao_pacote}-v{VERSAO_EXTRACAO}"
+
+
+def _extrair_lote(nome_backend, caminho, inicio, fim):
+    # Executado nos processos do pool: cada lote reabre o arquivo com seu próprio backend
+    return list(BACKENDS[nome_backend]().extrair_paginas(caminho, inicio, fim))
+
+
+def _iterar_em_paralelo(backend, caminho, total, executor, workers, paginas_por_lote):
+    lotes = [(inicio, min(inicio + paginas_por_lote, total)) for inicio in range(0, total, paginas_por_lote)]
+    proprio_executor = executor is None
+    if proprio_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pendentes = []
+        proximo = 0
+        # Mantém no máximo 2 lotes por worker em andamento e entrega as páginas em ordem
+        while proximo < len(lotes) or pendentes:
+            while proximo < len(lotes) and len(pendentes) < 2 * workers:
+                inicio, fim = lotes[proximo]
+                pendentes.append((inicio, executor.submit(_extrair_lote, backend.nome, caminho, inicio, fim)))
+                proximo += 1
+            inicio, futuro = pendentes.pop(0)
+            for deslocamento, texto in enumerate(futuro.result()):
+                yield inicio + deslocamento, texto
+    finally:
+        if proprio_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def _iterar_com_prefetch(backend, caminho, total, prefetch):
+    # Uma thread extrai as próximas páginas enquanto o consumidor processa a atual
+    fila = queue.Queue(maxsize=prefetch)
+    parar = threading.Event()
+    fim = object()
+
+    def produzir():
+        try:
+            for numero, texto in enumerate(backend.extrair_paginas(caminho, 0, total)):
+                if parar.is_set():
+                    return
+                fila.put((numero, texto))
+            fila.put(fim)
+        except Exception as e:
+            fila.put(e)
+
+    thread = threading.Thread(target=produzir, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = fila.get()
+            if item is fim:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        parar.set()
+        # Libera a thread caso ela esteja bloqueada em uma fila cheia
+        while thread.is_alive():
+            try:
+                fila.get_nowait()
+            except queue.Empty:
+                thread.join(timeout=0.05)
+
+
+def _gravar_ao_final(paginas, cache, hash_pdf, versao, falhas_ocr=()):
+    # Repassa as páginas ao consumidor e só grava no cache se o arquivo foi lido até o fim.
+    # Com OCR as páginas podem chegar fora de ordem, então o cache é gravado ordenado pelo número.
+    # Se o OCR de alguma página falhou, nada é gravado: a chave inclui a versão do OCR e o texto
+    # incompleto seria servido do cache sem nova tentativa.
+    textos = {}
+    for numero, texto in paginas:
+        textos[numero] = texto
+        yield numero, texto
+    if falhas_ocr:
+        print(f"Aviso: texto não gravado no cache porque o OCR falhou em {len(falhas_ocr)} página(s).")
+        return
+    cache.gravar(hash_pdf, versao, [textos[numero] for numero in sorted(textos)])
+
+
+def iterar_paginas(caminho, backend=None, workers=None, executor=None, prefetch=2,
+                   paginas_por_lote=PAGINAS_POR_LOTE, min_paginas_paralelo=MIN_PAGINAS_PARALELO, cache=None, ocr=None):
+    """
+    Gera (número da página, texto) para cada página do PDF, em ordem.
+
+    Arquivos grandes são divididos em lotes de páginas extraídos em paralelo por processos; arquivos
+    pequenos são lidos por uma thread que antecipa `prefetch` páginas. Nos dois casos o consumidor
+    recebe a página N enquanto as seguintes ainda estão sendo extraídas.
+
+    :param caminho: Caminho do arquivo PDF.
+    :param backend: Nome do backend ou instância retornada por obter_backend(). None usa o mais rápido instalado.
+    :param workers: Número de processos para arquivos grandes (padrão: número de CPUs). 1 desativa o paralelismo.
+    :param executor: ProcessPoolExecutor reaproveitado entre arquivos (opcional).
+    :param cache: CacheTextoPdf (opcional). Um PDF já extraído com o mesmo extrator não é reaberto.
+    :param ocr: FilaOcr (opcional). Páginas sem camada de texto são reconhecidas por OCR e entregues
+                quando ficam prontas, fora de ordem.
+    :return: Um gerador de tuplas (numero_pagina, texto), com numero_pagina começando em 0.
+    """
+    if backend is None or isinstance(backend, str):
+        backend = obter_backend(backend)
+    if cache is not None:
+        hash_pdf, versao = hash_arquivo(caminho), versao_extrator(backend)
+        if ocr is not None:
+            versao = f"{versao}+{ocr.versao}"
+        paginas = cache.obter(hash_pdf, versao)
+        if paginas is not None:
+            return enumerate(paginas)
+    workers = workers or os.cpu_count() or 1
+    total = backend.contar_paginas(caminho)
+    if workers > 1 and total >= min_paginas_paralelo:
+        paginas = _iterar_em_paralelo(backend, caminho, total, executor, workers, paginas_por_lote)
+    else:
+        paginas = _iterar_com_prefetch(backend, caminho, total, prefetch)
+    falhas_ocr = []
+    if ocr is not None:
+        paginas = completar_com_ocr(paginas, caminho, ocr, falhas=falhas_ocr)
+    if cache is not None:
+        return _gravar_ao_final(paginas, cache, hash_pdf, versao, falhas_ocr)
+    return paginas
+
+
+def extrair_texto(caminho, backend=None, workers=None, executor=None, cache=None, ocr=None):
+    """
+    Extrai o texto completo do PDF, uma página por linha de bloco.
+
+    As páginas são concatenadas com um único join (tempo linear mesmo para milhares de páginas);
+    páginas sem texto são omitidas, como na leitura original com pypdf. Com OCR, as páginas são
+    reordenadas antes da junção.
+    """
+    paginas = iterar_paginas(caminho, backend, workers, executor, cache=cache, ocr=ocr)
+    if ocr is not None:
+        paginas = sorted(paginas, key=lambda pagina: pagina[0])
+    return "".join(f"{texto}\n" for _, texto in paginas if texto)
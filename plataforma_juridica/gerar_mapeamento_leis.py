@@ -1,59 +1,118 @@
+import os
 import re
 import json
+from indice_leis import construir_indice
+
+_LEI = re.compile(r'Lei: (Lei nº [\d\.]+\/\d{4})')
+_ORIGEM = re.compile(r'Origem: .* \((.+)\) nº ([\d\.]+)\/(\d{4})')
+# Com o repositório completo (~200 mil leis) um print por registro domina o tempo de execução
+INTERVALO_PROGRESSO = 10000
+
+
+def iterar_registros(arquivo_entrada):
+    """
+    Lê o repositório de leis linha a linha e gera um registro por bloco separado por '---'.
+
+    O arquivo nunca é carregado inteiro em memória.
+
+    :param arquivo_entrada: Caminho para o repositorio_leis.txt.
+    :return: Gerador de dicionários {"lei": ..., "projeto_origem": {"sigla", "numero", "ano"}}.
+    """
+    with open(arquivo_entrada, 'r', encoding='utf-8') as f:
+        yield from _registros_do_arquivo(f)
+
+
+def _registros_do_arquivo(f):
+    bloco = []
+    for linha in f:
+        if linha.strip() == '---':
+            registro = _processar_registro(''.join(bloco))
+            if registro:
+                yield registro
+            bloco = []
+        else:
+            bloco.append(linha)
+    registro = _processar_registro(''.join(bloco))
+    if registro:
+        yield registro
+
+
+def _processar_registro(registro):
+    if not registro.strip():
+        return None
+
+    lei_match = _LEI.search(registro)
+    origem_match = _ORIGEM.search(registro)
+    if not (lei_match and origem_match):
+        print(f"  [Aviso] Registro não pôde ser processado:\n{registro.strip()}\n")
+        return None
+
+    return {
+        "lei": lei_match.group(1),
+        "projeto_origem": {
+            "sigla": origem_match.group(1),
+            "numero": origem_match.group(2).replace('.', ''),
+            "ano": origem_match.group(3)
+        }
+    }
+
 
 def gerar_mapeamento(arquivo_entrada, arquivo_saida):
     """
     Lê um arquivo de texto com dados de leis, processa o conteúdo
     e gera um arquivo JSON estruturado com o mapeamento.
+
+    Os registros são gravados à medida que são lidos, sem montar a lista inteira em memória, em um
+    arquivo temporário que só substitui `arquivo_saida` quando a geração termina: uma entrada ausente
+    ou ilegível nunca apaga o mapeamento existente.
     """
     print(f"Lendo dados de '{arquivo_entrada}'...")
     try:
-        with open(arquivo_entrada, 'r', encoding='utf-8') as f:
-            conteudo = f.read()
-    except FileNotFoundError:
-        print(f"[ERRO] Arquivo de entrada '{arquivo_entrada}' não encontrado.")
+        entrada = open(arquivo_entrada, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"[ERRO] Não foi possível abrir o arquivo de entrada '{arquivo_entrada}': {e}")
         return
 
-    mapeamento = []
-    
-    # Divide o arquivo em blocos de registro usando '---' como separador
-    registros = conteudo.strip().split('---')
-    
-    print(f"Processando {len(registros)} registro(s)...")
-
-    for registro in registros:
-        if not registro.strip():
-            continue
-
-        # Expressões regulares para extrair os dados
-        lei_match = re.search(r'Lei: (Lei nº [\d\.]+\/\d{4})', registro)
-        origem_match = re.search(r'Origem: .* \((.+)\) nº ([\d\.]+)\/(\d{4})', registro)
-
-        if lei_match and origem_match:
-            lei_str = lei_match.group(1)
-            sigla = origem_match.group(1)
-            numero = origem_match.group(2).replace('.', '')
-            ano = origem_match.group(3)
-
-            mapeamento.append({
-                "lei": lei_str,
-                "projeto_origem": {
-                    "sigla": sigla,
-                    "numero": numero,
-                    "ano": ano
-                }
-            })
-            print(f"  - Mapeamento encontrado: {lei_str} -> {sigla} {numero}/{ano}")
-        else:
-            print(f"  [Aviso] Registro não pôde ser processado:\n{registro.strip()}\n")
+    temporario = f"{arquivo_saida}.tmp"
+    total = 0
+    try:
+        with entrada, open(temporario, 'w', encoding='utf-8') as saida:
+            saida.write('[')
+            for registro in _registros_do_arquivo(entrada):
+                saida.write(',\n' if total else '\n')
+                saida.write(json.dumps(registro, ensure_ascii=False))
+                total += 1
+                if total % INTERVALO_PROGRESSO == 0:
+                    print(f"  - {total} mapeamento(s) processado(s)...")
+            saida.write('\n]\n')
+        os.replace(temporario, arquivo_saida)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
 
-    print(f"Salvando mapeamento estruturado em '{arquivo_saida}'...")
-    with open(arquivo_saida, 'w', encoding='utf-8') as f:
-        json.dump(mapeamento, f, indent=4, ensure_ascii=False)
-        
+    print(f"{total} mapeamento(s) salvo(s) em '{arquivo_saida}'.")
     print("Mapeamento gerado com sucesso!")
 
+
+def gerar_indice(arquivo_entrada, arquivo_indice):
+    """
+    Gera o índice SQLite de leis consultado pelo pipeline (ver indice_leis.IndiceLeis).
+    """
+    print(f"Gerando índice de leis em '{arquivo_indice}' a partir de '{arquivo_entrada}'...")
+    try:
+        entrada = open(arquivo_entrada, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"[ERRO] Não foi possível abrir o arquivo de entrada '{arquivo_entrada}': {e}")
+        return
+    with entrada:
+        total = construir_indice(_registros_do_arquivo(entrada), arquivo_indice)
+    print(f"Índice gerado com {total} lei(s).")
+
+
 if __name__ == '__main__':
     input_file = 'plataforma_juridica/repositorio_leis.txt'
     output_file = 'plataforma_juridica/mapeamento_leis.json'
+    index_file = 'plataforma_juridica/indice_leis.sqlite'
     gerar_mapeamento(input_file, output_file)
+    gerar_indice(input_file, index_file)
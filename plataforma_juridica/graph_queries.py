@@ -0,0 +1,154 @@
+import logging # Import logging module
+import time
+import neo4j
+import logging_config # Import our logging configuration
+import estatisticas_citacoes
+import metrics
+from llm_analysis import AnalysisCache
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# Node labels that can be the target of a CITA edge. Labels cannot be Cypher parameters, so every
+# label interpolated into a query must come from this list.
+CITABLE_LABELS = ("Lei", "Constituicao", "Codigo", "Artigo", "Paragrafo", "Inciso", "Sumula")
+
+# A single node holds the graph version; ingestion bumps it and cached query results keyed on an
+# older version are never served again.
+GRAPH_VERSION_QUERY = "MATCH (m:GrafoMeta {id: 'grafo'}) RETURN m.versao AS versao"
+BUMP_GRAPH_VERSION_QUERY = (
+    "MERGE (m:GrafoMeta {id: 'grafo'}) SET m.versao = coalesce(m.versao, 0) + 1, m.atualizado_em = datetime()"
+)
+# Citation counts are materialized on the cited nodes by estatisticas_citacoes, so "most cited" is an
+# index-ordered read of total_citacoes (or citacoes_<year>) instead of an aggregation over every CITA edge.
+MOST_CITED_QUERY = """
+MATCH (n:{label}) WHERE n.{property} IS NOT NULL
+RETURN n.id AS id, n.{property} AS citacoes, n.total_citacoes AS total_citacoes,
+       n.documentos_citantes AS documentos_citantes
+ORDER BY n.{property} DESC, n.id
+SKIP $skip LIMIT $limit
+"""
+DOCUMENTS_CITING_QUERY = """
+MATCH (d:Documento)-[r:CITA]->(n:{label} {{id: $id}})
+RETURN d.nome AS documento, r.count AS count, r.paginas AS paginas
+ORDER BY r.count DESC, d.nome
+SKIP $skip LIMIT $limit
+"""
+# Only the top-k co-cited nodes kept by estatisticas_citacoes are available.
+CO_CITED_QUERY = """
+MATCH (n:{label} {{id: $id}})-[c:CO_CITADO_COM]->(m)
+RETURN labels(m)[0] AS label, m.id AS id, c.peso AS documentos
+ORDER BY documentos DESC, id
+SKIP $skip LIMIT $limit
+"""
+LAWYER_PROCESSES_QUERY = """
+MATCH (:Advogado {oab: $oab})-[:ATUA_EM]->(p:Processo)
+OPTIONAL MATCH (p)-[:JULGADO_POR]->(t:Tribunal)
+RETURN p.numeroProcesso AS numeroProcesso, p.dataAjuizamento AS dataAjuizamento, p.uf AS uf, t.nome AS tribunal
+ORDER BY p.dataAjuizamento DESC, p.numeroProcesso
+SKIP $skip LIMIT $limit
+"""
+
+
+def _citable_label(label: str) -> str:
+    if label not in CITABLE_LABELS:
+        raise ValueError(f"Unknown label '{label}'. Options: {', '.join(CITABLE_LABELS)}.")
+    return label
+
+
+def mark_graph_updated(run_query):
+    """
+    Refreshes the materialized citation statistics and bumps the graph version.
+
+    Ingestion scripts call this at the end of a run. Only the nodes cited by documents written since
+    the previous run are recomputed (see estatisticas_citacoes), and bumping the version invalidates
+    every GraphQueryService cache reading the same database.
+
+    Args:
+        run_query: Callable executing one Cypher statement with optional parameters, e.g.
+            Neo4jConnection.execute_query or Neo4jClient.run_query.
+    """
+    recomputed = estatisticas_citacoes.atualizar_estatisticas(run_query)
+    run_query(BUMP_GRAPH_VERSION_QUERY)
+    logger.info("Citation statistics refreshed for %d node(s) and graph version bumped.", recomputed)
+
+
+async def _fetch(tx, query, parameters):
+    result = await tx.run(query, parameters)
+    return await result.data()
+
+
+class GraphQueryService:
+    """
+    Read-only queries over the citation graph, with result caching.
+
+    Every query runs in a read transaction on a session opened with READ_ACCESS, so a cluster routes
+    it to a follower. Results are cached per graph version: the version node is re-read at most
+    every version_check_seconds, and invalidate() drops the cache immediately.
+
+    Args:
+        driver: A neo4j.AsyncDriver.
+        cache (AnalysisCache): Result cache; defaults to 1024 entries with a 5 minute TTL.
+        database (str): Database name, None for the server default.
+        version_check_seconds (float): How long a read graph version is trusted.
+    """
+
+    def __init__(self, driver, cache: AnalysisCache = None, database: str = None, version_check_seconds: float = 5.0):
+        self.driver = driver
+        self.cache = cache if cache is not None else AnalysisCache(max_entries=1024, ttl_seconds=300, name="graph")
+        self.database = database
+        self.version_check_seconds = version_check_seconds
+        self._version = None
+        self._version_checked_at = None
+
+    async def _read(self, query: str, parameters: dict) -> list:
+        with metrics.NEO4J_STATEMENT_SECONDS.time():
+            async with self.driver.session(database=self.database, default_access_mode=neo4j.READ_ACCESS) as session:
+                try:
+                    records = await session.execute_read(_fetch, query, parameters)
+                except Exception:
+                    metrics.NEO4J_STATEMENTS.inc(outcome="error")
+                    raise
+        metrics.NEO4J_STATEMENTS.inc(outcome="success")
+        return records
+
+    async def graph_version(self):
+        now = time.monotonic()
+        if self._version_checked_at is None or now - self._version_checked_at >= self.version_check_seconds:
+            records = await self._read(GRAPH_VERSION_QUERY, {})
+            self._version = records[0]["versao"] if records else 0
+            self._version_checked_at = now
+        return self._version
+
+    def invalidate(self):
+        """Drops every cached result and forces the graph version to be re-read."""
+        self.cache.clear()
+        self._version_checked_at = None
+        logger.info("Graph query cache invalidated.")
+
+    async def _cached(self, name: str, query: str, parameters: dict) -> dict:
+        version = await self.graph_version()
+        key = f"{version}:{name}:{sorted(parameters.items())}"
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = {"items": await self._read(query, parameters), "skip": parameters["skip"], "limit": parameters["limit"]}
+        self.cache.set(key, result)
+        return result
+
+    async def most_cited(self, label: str, limit: int = 20, skip: int = 0, year: int = None) -> dict:
+        """Nodes ordered by total citations, or by citations from documents of the given year."""
+        prop = "total_citacoes" if year is None else estatisticas_citacoes.propriedade_ano(year)
+        query = MOST_CITED_QUERY.format(label=_citable_label(label), property=prop)
+        return await self._cached(f"most_cited:{label}:{prop}", query, {"skip": skip, "limit": limit})
+
+    async def documents_citing(self, label: str, node_id: str, limit: int = 20, skip: int = 0) -> dict:
+        query = DOCUMENTS_CITING_QUERY.format(label=_citable_label(label))
+        return await self._cached(f"citing:{label}", query, {"id": node_id, "skip": skip, "limit": limit})
+
+    async def co_cited(self, label: str, node_id: str, limit: int = 20, skip: int = 0) -> dict:
+        query = CO_CITED_QUERY.format(label=_citable_label(label))
+        return await self._cached(f"co_cited:{label}", query, {"id": node_id, "skip": skip, "limit": limit})
+
+    async def lawyer_processes(self, oab: str, limit: int = 20, skip: int = 0) -> dict:
+        return await self._cached("lawyer_processes", LAWYER_PROCESSES_QUERY, {"oab": oab, "skip": skip, "limit": limit})
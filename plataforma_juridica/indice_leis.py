@@ -0,0 +1,140 @@
+import json
+import os
+import re
+import sqlite3
+from normalizacao import ano_com_quatro_digitos
+
+# "Lei nº 13.105/2015", "lei n. 13105/15", "Lei 13.105 / 2015" e "LEI Nº 13.105/2015" têm a mesma chave
+_LEI = re.compile(
+    r"(?P<tipo>decreto-lei|lei complementar|lei)\s*(?:n[º°o.]*\s*)?(?P<numero>\d[\d.]*)\s*/\s*(?P<ano>\d{4}|\d{2})(?!\d)",
+    re.IGNORECASE,
+)
+TAMANHO_LOTE = 5000
+
+
+def chave_lei(texto):
+    """
+    Converte a citação de uma lei na chave (tipo, número, ano) usada pelo índice.
+
+    :param texto: Ex.: "Lei nº 13.105/2015", "Decreto-Lei 4.657/42".
+    :return: Tupla ("LEI", "13105", 2015), ou None se o texto não for uma lei numerada.
+    """
+    m = _LEI.search(texto)
+    if not m:
+        return None
+    ano = ano_com_quatro_digitos(m.group("ano"))
+    return m.group("tipo").upper(), m.group("numero").replace(".", "").lstrip("0") or "0", ano
+
+
+def construir_indice(registros, caminho_indice):
+    """
+    Grava um índice SQLite a partir de um iterável de registros {"lei": ..., "projeto_origem": {...}}.
+
+    Os registros são inseridos em lotes dentro de uma única transação, então o iterável pode ser um
+    gerador sobre um arquivo grande sem que ele seja carregado inteiro em memória. O índice é
+    montado em um arquivo temporário e renomeado ao final; se a leitura falhar, o temporário é
+    apagado e o índice existente fica intacto.
+
+    :return: Número de leis no índice (registros repetidos da mesma lei contam uma vez).
+    """
+    temporario = f"{caminho_indice}.tmp"
+    if os.path.exists(temporario):
+        os.remove(temporario)
+    conn = sqlite3.connect(temporario)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("""
+            CREATE TABLE leis (
+                tipo TEXT NOT NULL, numero TEXT NOT NULL, ano INTEGER NOT NULL,
+                lei TEXT NOT NULL, sigla TEXT, numero_projeto TEXT, ano_projeto TEXT,
+                PRIMARY KEY (tipo, numero, ano)
+            ) WITHOUT ROWID
+        """)
+        lote = []
+        with conn:
+            for registro in registros:
+                chave = chave_lei(registro["lei"])
+                if chave is None:
+                    continue
+                origem = registro["projeto_origem"]
+                lote.append((*chave, registro["lei"], origem["sigla"], origem["numero"], origem["ano"]))
+                if len(lote) >= TAMANHO_LOTE:
+                    conn.executemany("INSERT OR REPLACE INTO leis VALUES (?, ?, ?, ?, ?, ?, ?)", lote)
+                    lote = []
+            conn.executemany("INSERT OR REPLACE INTO leis VALUES (?, ?, ?, ?, ?, ?, ?)", lote)
+        total = conn.execute("SELECT count(*) FROM leis").fetchone()[0]
+    except BaseException:
+        conn.close()
+        os.remove(temporario)
+        raise
+    conn.close()
+    os.replace(temporario, caminho_indice)
+    return total
+
+
+class IndiceLeis:
+    """
+    Consulta ao índice SQLite de leis -> projeto de origem.
+
+    Abrir o índice não lê as leis para a memória; cada consulta é uma busca pela chave primária
+    (tipo, número, ano). get() devolve o mesmo formato do antigo dicionário de mapeamento_leis.json.
+    """
+
+    def __init__(self, caminho_indice):
+        if not os.path.exists(caminho_indice):
+            raise FileNotFoundError(f"Índice de leis '{caminho_indice}' não encontrado.")
+        # check_same_thread=False: o índice é somente leitura e pode ser consultado por várias threads
+        self._conn = sqlite3.connect(f"file:{caminho_indice}?mode=ro", uri=True, check_same_thread=False)
+
+    def get(self, texto, default=None):
+        chave = chave_lei(texto)
+        if chave is None:
+            return default
+        linha = self._conn.execute(
+            "SELECT sigla, numero_projeto, ano_projeto FROM leis WHERE tipo = ? AND numero = ? AND ano = ?", chave
+        ).fetchone()
+        if linha is None:
+            return default
+        return {"sigla": linha[0], "numero": linha[1], "ano": linha[2]}
+
+    def __contains__(self, texto):
+        return self.get(texto) is not None
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM leis").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class MapaLeis(dict):
+    """Mapeamento em memória com as mesmas chaves normalizadas do índice, para o formato JSON antigo."""
+
+    def __init__(self, mapeamento):
+        super().__init__()
+        for item in mapeamento:
+            chave = chave_lei(item["lei"])
+            if chave is not None:
+                self[chave] = item["projeto_origem"]
+
+    def get(self, texto, default=None):
+        chave = chave_lei(texto) if isinstance(texto, str) else texto
+        return super().get(chave, default)
+
+    def __contains__(self, texto):
+        return self.get(texto) is not None
+
+
+def abrir_mapa_leis(caminho_indice, caminho_json=None):
+    """
+    Abre o índice SQLite se ele existir; caso contrário, carrega o mapeamento JSON antigo.
+
+    :return: Um objeto com get(texto_da_lei) -> {"sigla", "numero", "ano"} ou None.
+    """
+    if caminho_indice and os.path.exists(caminho_indice):
+        return IndiceLeis(caminho_indice)
+    if caminho_json is None:
+        raise FileNotFoundError(f"Índice de leis '{caminho_indice}' não encontrado.")
+    with open(caminho_json, "r", encoding="utf-8") as f:
+        return MapaLeis(json.load(f))
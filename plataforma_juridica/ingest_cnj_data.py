@@ -3,6 +3,7 @@ from elasticsearch import Elasticsearch
 import time
 import logging # Import logging module
 import logging_config # Import our logging configuration
+import metrics
 
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
@@ -62,6 +63,7 @@ def ingest_data_for_tribunal(tribunal_endpoint: str, max_records: int = 10000):
 
         hits = response_data["hits"]["hits"]
         total_fetched += len(hits)
+        metrics.DOCUMENTS_FETCHED.inc(len(hits), source="cnj")
         logger.info(f"Fetched {len(hits)} records from CNJ API for page {page_num}.")
 
         for hit in hits:
@@ -69,26 +71,27 @@ def ingest_data_for_tribunal(tribunal_endpoint: str, max_records: int = 10000):
             process_id = process_data.get("numeroProcesso") # Assuming this is unique
 
             if not process_id:
-                logger.warning(f"Skipping record due to missing 'numeroProcesso': {process_data}")
+                logger.warning("Skipping record due to missing 'numeroProcesso': %s", process_data)
                 continue
 
             try:
                 # Check if document already exists
                 if es_client.exists(index=ES_INDEX, id=process_id):
-                    logger.debug(f"Process {process_id} already exists. Skipping.")
+                    logger.debug("Process %s already exists. Skipping.", process_id)
                     continue # Skip if already exists
                 
                 es_client.index(index=ES_INDEX, id=process_id, document=process_data)
                 indexed_count += 1
-                logger.debug(f"Indexed new process: {process_id}")
+                metrics.DOCUMENTS_INDEXED.inc(index=ES_INDEX)
+                logger.debug("Indexed new process: %s", process_id)
             except Exception as e:
-                logger.error(f"Error indexing process {process_id}: {e}", exc_info=True)
+                logger.error("Error indexing process %s: %s", process_id, e, exc_info=True)
         
         logger.info(f"Processed page {page_num}. Indexed {indexed_count} new records so far. Total fetched: {total_fetched}")
 
         # Prepare for next page
         if len(hits) < query["size"]:
-            logger.info(f"Less than {query["size"]} hits on page {page_num}, assuming last page.")
+            logger.info("Less than %d hits on page %d, assuming last page.", query["size"], page_num)
             break
         
         last_hit = hits[-1]
@@ -106,4 +109,5 @@ if __name__ == "__main__":
         ingest_data_for_tribunal("api_publica_tjsp/_search")
     except Exception as e:
         logger.critical(f"Script terminated due to unhandled error: {e}", exc_info=True)
+    metrics.dump_batch_metrics("ingest_cnj_data")
     logger.info("Finished ingest_cnj_data.py script.")
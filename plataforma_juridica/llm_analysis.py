@@ -0,0 +1,337 @@
+import asyncio
+import hashlib
+import json
+import logging # Import logging module
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+import logging_config # Import our logging configuration
+import metrics
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used to size chunks without a tokenizer
+CHARS_PER_TOKEN = 4
+
+DEFAULT_REDUCE_PROMPT = (
+    "The following texts are partial analyses of consecutive sections of the same legal document. "
+    "Combine them into a single analysis that follows these instructions: {prompt}"
+)
+
+
+class GroqBackend:
+    """LLM backend that sends chat completions to the Groq API."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def complete(self, system_prompt: str, text: str, model: str, temperature: float, max_tokens: int) -> str:
+        with metrics.time_http_request("groq"):
+            chat_completion = self.client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt,
+                    },
+                    {
+                        "role": "user",
+                        "content": text,
+                    },
+                ],
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        return chat_completion.choices[0].message.content
+
+
+class StubBackend:
+    """
+    Deterministic offline backend, selected with LLM_BACKEND=stub.
+
+    It echoes the start of the text, which is enough to exercise caching, chunking and
+    batch jobs locally without spending tokens.
+    """
+
+    def __init__(self, preview_chars: int = 200):
+        self.preview_chars = preview_chars
+
+    def complete(self, system_prompt: str, text: str, model: str, temperature: float, max_tokens: int) -> str:
+        return f"[stub:{model}] {text[:self.preview_chars]}"
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket enforcing requests-per-minute and tokens-per-minute budgets.
+
+    Args:
+        requests_per_minute (float): Request budget; None disables the request limit.
+        tokens_per_minute (float): Token budget; None disables the token limit.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._requests = requests_per_minute or 0
+        self._tokens = tokens_per_minute or 0
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens: int = 0):
+        """Blocks until one request and the given number of tokens fit in the budget."""
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute) # A single oversized call must still be able to run
+        while True:
+            with self._lock:
+                self._refill()
+                wait = 0.0
+                if self.requests_per_minute and self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+                if self.tokens_per_minute and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+                if wait == 0.0:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= tokens
+                    return
+            self._sleep(wait)
+
+
+class RateLimitedBackend:
+    """Wraps a backend so every call first acquires its estimated cost from a RateLimiter."""
+
+    def __init__(self, backend, limiter: RateLimiter):
+        self.backend = backend
+        self.limiter = limiter
+
+    def complete(self, system_prompt: str, text: str, model: str, temperature: float, max_tokens: int) -> str:
+        estimated_tokens = (len(system_prompt) + len(text)) // CHARS_PER_TOKEN + max_tokens
+        self.limiter.acquire(estimated_tokens)
+        return self.backend.complete(system_prompt, text, model, temperature, max_tokens)
+
+
+def make_cache_key(text: str, prompt: str, model: str, temperature: Optional[float]) -> str:
+    """
+    Returns the content address (SHA-256) of an analysis request.
+
+    A None temperature (the API accepts "temperature": null, leaving it to the provider's default)
+    is a key of its own, distinct from any explicit value.
+    """
+    temperature = None if temperature is None else float(temperature)
+    payload = json.dumps([text, prompt, model, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    In-memory LRU cache with per-entry TTL for LLM results.
+
+    Args:
+        max_entries (int): Maximum number of results kept; least recently used entries are evicted first.
+        ttl_seconds (float): Lifetime of an entry. None keeps entries until evicted.
+        name (str): Value of the cache label in the cache_requests_total metric.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 24 * 3600, name: str = "llm"):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.record_cache_lookup(self.name, hit=True)
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            metrics.record_cache_lookup(self.name, hit=False)
+            return None
+
+    def set(self, key: str, value: str):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def split_text(text: str, max_chars: int) -> list:
+    """
+    Splits text into chunks of at most max_chars characters.
+
+    Chunks end at the last paragraph, line or sentence break inside the window when there is one,
+    so sections of a decision are not cut mid-sentence.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            window = text[start:end]
+            for separator in ("\n\n", "\n", ". "):
+                cut = window.rfind(separator)
+                if cut > max_chars // 2:
+                    end = start + cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    return chunks
+
+
+class AnalysisResult:
+    def __init__(self, analysis: str, cached: bool, chunks: int):
+        self.analysis = analysis
+        self.cached = cached
+        self.chunks = chunks
+
+
+class LLMAnalyzer:
+    """
+    Runs LLM analyses through a content-addressed cache.
+
+    Identical requests that arrive while a call is in flight share that call instead of
+    reaching the backend again. Texts longer than chunk_chars are summarized map-reduce style:
+    every chunk is analyzed (at most max_concurrency backend calls at a time) and the partial
+    analyses are combined by further calls until a single result remains. Chunk results are
+    cached as well, so documents that share sections reuse each other's work.
+
+    Args:
+        backend: Object exposing complete(system_prompt, text, model, temperature, max_tokens) -> str.
+        cache (AnalysisCache): Result cache. A private cache is created when omitted.
+        chunk_chars (int): Maximum characters sent to the backend in a single call.
+        max_concurrency (int): Maximum number of concurrent backend calls.
+        max_tokens (int): Completion token limit for each backend call.
+    """
+
+    def __init__(self, backend, cache: AnalysisCache = None, chunk_chars: int = 12000,
+                 max_concurrency: int = 4, max_tokens: int = 1024, reduce_prompt: str = DEFAULT_REDUCE_PROMPT):
+        self.backend = backend
+        self.cache = cache if cache is not None else AnalysisCache()
+        self.chunk_chars = chunk_chars
+        self.max_concurrency = max_concurrency
+        self.max_tokens = max_tokens
+        self.reduce_prompt = reduce_prompt
+        self._inflight = {}
+        self._semaphores = {}
+
+    def _semaphore(self):
+        # Semaphores are bound to the event loop they are first used in
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def analyze(self, text: str, prompt: str, model: str, temperature: float = 0.7) -> AnalysisResult:
+        """Returns the analysis of text, served from cache or computed once per distinct request."""
+        key = make_cache_key(text, prompt, model, temperature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug("LLM cache hit for key %s", key)
+            return AnalysisResult(cached, cached=True, chunks=0)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            logger.debug("Joining in-flight LLM request for key %s", key)
+            analysis, chunks = await asyncio.shield(task)
+            return AnalysisResult(analysis, cached=True, chunks=chunks)
+
+        task = asyncio.ensure_future(self._analyze_uncached(text, prompt, model, temperature))
+        self._inflight[key] = task
+        try:
+            analysis, chunks = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(key, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        self.cache.set(key, analysis)
+        return AnalysisResult(analysis, cached=False, chunks=chunks)
+
+    async def _analyze_uncached(self, text, prompt, model, temperature):
+        chunks = split_text(text, self.chunk_chars)
+        if len(chunks) == 1:
+            return await self._complete(prompt, text, model, temperature), 1
+
+        logger.info("Text of %d characters split into %d chunks for map-reduce analysis.", len(text), len(chunks))
+        partials = await asyncio.gather(*(self._complete_cached(prompt, chunk, model, temperature) for chunk in chunks))
+
+        reduce_prompt = self.reduce_prompt.format(prompt=prompt)
+        while len(partials) > 1:
+            groups = _group_by_size(partials, self.chunk_chars)
+            if len(groups) == len(partials):
+                # Partial analyses are too long to pair up; combine them two at a time
+                groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+            partials = await asyncio.gather(*(
+                self._complete_cached(reduce_prompt, "\n\n---\n\n".join(group), model, temperature)
+                for group in groups
+            ))
+        return partials[0], len(chunks)
+
+    async def _complete_cached(self, prompt, text, model, temperature):
+        key = make_cache_key(text, prompt, model, temperature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = await self._complete(prompt, text, model, temperature)
+        self.cache.set(key, result)
+        return result
+
+    async def _complete(self, prompt, text, model, temperature):
+        async with self._semaphore():
+            logger.debug("Sending %d characters (~%d tokens) to LLM model %s", len(text), len(text) // CHARS_PER_TOKEN, model)
+            return await asyncio.to_thread(self.backend.complete, prompt, text, model, temperature, self.max_tokens)
+
+
+def _group_by_size(texts, max_chars):
+    """Groups consecutive texts so that each group's combined length stays within max_chars."""
+    groups = []
+    current = []
+    current_size = 0
+    for text in texts:
+        if current and current_size + len(text) > max_chars:
+            groups.append(current)
+            current = []
+            current_size = 0
+        current.append(text)
+        current_size += len(text)
+    if current:
+        groups.append(current)
+    return groups
@@ -1,31 +1,173 @@
+import atexit
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Handlers installed by the last setup_logging() call and the listener draining the queue
+_installed_handlers = []
+queue_listener = None
+
+# Attributes present on every LogRecord; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including fields passed through `extra`."""
+
+    def format(self, record):
+        payload = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class ListenerFormattingQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the handlers on the listener thread.
+
+    The stdlib prepare() formats the record on the caller thread, merges the traceback into the
+    message and clears exc_info, so JsonFormatter would never see it. Here only the message
+    arguments are rendered (they may be mutated after the call returns); exc_info and stack_info
+    are kept for the listener's formatters.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `per_second` records through per second (with bursts up to `burst`).
+
+    The number of suppressed records is appended to the next record that gets through, so the
+    volume of a hot loop stays visible without paying for every line.
+    """
+
+    def __init__(self, per_second: float, burst: int = None):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst or max(1, int(per_second))
+        self._allowance = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.burst, self._allowance + (now - self._updated_at) * self.per_second)
+            self._updated_at = now
+            if self._allowance < 1:
+                self._suppressed += 1
+                return False
+            self._allowance -= 1
+            suppressed, self._suppressed = self._suppressed, 0
+        if suppressed:
+            _annotate_suppressed(record, suppressed)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Lets one record out of every `every_n` through."""
+
+    def __init__(self, every_n: int):
+        super().__init__()
+        self.every_n = max(1, every_n)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        with self._lock:
+            self._count += 1
+            keep = (self._count - 1) % self.every_n == 0
+        if keep and self.every_n > 1 and self._count > 1:
+            _annotate_suppressed(record, self.every_n - 1)
+        return keep
+
+
+def _annotate_suppressed(record, suppressed):
+    record.suppressed = suppressed
+    if isinstance(record.args, tuple):
+        record.msg = f"{record.msg} [%d similar messages suppressed]"
+        record.args = record.args + (suppressed,)
+
+
+def get_record_logger(name):
+    """
+    Returns the logger for per-record messages of a hot loop (e.g. one line per process).
+
+    It is the child logger `<name>.records`, rate limited to LOG_RECORDS_PER_SECOND records per
+    second (default 10; 0 disables the limit) or sampled to one in LOG_RECORDS_SAMPLE_EVERY records
+    when that variable is set.
+    """
+    record_logger = logging.getLogger(f"{name}.records")
+    if not any(isinstance(f, (RateLimitFilter, SamplingFilter)) for f in record_logger.filters):
+        sample_every = int(os.getenv("LOG_RECORDS_SAMPLE_EVERY", "0"))
+        per_second = float(os.getenv("LOG_RECORDS_PER_SECOND", "10"))
+        if sample_every > 1:
+            record_logger.addFilter(SamplingFilter(sample_every))
+        elif per_second > 0:
+            record_logger.addFilter(RateLimitFilter(per_second))
+    return record_logger
+
+
+def _stop_queue_listener():
+    global queue_listener
+    if queue_listener is not None:
+        queue_listener.stop()
+        queue_listener = None
+
 
 def setup_logging():
+    global queue_listener
+
     # Determine log level based on DEBUG_MODE environment variable
     debug_mode = os.getenv("DEBUG_MODE", "False").lower() == "true"
     log_level = logging.DEBUG if debug_mode else logging.INFO
+    # LOG_FORMAT=json switches console and file output to JSON lines
+    json_output = os.getenv("LOG_FORMAT", "text").lower() == "json"
+    # LOG_QUEUE=false writes synchronously from the logging thread (useful when debugging the logging itself)
+    use_queue = os.getenv("LOG_QUEUE", "True").lower() == "true"
 
     # Create a logger
     logger = logging.getLogger()
     logger.setLevel(log_level)
 
-    # Clear existing handlers to prevent duplicate logs in reloads (e.g., uvicorn --reload)
-    if logger.handlers:
-        for handler in logger.handlers:
-            logger.removeHandler(handler)
+    # Remove the handlers installed by a previous call to prevent duplicate logs in reloads (e.g., uvicorn --reload)
+    _stop_queue_listener()
+    for handler in _installed_handlers:
+        logger.removeHandler(handler)
+        handler.close()
+    _installed_handlers.clear()
 
     # Create a formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
+    if json_output:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+
     # Add a console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
     # Add a file handler (rotating file handler for production readiness)
     log_file = os.path.join(os.path.dirname(__file__), 'app.log')
@@ -36,7 +178,20 @@ def setup_logging():
     )
     file_handler.setLevel(log_level)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+
+    if use_queue:
+        # Callers only render the message and enqueue the record; formatting (tracebacks included) and
+        # console/disk I/O happen on the listener thread
+        queue_handler = ListenerFormattingQueueHandler(queue.SimpleQueue())
+        queue_handler.setLevel(log_level)
+        queue_listener = QueueListener(queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+        queue_listener.start()
+        logger.addHandler(queue_handler)
+        _installed_handlers.append(queue_handler)
+    else:
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+        _installed_handlers.extend([console_handler, file_handler])
 
     # Special handling for debug mode: more verbose logging for specific modules
     if debug_mode:
@@ -50,5 +205,16 @@ def setup_logging():
     else:
         logger.info("DEBUG_MODE is DISABLED. Logging level set to INFO.")
 
+
+def get_handlers():
+    """Returns the console and file handlers, whether they are attached directly or behind the queue."""
+    if queue_listener is not None:
+        return list(queue_listener.handlers)
+    return list(_installed_handlers)
+
+
+# Flush pending records on interpreter exit
+atexit.register(_stop_queue_listener)
+
 # Call setup_logging when this module is imported
-setup_logging()
\ No newline at end of file
+setup_logging()
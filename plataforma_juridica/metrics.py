@@ -0,0 +1,262 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+import requests
+import logging # Import logging module
+import logging_config # Import our logging configuration
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) shared by the HTTP, Neo4j and PDF histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.extend(self._render_sample(labelvalues, value))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels."""
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _render_sample(self, labelvalues, value):
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (queue sizes, last run timestamps)."""
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _render_sample(self, labelvalues, value):
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies) in cumulative buckets."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall-clock duration of the with-block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _render_sample(self, labelvalues, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, labelvalues, ("le", _format_value(float(bound))))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str):
+        """Returns the registered metric called `name`, or None."""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Writes the metrics atomically to path (node_exporter textfile collector format)."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def push_to_gateway(self, gateway_url: str, job: str, timeout: float = 10):
+        """Replaces the metrics of `job` on a Prometheus Pushgateway."""
+        response = requests.put(
+            f"{gateway_url.rstrip('/')}/metrics/job/{job}",
+            data=self.render().encode("utf-8"),
+            headers={"Content-Type": CONTENT_TYPE},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+
+
+REGISTRY = Registry()
+
+# --- Shared pipeline metrics ---
+DOCUMENTS_FETCHED = Counter(
+    "pipeline_documents_fetched_total", "Documents fetched from an upstream source.", ["source"])
+DOCUMENTS_INDEXED = Counter(
+    "pipeline_documents_indexed_total", "Documents written to an Elasticsearch index.", ["index"])
+DOCUMENTS_PROCESSED = Counter(
+    "pipeline_documents_processed_total", "Documents processed by a pipeline stage.", ["stage", "outcome"])
+NEO4J_STATEMENTS = Counter(
+    "neo4j_statements_total", "Cypher statements executed.", ["outcome"])
+NEO4J_STATEMENT_SECONDS = Histogram(
+    "neo4j_statement_duration_seconds", "Latency of single Cypher statements.")
+NEO4J_BATCH_SECONDS = Histogram(
+    "neo4j_batch_duration_seconds", "Latency of loading one batch of records into Neo4j.", ["stage"])
+HTTP_CLIENT_SECONDS = Histogram(
+    "http_client_request_duration_seconds", "Latency of outgoing HTTP requests per upstream.", ["upstream", "outcome"])
+HTTP_SERVER_SECONDS = Histogram(
+    "http_server_request_duration_seconds", "Latency of requests served by the API.", ["method", "route", "status"])
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by result (hit/miss); the hit ratio is hit / (hit + miss).", ["cache", "result"])
+PDF_PARSE_SECONDS = Histogram(
+    "pdf_parse_duration_seconds", "Time spent extracting the text of one PDF.")
+OCR_PAGE_SECONDS = Histogram(
+    "pdf_ocr_page_duration_seconds", "Time spent recognizing one scanned PDF page.", ["outcome"])
+LAST_RUN_TIMESTAMP = Gauge(
+    "pipeline_last_run_timestamp_seconds", "Unix time at which a batch script finished.", ["job"])
+
+
+@contextmanager
+def time_http_request(upstream: str):
+    """Times an outgoing HTTP request; the outcome label is 'error' when the block raises."""
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        HTTP_CLIENT_SECONDS.observe(time.perf_counter() - start, upstream=upstream, outcome=outcome)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def dump_batch_metrics(job: str, registry: Registry = None):
+    """
+    Exports the metrics of a batch script at the end of its run.
+
+    METRICS_TEXTFILE_DIR writes <dir>/<job>.prom for the node_exporter textfile collector and
+    PUSHGATEWAY_URL pushes to a Prometheus Pushgateway. Failures are logged, never raised, so
+    metrics export cannot fail a pipeline run.
+    """
+    registry = registry if registry is not None else REGISTRY
+    # The timestamp goes into the registry being exported, which may not be the global one
+    last_run = registry.get(LAST_RUN_TIMESTAMP.name) or Gauge(
+        LAST_RUN_TIMESTAMP.name, LAST_RUN_TIMESTAMP.documentation, LAST_RUN_TIMESTAMP.labelnames, registry=registry)
+    last_run.set(time.time(), job=job)
+    textfile_dir = os.getenv("METRICS_TEXTFILE_DIR")
+    if textfile_dir:
+        try:
+            os.makedirs(textfile_dir, exist_ok=True)
+            path = os.path.join(textfile_dir, f"{job}.prom")
+            registry.write_textfile(path)
+            logger.info("Metrics written to %s", path)
+        except OSError as e:
+            logger.error(f"Could not write metrics textfile: {e}")
+    gateway_url = os.getenv("PUSHGATEWAY_URL")
+    if gateway_url:
+        try:
+            registry.push_to_gateway(gateway_url, job)
+            logger.info("Metrics pushed to %s for job %s", gateway_url, job)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Could not push metrics to {gateway_url}: {e}")
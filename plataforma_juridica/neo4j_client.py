@@ -1,6 +1,7 @@
 from neo4j import GraphDatabase
 import logging # Import logging module
 import logging_config # Import our logging configuration
+import metrics
 
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
@@ -29,14 +30,16 @@ class Neo4jClient:
             logger.error("Neo4j driver is not initialized. Cannot run query.")
             return []
         
-        logger.debug(f"Running Cypher query: {query} with parameters: {parameters}")
+        logger.debug("Running Cypher query: %s with parameters: %s", query, parameters)
         try:
-            with self.driver.session() as session:
+            with metrics.NEO4J_STATEMENT_SECONDS.time(), self.driver.session() as session:
                 result = session.run(query, parameters)
                 records = [record for record in result]
-                logger.debug(f"Query executed successfully. Records returned: {len(records)}")
-                return records
+            metrics.NEO4J_STATEMENTS.inc(outcome="success")
+            logger.debug("Query executed successfully. Records returned: %d", len(records))
+            return records
         except Exception as e:
+            metrics.NEO4J_STATEMENTS.inc(outcome="error")
             logger.error(f"Error running Cypher query: {query} - {e}", exc_info=True)
             return []
 
@@ -46,10 +49,10 @@ class Neo4jClient:
         Returns the created node's properties.
         """
         query = f"CREATE (n:{label} $properties) RETURN n"
-        logger.debug(f"Attempting to create node: {label} with properties: {properties}")
+        logger.debug("Attempting to create node: %s with properties: %s", label, properties)
         result = self.run_query(query, {"properties": properties})
         if result:
-            logger.info(f"Node '{label}' created with properties: {properties}")
+            logger.info("Node '%s' created with properties: %s", label, properties)
             return result[0]["n"]
         logger.error(f"Failed to create node: {label} with properties: {properties}")
         return None
@@ -66,10 +69,10 @@ class Neo4jClient:
             f"RETURN n"
         )
         properties_with_id = {**properties, identifier_property: properties[identifier_property]}
-        logger.debug(f"Attempting to merge node: {label} with identifier {identifier_property}={properties[identifier_property]} and properties: {properties_with_id}")
+        logger.debug("Attempting to merge node: %s with identifier %s=%s and properties: %s", label, identifier_property, properties[identifier_property], properties_with_id)
         result = self.run_query(query, {"id_value": properties[identifier_property], "properties": properties_with_id})
         if result:
-            logger.info(f"Node '{label}' merged with identifier {identifier_property}={properties[identifier_property]}")
+            logger.info("Node '%s' merged with identifier %s=%s", label, identifier_property, properties[identifier_property])
             return result[0]["n"]
         logger.error(f"Failed to merge node: {label} with identifier {identifier_property}={properties[identifier_property]}")
         return None
@@ -91,10 +94,10 @@ class Neo4jClient:
             "to_id_val": to_id_val,
             "rel_properties": rel_properties if rel_properties else {}
         }
-        logger.debug(f"Attempting to create relationship: ({from_label})-[:{rel_type}]->({to_label}) between {from_id_prop}={from_id_val} and {to_id_prop}={to_id_val}")
+        logger.debug("Attempting to create relationship: (%s)-[:%s]->(%s) between %s=%s and %s=%s", from_label, rel_type, to_label, from_id_prop, from_id_val, to_id_prop, to_id_val)
         result = self.run_query(query, parameters)
         if result:
-            logger.info(f"Relationship '{rel_type}' created between {from_label} ({from_id_val}) and {to_label} ({to_id_val})")
+            logger.info("Relationship '%s' created between %s (%s) and %s (%s)", rel_type, from_label, from_id_val, to_label, to_id_val)
             return result
         logger.error(f"Failed to create relationship: ({from_label})-[:{rel_type}]->({to_label}) between {from_id_prop}={from_id_val} and {to_id_prop}={to_id_val}")
         return None
\ No newline at end of file
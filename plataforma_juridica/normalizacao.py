@@ -0,0 +1,127 @@
+import datetime
+import re
+from functools import lru_cache
+
+# Formas de superfície distintas em um corpus são poucas ("art. 5" se repete milhões de vezes),
+# então um memo limitado elimina quase todo o trabalho sem crescer sem controle.
+TAMANHO_MEMO = 65536
+
+_NUMERO = re.compile(r"\d+")
+# Artigos acima de 999 são escritos com separador de milhar ("art. 1.228")
+_NUMERO_ARTIGO = re.compile(r"\d{1,3}(?:\.\d{3})+|\d+")
+_PONTUACAO_FINAL = re.compile(r"[.,\s]*$")
+# "Lei nº 13.105/2015", "lei n. 13105/15" e "Lei 13.105 / 2015" designam o mesmo nó "Lei nº 13.105/2015"
+_LEI = re.compile(
+    r"(?P<tipo>decreto-lei|lei complementar|lei)\s*(?:n[º°o.]*\s*)?(?P<numero>\d[\d.]*)\s*/\s*(?P<ano>\d{4}|\d{2})",
+    re.IGNORECASE,
+)
+TIPOS_LEI = {"decreto-lei": "Decreto-Lei", "lei complementar": "Lei Complementar", "lei": "Lei"}
+
+# Trecho (em minúsculas) -> nome canônico. A ordem importa: "processo civil" antes de "civil".
+CODIGOS = (
+    ("processo civil", "Código de Processo Civil"),
+    ("processo penal", "Código de Processo Penal"),
+    ("civil", "Código Civil"),
+    ("penal", "Código Penal"),
+    ("tributário", "Código Tributário Nacional"),
+    ("defesa do consumidor", "Código de Defesa do Consumidor"),
+)
+# Todas as formas reconhecidas pela regra CONSTITUICAO (CF, CRFB, CF/88, Constituição Federal,
+# Constituição de 1988, ...) designam o mesmo nó.
+CONSTITUICAO = "Constituição Federal de 1988"
+
+
+def limpar_texto(texto):
+    """Remove espaços e a pontuação final (".", ",") deixada pelo casamento de padrões."""
+    return _PONTUACAO_FINAL.sub("", texto.strip())
+
+
+def _normalizar_artigo(texto, minusculo):
+    m = _NUMERO_ARTIGO.search(minusculo)
+    if not m:
+        print(f"  [Aviso] Não foi possível normalizar '{texto}' para a regra ARTIGO. Usando texto original.")
+        return None
+    return f"Art. {m.group().replace('.', '')}"
+
+
+def ano_com_quatro_digitos(ano):
+    """Anos com dois dígitos: até o ano corrente são deste século, os demais do século passado."""
+    ano = int(ano)
+    if ano < 100:
+        ano += 2000 if ano <= datetime.date.today().year % 100 else 1900
+    return ano
+
+
+def _normalizar_lei(texto, minusculo):
+    m = _LEI.fullmatch(minusculo)
+    if not m:
+        return None
+    numero = int(m.group("numero").replace(".", ""))
+    return f"{TIPOS_LEI[m.group('tipo')]} nº {numero:,}/{ano_com_quatro_digitos(m.group('ano'))}".replace(",", ".")
+
+
+def _normalizar_sumula(texto, minusculo):
+    m = _NUMERO.search(minusculo)
+    if not m:
+        return None
+    if "vinculante" in minusculo or "sv" in minusculo:
+        return f"Súmula Vinculante {m.group()}"
+    return f"Súmula {m.group()}"
+
+
+def _normalizar_constituicao(texto, minusculo):
+    return CONSTITUICAO
+
+
+def _normalizar_codigo(texto, minusculo):
+    for trecho, canonico in CODIGOS:
+        if trecho in minusculo:
+            return canonico
+    return texto.title()
+
+
+NORMALIZADORES = {
+    "ARTIGO": _normalizar_artigo,
+    "LEI": _normalizar_lei,
+    "SUMULA": _normalizar_sumula,
+    "CONSTITUICAO": _normalizar_constituicao,
+    "CODIGO": _normalizar_codigo,
+}
+
+
+@lru_cache(maxsize=TAMANHO_MEMO)
+def normalizar(rule_id, texto):
+    """
+    Normaliza o texto de uma citação para o id canônico do nó no grafo.
+
+    O resultado é memorizado por (rule_id, texto). Regras desconhecidas, e textos que a regra não
+    reconhece, retornam o texto original sem espaços nas pontas.
+
+    :param rule_id: Regra que encontrou a citação (ARTIGO, LEI, SUMULA, CONSTITUICAO, CODIGO).
+    :param texto: Texto da citação como aparece no documento.
+    :return: O id normalizado.
+    """
+    normalizador = NORMALIZADORES.get(rule_id)
+    resultado = normalizador(texto, texto.strip().lower()) if normalizador else None
+    return resultado if resultado is not None else texto.strip()
+
+
+def normalizar_lote(spans):
+    """
+    Normaliza uma lista de (rule_id, texto) de uma vez, na mesma ordem.
+
+    Cada forma distinta do lote é normalizada uma única vez, mesmo que o memo já tenha sido esvaziado.
+    """
+    resultados = {}
+    saida = []
+    for span in spans:
+        if span not in resultados:
+            resultados[span] = normalizar(*span)
+        saida.append(resultados[span])
+    return saida
+
+
+def estatisticas_memo():
+    """Retorna acertos, falhas e tamanho atual do memo de normalizar()."""
+    info = normalizar.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
@@ -0,0 +1,163 @@
+import importlib.util
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import metrics
+
+# Uma página com camada de texto tem milhares de caracteres; carimbos e cabeçalhos de PDFs
+# digitalizados ("Assinado digitalmente por ...") ficam bem abaixo deste limite.
+MIN_CARACTERES_POR_PAGINA = 100
+DPI_PADRAO = 300
+IDIOMA_PADRAO = "por"
+
+
+def densidade_texto(texto):
+    """Conta os caracteres alfanuméricos do texto de uma página."""
+    return sum(1 for c in texto if c.isalnum()) if texto else 0
+
+
+def precisa_ocr(texto, min_caracteres=MIN_CARACTERES_POR_PAGINA):
+    """Indica se a página parece ser apenas imagem (texto extraído abaixo de `min_caracteres`)."""
+    return densidade_texto(texto) < min_caracteres
+
+
+def ocr_disponivel():
+    """Verifica se pytesseract, Pillow, pypdfium2 (que renderiza as páginas) e o executável do Tesseract estão instalados."""
+    return (
+        importlib.util.find_spec("pytesseract") is not None
+        and importlib.util.find_spec("pypdfium2") is not None
+        and importlib.util.find_spec("PIL") is not None
+        and shutil.which("tesseract") is not None
+    )
+
+
+def reconhecer_com_tesseract(caminho, numero_pagina, dpi=DPI_PADRAO, idioma=IDIOMA_PADRAO):
+    """Renderiza a página com pdfium e aplica o Tesseract. Executado nos processos da fila de OCR."""
+    import pypdfium2 as pdfium
+    import pytesseract
+
+    pdf = pdfium.PdfDocument(caminho)
+    try:
+        pagina = pdf[numero_pagina]
+        imagem = pagina.render(scale=dpi / 72).to_pil()
+        pagina.close()
+    finally:
+        pdf.close()
+    return pytesseract.image_to_string(imagem, lang=idioma)
+
+
+def _executar_ocr(motor, caminho, numero_pagina, dpi, idioma):
+    inicio = time.perf_counter()
+    texto = motor(caminho, numero_pagina, dpi, idioma)
+    return texto, time.perf_counter() - inicio
+
+
+class FilaOcr:
+    """
+    Fila de OCR com pool de processos próprio e número limitado de páginas pendentes.
+
+    Fica separada da extração da camada de texto: páginas digitalizadas são enviadas para cá e o
+    restante do documento continua sendo extraído e processado enquanto o OCR roda. Quando a fila
+    está cheia, tentar_submeter() não bloqueia; a página é reenviada depois.
+    """
+
+    def __init__(self, workers=2, max_pendentes=None, motor=None, dpi=DPI_PADRAO, idioma=IDIOMA_PADRAO,
+                 executor=None):
+        """
+        :param workers: Número de processos dedicados ao OCR.
+        :param max_pendentes: Máximo de páginas aguardando OCR (padrão: 4 por worker).
+        :param motor: Função (caminho, numero_pagina, dpi, idioma) -> texto. Padrão: Tesseract.
+        :param executor: Executor a usar no lugar do pool próprio (ex.: para testes).
+        """
+        self.motor = motor or reconhecer_com_tesseract
+        self.dpi = dpi
+        self.idioma = idioma
+        self._proprio_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers)
+        self._vagas = threading.BoundedSemaphore(max_pendentes or 4 * workers)
+
+    @property
+    def versao(self):
+        """Identifica motor, idioma e resolução para compor a chave do cache de texto."""
+        return f"{getattr(self.motor, '__name__', 'ocr')}-{self.idioma}-{self.dpi}dpi"
+
+    def _submeter(self, caminho, numero_pagina):
+        futuro = self.executor.submit(_executar_ocr, self.motor, caminho, numero_pagina, self.dpi, self.idioma)
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        return futuro
+
+    def tentar_submeter(self, caminho, numero_pagina):
+        """Envia a página para OCR e retorna o Future, ou None se a fila estiver cheia."""
+        if not self._vagas.acquire(blocking=False):
+            return None
+        return self._submeter(caminho, numero_pagina)
+
+    def submeter(self, caminho, numero_pagina):
+        """Envia a página para OCR, aguardando uma vaga se a fila estiver cheia."""
+        self._vagas.acquire()
+        return self._submeter(caminho, numero_pagina)
+
+    def fechar(self):
+        if self._proprio_executor:
+            self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def _resultado_ocr(caminho, numero, texto_original, futuro, falhas):
+    try:
+        texto, segundos = futuro.result()
+    except Exception as e:
+        print(f"Aviso: OCR da página {numero + 1} de '{caminho}' falhou: {e}")
+        metrics.OCR_PAGE_SECONDS.observe(0, outcome="error")
+        if falhas is not None:
+            falhas.append(numero)
+        return texto_original
+    metrics.OCR_PAGE_SECONDS.observe(segundos, outcome="success")
+    # Mantém a camada de texto original se o OCR não encontrou nada melhor
+    return texto if densidade_texto(texto) > densidade_texto(texto_original) else texto_original
+
+
+def completar_com_ocr(paginas, caminho, fila, min_caracteres=MIN_CARACTERES_POR_PAGINA, falhas=None):
+    """
+    Repassa as páginas (numero, texto) e envia para a fila de OCR as que parecem digitalizadas.
+
+    Páginas com camada de texto são entregues imediatamente; as páginas reconhecidas por OCR são
+    entregues assim que ficam prontas, portanto fora de ordem (o número da página as identifica).
+
+    :param falhas: Lista (opcional) que recebe os números das páginas cujo OCR falhou; essas páginas
+                   são entregues com a camada de texto original.
+    """
+    pendentes = []  # (numero, texto_original, futuro)
+    adiadas = []    # (numero, texto_original) que não couberam na fila
+
+    def prontas():
+        nonlocal pendentes
+        restantes = []
+        for numero, original, futuro in pendentes:
+            if futuro.done():
+                yield numero, _resultado_ocr(caminho, numero, original, futuro, falhas)
+            else:
+                restantes.append((numero, original, futuro))
+        pendentes = restantes
+
+    for numero, texto in paginas:
+        if precisa_ocr(texto, min_caracteres):
+            futuro = fila.tentar_submeter(caminho, numero)
+            if futuro is None:
+                adiadas.append((numero, texto))
+            else:
+                pendentes.append((numero, texto, futuro))
+        else:
+            yield numero, texto
+        yield from prontas()
+
+    for numero, texto in adiadas:
+        pendentes.append((numero, texto, fila.submeter(caminho, numero)))
+    for numero, original, futuro in pendentes:
+        yield numero, _resultado_ocr(caminho, numero, original, futuro, falhas)
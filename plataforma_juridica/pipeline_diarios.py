@@ -0,0 +1,239 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+
+
+class ArmazemDiarios:
+    """
+    Armazém local de diários oficiais baixados, endereçado pelo conteúdo.
+
+    Cada PDF fica em <diretorio>/<hash[:2]>/<hash>.pdf e um índice SQLite guarda a URL de origem de
+    cada arquivo e se ele já passou pela extração. Assim um diário não é baixado duas vezes pela mesma
+    URL, nem processado duas vezes quando o mesmo arquivo é publicado em URLs diferentes.
+    """
+
+    def __init__(self, diretorio):
+        """
+        :param diretorio: Diretório raiz do armazém (criado se não existir).
+        """
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(diretorio, "indice.sqlite"))
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS processados (hash TEXT PRIMARY KEY);
+        """)
+
+    def caminho(self, hash_diario):
+        return os.path.join(self.diretorio, hash_diario[:2], f"{hash_diario}.pdf")
+
+    def gravar(self, blocos):
+        """
+        Grava um diário a partir de um iterável de blocos de bytes, calculando o hash durante a escrita.
+
+        O arquivo é escrito em um temporário no próprio armazém e renomeado para o caminho final, então
+        uma falha no meio do download não deixa arquivo parcial. Pode ser chamado de várias threads.
+
+        :return: Tupla (hash, caminho do arquivo).
+        """
+        h = hashlib.sha256()
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for bloco in blocos:
+                    h.update(bloco)
+                    f.write(bloco)
+            hash_diario = h.hexdigest()
+            destino = self.caminho(hash_diario)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(temporario, destino)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        return hash_diario, destino
+
+    def hash_da_url(self, url):
+        linha = self._conn.execute("SELECT hash FROM urls WHERE url = ?", (url,)).fetchone()
+        if linha is None or not os.path.exists(self.caminho(linha[0])):
+            return None
+        return linha[0]
+
+    def registrar_url(self, url, hash_diario):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, hash_diario))
+
+    def foi_processado(self, hash_diario):
+        return self._conn.execute("SELECT 1 FROM processados WHERE hash = ?", (hash_diario,)).fetchone() is not None
+
+    def marcar_processado(self, hash_diario):
+        with self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO processados VALUES (?)", (hash_diario,))
+
+    def close(self):
+        self._conn.close()
+
+
+def processar_diarios(client, diarios, armazem, processar, workers=4):
+    """
+    Baixa os diários em um pool limitado e entrega cada arquivo ao extrator assim que fica pronto.
+
+    Os downloads correm em até `workers` threads, com no máximo 2 * workers diários em andamento, e
+    `processar` é sempre chamado na thread de quem chamou esta função (a escrita no grafo não precisa
+    ser thread-safe). Diários cuja URL ou conteúdo já foi processado são ignorados.
+
+    :param client: QueridoDiarioClient usado para os downloads (iterar_conteudo_diario).
+    :param diarios: Iterável de diários como retornados pelas buscas do cliente (com a chave 'url').
+    :param armazem: ArmazemDiarios onde os PDFs são guardados.
+    :param processar: Função processar(caminho_pdf, diario) chamada uma vez por diário novo.
+    :param workers: Número de downloads simultâneos.
+    :return: Dicionário com os totais de baixados, processados, ignorados e erros.
+    """
+    totais = {"baixados": 0, "processados": 0, "ignorados": 0, "erros": 0}
+
+    def concluir(diario, hash_diario, caminho):
+        armazem.registrar_url(diario["url"], hash_diario)
+        if armazem.foi_processado(hash_diario):
+            totais["ignorados"] += 1
+            return
+        try:
+            processar(caminho, diario)
+        except Exception as e:
+            print(f"  [ERRO] Falha ao processar o diário {diario['url']}: {e}")
+            totais["erros"] += 1
+            metrics.DOCUMENTS_PROCESSED.inc(stage="pipeline_diarios", outcome="error")
+            return
+        armazem.marcar_processado(hash_diario)
+        totais["processados"] += 1
+        metrics.DOCUMENTS_PROCESSED.inc(stage="pipeline_diarios", outcome="success")
+
+    def aguardar_mais_antigo(pendentes):
+        diario, futuro = pendentes.popleft()
+        try:
+            hash_diario, caminho = futuro.result()
+        except Exception as e:
+            print(f"  [ERRO] Falha ao baixar o diário {diario['url']}: {e}")
+            totais["erros"] += 1
+            metrics.DOCUMENTS_PROCESSED.inc(stage="pipeline_diarios", outcome="error")
+            return
+        totais["baixados"] += 1
+        concluir(diario, hash_diario, caminho)
+
+    pendentes = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download-diario") as executor:
+        for diario in diarios:
+            url = diario.get("url")
+            if not url:
+                continue
+            hash_diario = armazem.hash_da_url(url)
+            if hash_diario is not None:
+                # Já baixado em uma execução anterior; só falta processar se ela foi interrompida
+                concluir(diario, hash_diario, armazem.caminho(hash_diario))
+                continue
+            pendentes.append((diario, executor.submit(armazem.gravar, client.iterar_conteudo_diario(url))))
+            while len(pendentes) >= 2 * workers:
+                aguardar_mais_antigo(pendentes)
+        while pendentes:
+            aguardar_mais_antigo(pendentes)
+
+    print(f"Diários: {totais['baixados']} baixado(s), {totais['processados']} processado(s), "
+          f"{totais['ignorados']} já conhecido(s), {totais['erros']} com erro.")
+    return totais
+
+
+def nome_documento(diario):
+    """Nome do nó :Documento de um diário: município, data e URL de origem."""
+    partes = [diario.get("territory_name") or diario.get("territory_id"), diario.get("date"), diario["url"]]
+    return " - ".join(str(p) for p in partes if p)
+
+
+def ano_diario(diario):
+    """Ano de publicação do diário ('date' no formato AAAA-MM-DD), ou None se ausente."""
+    data = diario.get("date") or ""
+    return int(data[:4]) if data[:4].isdigit() else None
+
+
+def main():
+    import datetime
+    import pipeline_extracao_grafo as pipeline
+    from graph_queries import mark_graph_updated
+    from agendador_diarios import LimitadorPorHost, MarcasDagua, dividir_tarefas, executar_tarefas
+    from api_camara_client import ApiCamaraClient
+    from cache_texto_pdf import CacheTextoPdf
+    from extracao_citacoes import MotorRegex
+    from querido_diario_client import QueridoDiarioClient
+    from snapshot_camara import SnapshotCamara
+    import indice_leis
+
+    print("--- Iniciando Pipeline de Diários Oficiais (Querido Diário) ---")
+    try:
+        config = pipeline.ler_configuracoes()
+        neo4j_conn = pipeline.Neo4jConnection(config['NEO4J']['URI'], config['NEO4J']['USER'], config['NEO4J']['PASSWORD'])
+        snapshot_path = config.get('API_CAMARA', 'SNAPSHOT', fallback='')
+        camara_client = ApiCamaraClient(config['API_CAMARA']['BASE_URL'],
+                                        snapshot=SnapshotCamara(snapshot_path) if snapshot_path else None)
+        mapa_leis = indice_leis.abrir_mapa_leis(
+            config.get('PATHS', 'INDICE_LEIS', fallback='plataforma_juridica/indice_leis.sqlite'),
+            'plataforma_juridica/mapeamento_leis.json',
+        )
+        # Limite de requisições por segundo para cada host (API e servidor de arquivos)
+        limitador = LimitadorPorHost(config.getfloat('QUERIDO_DIARIO', 'REQUISICOES_POR_SEGUNDO', fallback=2.0))
+        qd_client = QueridoDiarioClient(config['QUERIDO_DIARIO']['BASE_URL'], config['QUERIDO_DIARIO']['API_KEY'],
+                                        limitador=limitador)
+        diretorio = config.get('QUERIDO_DIARIO', 'DIRETORIO', fallback='cache/diarios')
+        armazem = ArmazemDiarios(diretorio)
+        # Última data coletada por município; cada execução só busca o que foi publicado depois dela
+        marcas = MarcasDagua(os.path.join(diretorio, 'marcas.sqlite'))
+        workers = config.getint('QUERIDO_DIARIO', 'WORKERS_DOWNLOAD', fallback=4)
+        workers_busca = config.getint('QUERIDO_DIARIO', 'WORKERS_BUSCA', fallback=8)
+        dias_por_tarefa = config.getint('QUERIDO_DIARIO', 'DIAS_POR_TAREFA', fallback=31)
+        # Diários publicados ou indexados com atraso: os últimos dias antes da marca são buscados de novo
+        dias_revisao = config.getint('QUERIDO_DIARIO', 'DIAS_REVISAO', fallback=7)
+        # MUNICIPIOS: IDs separados por vírgula; MUNICIPIOS_ARQUIVO: um ID por linha
+        municipios = [m.strip() for m in config.get('QUERIDO_DIARIO', 'MUNICIPIOS', fallback='').split(',') if m.strip()]
+        arquivo_municipios = config.get('QUERIDO_DIARIO', 'MUNICIPIOS_ARQUIVO', fallback='')
+        if arquivo_municipios:
+            with open(arquivo_municipios, 'r', encoding='utf-8') as f:
+                municipios += [linha.strip() for linha in f if linha.strip()]
+        data_inicio = datetime.date.fromisoformat(config['QUERIDO_DIARIO']['DATA_INICIO'])
+        cache_dir = config.get('EXTRACAO', 'CACHE_DIR', fallback='cache/texto_pdf')
+        cache_texto = CacheTextoPdf(cache_dir) if cache_dir else None
+    except (FileNotFoundError, KeyError) as e:
+        print(f"[ERRO] Erro ao ler o arquivo de configuração ou mapeamento: {e}")
+        return
+
+    motor = MotorRegex()
+
+    def processar(caminho, diario):
+        paginas = pipeline.ler_paginas_de_pdf(caminho, cache=cache_texto)
+        with metrics.NEO4J_BATCH_SECONDS.time(stage="pipeline_diarios"):
+            pipeline.extrair_e_popular_grafo(None, neo4j_conn, camara_client, mapa_leis,
+                                             nome_documento(diario), paginas, motor=motor, ano=ano_diario(diario))
+
+    def ao_concluir(tarefa, diarios):
+        print(f"\nMunicípio {tarefa.municipio}, {tarefa.inicio} a {tarefa.fim}")
+        totais = processar_diarios(qd_client, diarios, armazem, processar, workers=workers)
+        print(f"  {totais['processados']} diário(s) processado(s), {totais['ignorados']} já conhecido(s).")
+        if totais["erros"]:
+            # Não avança a marca d'água: os diários com erro são tentados de novo na próxima execução
+            raise RuntimeError(f"{totais['erros']} diário(s) com erro")
+
+    tarefas = dividir_tarefas(municipios, data_inicio, datetime.date.today(), marcas, dias_por_tarefa, dias_revisao)
+    print(f"{len(tarefas)} tarefa(s) para {len(municipios)} município(s).")
+    with qd_client:
+        executar_tarefas(qd_client, tarefas, ao_concluir, marcas, workers=workers_busca)
+
+    marcas.close()
+    armazem.close()
+    mark_graph_updated(neo4j_conn.execute_query)
+    neo4j_conn.close()
+    metrics.dump_batch_metrics("pipeline_diarios")
+    print("\n--- Pipeline de diários concluído ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
-import spacy
-from spacy.matcher import Matcher
 from neo4j import GraphDatabase
+import bisect
 import os
-import re
-import json
-from pypdf import PdfReader
+import time
 import configparser
 from api_camara_client import ApiCamaraClient
+from snapshot_camara import SnapshotCamara
+import extracao_pdf
+from cache_texto_pdf import CacheTextoPdf
+import ocr_pdf
+from extracao_citacoes import MotorRegex, MotorSpacy, citacoes_com_contexto, resolver_artigo
+import normalizacao
+import indice_leis
+import metrics
+from graph_queries import mark_graph_updated
+from estatisticas_citacoes import chave_no
 
 # --- FUNÇÕES DE CONFIGURAÇÃO ---
 def ler_configuracoes(config_file='plataforma_juridica/config.ini'):
@@ -26,8 +33,14 @@ class Neo4jConnection:
         self._driver.close()
 
     def execute_query(self, query, parameters=None):
-        with self._driver.session() as session:
-            return session.execute_write(self._execute_transaction, query, parameters)
+        try:
+            with metrics.NEO4J_STATEMENT_SECONDS.time(), self._driver.session() as session:
+                records = session.execute_write(self._execute_transaction, query, parameters)
+        except Exception:
+            metrics.NEO4J_STATEMENTS.inc(outcome="error")
+            raise
+        metrics.NEO4J_STATEMENTS.inc(outcome="success")
+        return records
 
     @staticmethod
     def _execute_transaction(tx, query, parameters):
@@ -52,8 +65,18 @@ class Neo4jConnection:
 
 # --- FUNÇÕES DO PIPELINE ---
 
-def carregar_modelo_spacy():
-    """Carrega o modelo de linguagem em português do spaCy."""
+def carregar_modelo_spacy(modo="completo"):
+    """
+    Carrega o modelo de linguagem em português do spaCy.
+
+    :param modo: 'completo' carrega o pt_core_news_sm; 'tokenizador' usa apenas spacy.blank("pt"),
+                 suficiente para os padrões de citação e muito mais rápido de carregar.
+    """
+    import spacy  # Só é necessário quando o motor de extração é o spaCy
+    if modo == "tokenizador":
+        nlp = spacy.blank("pt")
+        print("spaCy carregado apenas com o tokenizador do português.")
+        return nlp
     try:
         nlp = spacy.load("pt_core_news_sm")
         print("Modelo spaCy 'pt_core_news_sm' carregado com sucesso.")
@@ -62,26 +85,66 @@ def carregar_modelo_spacy():
         print("Modelo 'pt_core_news_sm' não encontrado.")
         return None
 
-def ler_texto_de_pdf(pdf_path):
-    """Lê o texto de um arquivo PDF usando pypdf."""
+def ler_texto_de_pdf(pdf_path, backend=None, workers=None, cache=None):
+    """Lê o texto de um arquivo PDF usando o backend de extração configurado (ver extracao_pdf)."""
     print(f"Lendo texto do PDF: {pdf_path}")
     if not os.path.exists(pdf_path):
         print(f"Erro: Arquivo PDF não encontrado em '{pdf_path}'.")
         return None
 
     try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            extracted = page.extract_text()
-            if extracted:
-                text += extracted + "\n"
+        with metrics.PDF_PARSE_SECONDS.time():
+            text = extracao_pdf.extrair_texto(pdf_path, backend=backend, workers=workers, cache=cache)
         print(f"Texto extraído do PDF (total de {len(text)} caracteres).")
         return text
     except Exception as e:
         print(f"Erro ao extrair texto do PDF '{pdf_path}': {e}")
         return None
 
+def ler_paginas_de_pdf(pdf_path, backend=None, workers=None, executor=None, cache=None, ocr=None):
+    """
+    Gera (numero_pagina, texto) para cada página do PDF à medida que é extraída, com numero_pagina
+    começando em 0 como em extracao_pdf.iterar_paginas.
+
+    Páginas sem texto são omitidas, mas as demais mantêm o número real da página no PDF; com OCR
+    as páginas podem chegar fora de ordem. O tempo registrado em pdf_parse_duration_seconds é apenas o
+    tempo em que o consumidor esperou pela extração. Com `cache`, PDFs já extraídos são lidos do
+    cache de texto em vez de reabertos. Com `ocr` (uma ocr_pdf.FilaOcr), páginas digitalizadas são
+    reconhecidas em paralelo e entregues quando ficam prontas.
+
+    Erros de extração (arquivo ausente, PDF corrompido ou truncado) são propagados a quem consome as
+    páginas, que não deve tratar como completo um documento lido pela metade.
+    """
+    print(f"Lendo páginas do PDF: {pdf_path}")
+    espera = 0.0
+    sem_texto = 0
+    try:
+        inicio = time.perf_counter()
+        for numero, texto in extracao_pdf.iterar_paginas(pdf_path, backend=backend, workers=workers, executor=executor,
+                                                    cache=cache, ocr=ocr):
+            espera += time.perf_counter() - inicio
+            if ocr_pdf.precisa_ocr(texto):
+                sem_texto += 1
+            if texto:
+                yield numero, texto
+            inicio = time.perf_counter()
+    finally:
+        metrics.PDF_PARSE_SECONDS.observe(espera)
+    if sem_texto:
+        motivo = "mesmo após OCR" if ocr is not None else "e o OCR está desativado"
+        print(f"  [Aviso] {sem_texto} página(s) de '{pdf_path}' parecem digitalizadas, sem texto extraível {motivo}.")
+
+def listar_pdfs_de_diretorio(pdf_directory_path):
+    """Retorna (nome do arquivo, caminho completo) dos PDFs de um diretório."""
+    if not os.path.isdir(pdf_directory_path):
+        print(f"Erro: Diretório '{pdf_directory_path}' não encontrado.")
+        return []
+    return [
+        (filename, os.path.join(pdf_directory_path, filename))
+        for filename in sorted(os.listdir(pdf_directory_path))
+        if filename.lower().endswith(".pdf")
+    ]
+
 def ler_textos_de_diretorio_pdfs(pdf_directory_path):
     """Lê todos os arquivos PDF de um diretório e retorna seus textos."""
     print(f"Procurando PDFs no diretório: {pdf_directory_path}")
@@ -100,142 +163,214 @@ def ler_textos_de_diretorio_pdfs(pdf_directory_path):
     return pdf_texts
 
 def normalizar_entidade(rule_id, entity_text):
-    """Normaliza o texto da entidade para um formato padrão."""
-    text = entity_text.strip().lower()
-    
-    try:
-        if rule_id == 'ARTIGO':
-            num = re.search(r'\d+', text).group()
-            return f"Art. {num}"
-        
-        elif rule_id == 'LEI':
-            # A normalização da LEI agora é apenas para limpar o texto
-            return entity_text.strip()
-        
-        elif rule_id == 'SUMULA':
-            num_match = re.search(r'\d+', text)
-            if num_match:
-                num = num_match.group(0)
-                if 'vinculante' in text or 'sv' in text:
-                    return f"Súmula Vinculante {num}"
-                return f"Súmula {num}"
-
-        elif rule_id == 'CONSTITUICAO':
-            return "Constituição Federal de 1988"
-
-        elif rule_id == 'CODIGO':
-            if 'processo civil' in text: return "Código de Processo Civil"
-            if 'processo penal' in text: return "Código de Processo Penal"
-            if 'civil' in text: return "Código Civil"
-            if 'penal' in text: return "Código Penal"
-            if 'tributário' in text: return "Código Tributário Nacional"
-            if 'defesa do consumidor' in text: return "Código de Defesa do Consumidor"
-            return entity_text.title()
-
-    except (AttributeError, IndexError):
-        print(f"  [Aviso] Não foi possível normalizar '{entity_text}' para a regra {rule_id}. Usando texto original.")
-        return entity_text.strip()
-
-    return entity_text.strip()
-
-def extrair_e_popular_grafo(nlp, neo4j_conn, camara_client, mapa_leis, document_name, document_text):
-    """Função principal para extrair entidades dos textos e popular o grafo Neo4j."""
+    """Normaliza o texto da entidade para um formato padrão (ver normalizacao; o resultado é memorizado)."""
+    return normalizacao.normalizar(rule_id, entity_text)
+
+def mesclar_dispositivo(neo4j_conn, referencia):
+    """
+    Cria a hierarquia Diploma -> Artigo -> Parágrafo -> Inciso de uma citação resolvida.
+
+    Cada artigo é identificado pelo par (diploma, número), então "art. 5º da CF" e "art. 5º do CPC"
+    são nós distintos. Retorna (rótulo, id) do dispositivo mais específico, alvo da aresta CITA.
+    """
+    atual = f"{referencia.diploma}, art. {referencia.artigo}"
+    niveis = [("Artigo", atual, referencia.artigo, "TEM_ARTIGO")]
+    if referencia.paragrafo:
+        atual += ", parágrafo único" if referencia.paragrafo == "único" else f", § {referencia.paragrafo}"
+        niveis.append(("Paragrafo", atual, referencia.paragrafo, "TEM_PARAGRAFO"))
+    if referencia.inciso:
+        atual += f", inciso {referencia.inciso}"
+        niveis.append(("Inciso", atual, referencia.inciso, "TEM_INCISO"))
+
+    clausulas = [f"MERGE (n0:{referencia.rotulo_diploma} {{id: $diploma}})"]
+    params = {"diploma": referencia.diploma}
+    for i, (rotulo, id_dispositivo, numero, relacao) in enumerate(niveis, 1):
+        clausulas.append(f"MERGE (n{i}:{rotulo} {{id: $id{i}}}) ON CREATE SET n{i}.numero = $numero{i}, n{i}.diploma = $diploma")
+        clausulas.append(f"MERGE (n{i - 1})-[:{relacao}]->(n{i})")
+        params[f"id{i}"] = id_dispositivo
+        params[f"numero{i}"] = numero
+    neo4j_conn.execute_query("\n".join(clausulas), params)
+    return niveis[-1][0], niveis[-1][1]
+
+def agregar_citacao(agregadas, entity_label, entity_id, pagina, inicio):
+    """Soma uma ocorrência à citação (rótulo, id) do documento, guardando primeira e última posição e as páginas."""
+    chave = (entity_label, entity_id)
+    atual = agregadas.get(chave)
+    if atual is None:
+        agregadas[chave] = {
+            "id": entity_id, "count": 1, "paginas": [pagina],
+            "primeira_pagina": pagina, "primeira_posicao": inicio,
+            "ultima_pagina": pagina, "ultima_posicao": inicio,
+        }
+        return
+    atual["count"] += 1
+    # Páginas reconhecidas por OCR chegam fora de ordem: a lista é mantida ordenada e a primeira e a
+    # última ocorrência são decididas pela posição (página, início), não pela ordem de chegada.
+    indice = bisect.bisect_left(atual["paginas"], pagina)
+    if indice == len(atual["paginas"]) or atual["paginas"][indice] != pagina:
+        atual["paginas"].insert(indice, pagina)
+    if (pagina, inicio) < (atual["primeira_pagina"], atual["primeira_posicao"]):
+        atual["primeira_pagina"], atual["primeira_posicao"] = pagina, inicio
+    if (pagina, inicio) > (atual["ultima_pagina"], atual["ultima_posicao"]):
+        atual["ultima_pagina"], atual["ultima_posicao"] = pagina, inicio
+
+# Arestas CITA de uma versão anterior do documento que a atual não tem mais. Os nós deixados de citar
+# ficam em citacoes_removidas para que estatisticas_citacoes também os recalcule; a lista só guarda
+# nós que o documento não cita hoje, então não cresce além dos nós que ele já citou.
+REMOVER_CITACOES_ANTIGAS = """
+MATCH (d:Documento {nome: $nome})-[antiga:CITA]->(e)
+WITH d, antiga, labels(e)[0] + ':' + e.id AS chave
+WHERE NOT chave IN $chaves
+DELETE antiga
+WITH d, collect(chave) AS removidas
+SET d.citacoes_removidas = [c IN coalesce(d.citacoes_removidas, []) WHERE NOT c IN $chaves AND NOT c IN removidas]
+                           + removidas
+"""
+
+def gravar_citacoes(neo4j_conn, document_name, agregadas):
+    """
+    Grava as arestas CITA do documento: uma consulta UNWIND por rótulo, um MERGE por par distinto.
+
+    As propriedades são atribuídas (não incrementadas), então reprocessar o documento não duplica contagens,
+    e as arestas para entidades que o documento não cita mais são removidas. Por isso só deve ser chamada
+    com as citações do documento lido por inteiro: um erro de leitura (ver ler_paginas_de_pdf) interrompe
+    extrair_e_popular_grafo antes daqui e mantém as citações já gravadas.
+    Ao final o documento recebe atualizado_em, usado pela atualização incremental de estatisticas_citacoes.
+    """
+    por_rotulo = {}
+    for (entity_label, _), citacao in agregadas.items():
+        por_rotulo.setdefault(entity_label, []).append(citacao)
+
+    for entity_label, citacoes in por_rotulo.items():
+        query = f"""
+        MATCH (d:Documento {{nome: $nome}})
+        UNWIND $citacoes AS c
+        MERGE (e:{entity_label} {{id: c.id}})
+        MERGE (d)-[r:CITA]->(e)
+        SET r.count = c.count, r.paginas = c.paginas,
+            r.primeira_pagina = c.primeira_pagina, r.primeira_posicao = c.primeira_posicao,
+            r.ultima_pagina = c.ultima_pagina, r.ultima_posicao = c.ultima_posicao
+        """
+        neo4j_conn.execute_query(query, {"nome": document_name, "citacoes": citacoes})
+        print(f"  Relações [:CITA] gravadas para {len(citacoes)} nó(s) :{entity_label}.")
+    neo4j_conn.execute_query(REMOVER_CITACOES_ANTIGAS, {
+        "nome": document_name, "chaves": [chave_no(rotulo, id_entidade) for rotulo, id_entidade in agregadas],
+    })
+    # Marcado só depois de todas as arestas: estatisticas_citacoes recalcula os nós citados pelos
+    # documentos com atualizado_em posterior à sua última execução.
+    neo4j_conn.execute_query("MATCH (d:Documento {nome: $nome}) SET d.atualizado_em = datetime()",
+                             {"nome": document_name})
+
+def enriquecer_lei(neo4j_conn, camara_client, mapa_leis, normalized_text):
+    """Busca na API da Câmara a proposição que originou a lei e grava ementa, status e autores."""
+    projeto_origem = mapa_leis.get(normalized_text)
+    if not projeto_origem:
+        print(f"  [Aviso] Lei '{normalized_text}' não encontrada no arquivo de mapeamento.")
+        return
+
+    sigla = projeto_origem['sigla']
+    numero = projeto_origem['numero']
+    ano = projeto_origem['ano']
+
+    print(f"  Buscando proposição na API da Câmara: {sigla} {numero}/{ano}")
+    proposicao = camara_client.buscar_proposicao(sigla, numero, ano)
+
+    if proposicao and proposicao.get('id'):
+        prop_id = proposicao['id']
+        detalhes = camara_client.obter_detalhes_proposicao(prop_id)
+
+        if detalhes:
+            query = f"""
+            MATCH (l:Lei {{id: $id}})
+            SET l.ementa = $ementa, l.status = $status, l.urlInteiroTeor = $url
+            """
+            params = {
+                'id': normalized_text,
+                'ementa': detalhes.get('ementa'),
+                'status': detalhes.get('statusProposicao', {}).get('descricaoSituacao'),
+                'url': detalhes.get('urlInteiroTeor')
+            }
+            neo4j_conn.execute_query(query, params)
+            print(f"    -> Nó :Lei enriquecido com ementa e status.")
+
+        autores = camara_client.obter_autores_proposicao(prop_id)
+        if autores:
+            for autor in autores:
+                props_autor = {'nome': autor['nome'], 'tipo': autor.get('tipo', 'Indefinido')}
+                neo4j_conn.execute_query("MERGE (a:Autor {nome: $nome}) SET a += $props", {'nome': autor['nome'], 'props': props_autor})
+                neo4j_conn.create_relationship(
+                    "Autor", {'nome': autor['nome']},
+                    "Lei", {'id': normalized_text},
+                    "AUTOR_DE"
+                )
+                print(f"    -> Relação [:AUTOR_DE] criada para o autor: {autor['nome']}")
+
+def extrair_e_popular_grafo(nlp, neo4j_conn, camara_client, mapa_leis, document_name, document_text, motor=None,
+                            ano=None):
+    """
+    Função principal para extrair entidades dos textos e popular o grafo Neo4j.
+
+    As citações são contadas em memória durante a leitura do documento e gravadas ao final, com uma
+    aresta CITA por entidade distinta (ver gravar_citacoes).
+
+    :param motor: Motor de extração de citações (ver extracao_citacoes). Se None, usa o Matcher do spaCy
+                  sobre `nlp`, tokenizando apenas as janelas em torno de palavras-chave.
+    :param ano: Ano do documento (publicação), usado nas contagens de citações por ano. Se None, o
+                documento mantém o ano já gravado; sem ano, conta só em total_citacoes (o ano da
+                ingestão não diz nada sobre o documento).
+    """
     print(f"\nIniciando extração e povoamento para o documento: {document_name}")
     
-    matcher = Matcher(nlp.vocab)
+    if motor is None:
+        motor = MotorSpacy(nlp)
 
-    pattern_lei = [{"LOWER": {"IN": ["lei", "decreto-lei"]}}, {"LOWER": "nº"}, {"TEXT": {"REGEX": "^\\d{1,3}(\\.\\d{3})*\\/\\d{4}$"}}]
-    matcher.add("LEI", [pattern_lei])
-
-    pattern_artigo = [{"LOWER": {"IN": ["artigo", "art.", "art"]}}, {"IS_DIGIT": True}]
-    matcher.add("ARTIGO", [pattern_artigo])
-
-    pattern_sumula = [{"LOWER": {"IN": ["súmula", "sv"]}}, {"LOWER": "vinculante", "OP": "?"}, {"LOWER": {"IN": ["nº", "n."]}, "OP": "?"}, {"IS_DIGIT": True}]
-    matcher.add("SUMULA", [pattern_sumula])
+    neo4j_conn.execute_query("MERGE (d:Documento {nome: $nome}) SET d.ano = coalesce($ano, d.ano)",
+                             {"nome": document_name, "ano": ano})
+    
+    # Aceita o texto inteiro, uma lista de textos de página ou os pares (numero_pagina, texto) de
+    # ler_paginas_de_pdf; com estes, a extração da próxima página acontece enquanto o matcher
+    # processa a atual e as páginas mantêm o número real mesmo com páginas em branco omitidas.
+    paginas = [document_text] if isinstance(document_text, str) else document_text
+    paginas = ((i, p) if isinstance(p, str) else p for i, p in enumerate(paginas))
+
+    agregadas = {}
+    dispositivos = {}
+    for numero_pagina, texto_pagina, citacao in citacoes_com_contexto(motor, paginas):
+        rule_id = citacao.regra
+        entity_text = normalizacao.limpar_texto(citacao.texto)
+    
+        normalized_text = normalizar_entidade(rule_id, entity_text)
+        if not normalized_text:
+            continue
 
-    pattern_cf_completa = [{"LOWER": "constituição"}, {"LOWER": "da"}, {"LOWER": "república"}, {"LOWER": "federativa"}, {"LOWER": "do"}, {"LOWER": "brasil"}]
-    pattern_cf_federal = [{"LOWER": "constituição"}, {"LOWER": "federal"}]
-    pattern_cf_88 = [{"LOWER": "constituição"}, {"LOWER": "de"}, {"LOWER": "1988"}]
-    pattern_cf_sigla = [{"TEXT": {"IN": ["CF", "CRFB", "CF/88"]}}]
-    matcher.add("CONSTITUICAO", [pattern_cf_completa, pattern_cf_federal, pattern_cf_88, pattern_cf_sigla])
+        entity_label = rule_id.capitalize()
+        entity_id = normalized_text
 
-    pattern_codigo_simples = [{"LOWER": "código"}, {"LOWER": {"IN": ["civil", "penal", "tributário", "eleitoral", "florestal"]}}]
-    pattern_codigo_processo = [{"LOWER": "código"}, {"LOWER": "de"}, {"LOWER": "processo"}, {"LOWER": {"IN": ["civil", "penal"]}}]
-    pattern_codigo_consumidor = [{"LOWER": "código"}, {"LOWER": "de"}, {"LOWER": "defesa"}, {"LOWER": "do"}, {"LOWER": "consumidor"}]
-    matcher.add("CODIGO", [pattern_codigo_simples, pattern_codigo_processo, pattern_codigo_consumidor])
+        # "art. 5º, inciso LV, da CF" vira Constituicao -> Artigo -> Inciso; só artigos sem diploma
+        # identificado continuam como o nó genérico "Art. N". A hierarquia é gravada uma vez por documento.
+        referencia = resolver_artigo(texto_pagina, citacao) if rule_id == 'ARTIGO' else None
+        if referencia and referencia.diploma:
+            if referencia not in dispositivos:
+                dispositivos[referencia] = mesclar_dispositivo(neo4j_conn, referencia)
+            entity_label, entity_id = dispositivos[referencia]
 
-    neo4j_conn.execute_query("MERGE (d:Documento {nome: $nome})", {"nome": document_name})
-    
-    doc = nlp(document_text)
-    matches = matcher(doc)
+        agregar_citacao(agregadas, entity_label, entity_id, numero_pagina, citacao.inicio)
 
-    if not matches:
+    if not agregadas:
         print("  Nenhuma citação encontrada neste documento com os padrões atuais.")
+        # Ainda remove as citações de uma versão anterior do documento
+        gravar_citacoes(neo4j_conn, document_name, agregadas)
         return
 
-    for match_id, start, end in matches:
-        span = doc[start:end]
-        rule_id = nlp.vocab.strings[match_id]
-        entity_text = re.sub(r'[.,\s]*$', '', span.text.strip())
-        
-        normalized_text = normalizar_entidade(rule_id, entity_text)
-        if not normalized_text:
-            continue
+    for (entity_label, entity_id), citacao in agregadas.items():
+        print(f"  - Encontrado: '{entity_id}' ({entity_label}): {citacao['count']} ocorrência(s), "
+              f"páginas {citacao['paginas']}")
+    gravar_citacoes(neo4j_conn, document_name, agregadas)
 
-        print(f"  - Encontrado: '{entity_text}' ({rule_id}) -> Normalizado para: '{normalized_text}'")
-        
-        entity_label = rule_id.capitalize()
-        
-        props = {"id": normalized_text}
-        neo4j_conn.execute_query(f"MERGE (e:{entity_label} {{id: $id}})", props)
-        
-        neo4j_conn.create_relationship(
-            "Documento", {"nome": document_name},
-            entity_label, {"id": normalized_text},
-            "CITA"
-        )
-
-        if rule_id == 'LEI':
-            projeto_origem = mapa_leis.get(normalized_text)
-            if projeto_origem:
-                sigla = projeto_origem['sigla']
-                numero = projeto_origem['numero']
-                ano = projeto_origem['ano']
-
-                print(f"  Buscando proposição na API da Câmara: {sigla} {numero}/{ano}")
-                proposicao = camara_client.buscar_proposicao(sigla, numero, ano)
-                
-                if proposicao and proposicao.get('id'):
-                    prop_id = proposicao['id']
-                    detalhes = camara_client.obter_detalhes_proposicao(prop_id)
-                    
-                    if detalhes:
-                        query = f"""
-                        MATCH (l:Lei {{id: $id}})
-                        SET l.ementa = $ementa, l.status = $status, l.urlInteiroTeor = $url
-                        """
-                        params = {
-                            'id': normalized_text,
-                            'ementa': detalhes.get('ementa'),
-                            'status': detalhes.get('statusProposicao', {}).get('descricaoSituacao'),
-                            'url': detalhes.get('urlInteiroTeor')
-                        }
-                        neo4j_conn.execute_query(query, params)
-                        print(f"    -> Nó :Lei enriquecido com ementa e status.")
-
-                    autores = camara_client.obter_autores_proposicao(prop_id)
-                    if autores:
-                        for autor in autores:
-                            props_autor = {'nome': autor['nome'], 'tipo': autor.get('tipo', 'Indefinido')}
-                            neo4j_conn.execute_query("MERGE (a:Autor {nome: $nome}) SET a += $props", {'nome': autor['nome'], 'props': props_autor})
-                            neo4j_conn.create_relationship(
-                                "Autor", {'nome': autor['nome']},
-                                "Lei", {'id': normalized_text},
-                                "AUTOR_DE"
-                            )
-                            print(f"    -> Relação [:AUTOR_DE] criada para o autor: {autor['nome']}")
-            else:
-                print(f"  [Aviso] Lei '{normalized_text}' não encontrada no arquivo de mapeamento.")
+    # Cada lei é consultada na API da Câmara uma vez por documento, não a cada ocorrência
+    for entity_label, entity_id in agregadas:
+        if entity_label == 'Lei':
+            enriquecer_lei(neo4j_conn, camara_client, mapa_leis, entity_id)
 
 # --- FUNÇÃO PRINCIPAL DE EXECUÇÃO ---
 def main():
@@ -248,16 +383,39 @@ def main():
         neo4j_password = config['NEO4J']['PASSWORD']
         pdf_directory_to_process = config['PATHS']['PDF_DIRECTORY']
         camara_api_url = config['API_CAMARA']['BASE_URL']
+        # Seção opcional: backend de PDF (pdfium, pypdf, pdfminer; vazio = mais rápido instalado) e processos
+        pdf_backend = config.get('EXTRACAO', 'BACKEND_PDF', fallback='') or None
+        pdf_workers = config.getint('EXTRACAO', 'WORKERS_PDF', fallback=0) or None
+        # Cache do texto extraído, por hash do PDF; vazio desativa
+        cache_dir = config.get('EXTRACAO', 'CACHE_DIR', fallback='cache/texto_pdf')
+        cache_texto = CacheTextoPdf(cache_dir) if cache_dir else None
+        # Os padrões de citação só precisam do tokenizador; 'completo' carrega o pt_core_news_sm inteiro
+        # MOTOR=regex dispensa o spaCy (mesmas citações, maior vazão); MOTOR=spacy usa o Matcher
+        motor_extracao = config.get('EXTRACAO', 'MOTOR', fallback='spacy')
+        modo_spacy = config.get('EXTRACAO', 'MODO_SPACY', fallback='tokenizador')
+        prefiltro = config.getboolean('EXTRACAO', 'PREFILTRO', fallback=True)
+        # OCR de páginas digitalizadas em um pool de processos próprio; ativo por padrão se o Tesseract estiver instalado
+        ocr_ativo = config.getboolean('OCR', 'ATIVO', fallback=ocr_pdf.ocr_disponivel())
+        fila_ocr = ocr_pdf.FilaOcr(
+            workers=config.getint('OCR', 'WORKERS', fallback=2),
+            idioma=config.get('OCR', 'IDIOMA', fallback=ocr_pdf.IDIOMA_PADRAO),
+        ) if ocr_ativo else None
         
         neo4j_conn = Neo4jConnection(neo4j_uri, neo4j_user, neo4j_password)
         print("Conexão com Neo4j estabelecida.")
         
-        camara_client = ApiCamaraClient(camara_api_url)
+        # Cópia local dos arquivos anuais de proposições/autores (snapshot_camara.py); a API só é
+        # chamada para o que não estiver nela
+        snapshot_path = config.get('API_CAMARA', 'SNAPSHOT', fallback='')
+        snapshot = SnapshotCamara(snapshot_path) if snapshot_path else None
+        camara_client = ApiCamaraClient(camara_api_url, snapshot=snapshot)
         print("Cliente da API da Câmara inicializado.")
 
-        with open('plataforma_juridica/mapeamento_leis.json', 'r', encoding='utf-8') as f:
-            mapeamento_leis = json.load(f)
-        mapa_leis = {item['lei']: item['projeto_origem'] for item in mapeamento_leis}
+        # Índice SQLite gerado por gerar_mapeamento_leis.py; sem ele, usa o mapeamento JSON antigo
+        mapa_leis = indice_leis.abrir_mapa_leis(
+            config.get('PATHS', 'INDICE_LEIS', fallback='plataforma_juridica/indice_leis.sqlite'),
+            'plataforma_juridica/mapeamento_leis.json',
+        )
         print("Mapeamento de leis carregado.")
 
     except (FileNotFoundError, KeyError) as e:
@@ -267,18 +425,40 @@ def main():
         print(f"[ERRO] Falha inesperada: {e}")
         return
 
-    nlp = carregar_modelo_spacy()
-    if nlp is None: return
-
-    processed_pdfs = ler_textos_de_diretorio_pdfs(pdf_directory_to_process)
-    if not processed_pdfs:
+    if motor_extracao == 'regex':
+        nlp = None
+        motor = MotorRegex()
+        print("Motor de extração: expressões regulares (sem spaCy).")
+    else:
+        nlp = carregar_modelo_spacy(modo_spacy)
+        if nlp is None: return
+        motor = MotorSpacy(nlp, prefiltro=prefiltro)
+
+    pdfs = listar_pdfs_de_diretorio(pdf_directory_to_process)
+    if not pdfs:
         print(f"Nenhum PDF encontrado ou processado no diretório '{pdf_directory_to_process}'. Encerrando.")
         return
 
-    for filename, text in processed_pdfs:
-        extrair_e_popular_grafo(nlp, neo4j_conn, camara_client, mapa_leis, filename, text)
-
+    processados = 0
+    for filename, caminho in pdfs:
+        try:
+            paginas = ler_paginas_de_pdf(caminho, backend=pdf_backend, workers=pdf_workers, cache=cache_texto, ocr=fila_ocr)
+            with metrics.NEO4J_BATCH_SECONDS.time(stage="pipeline_extracao_grafo"):
+                extrair_e_popular_grafo(nlp, neo4j_conn, camara_client, mapa_leis, filename, paginas, motor=motor)
+        except Exception as e:
+            print(f"[ERRO] Falha ao processar o PDF '{caminho}': {e}")
+            metrics.DOCUMENTS_PROCESSED.inc(stage="pipeline_extracao_grafo", outcome="error")
+            continue
+        processados += 1
+        metrics.DOCUMENTS_PROCESSED.inc(stage="pipeline_extracao_grafo", outcome="success")
+    print(f"Total de {processados} de {len(pdfs)} PDFs processados do diretório.")
+
+    if fila_ocr is not None:
+        fila_ocr.fechar()
+    # Recalcula as estatísticas de citação materializadas e invalida o cache das consultas da API
+    mark_graph_updated(neo4j_conn.execute_query)
     neo4j_conn.close()
+    metrics.dump_batch_metrics("pipeline_extracao_grafo")
     print("\n--- Pipeline concluído ---")
 
 
@@ -1,11 +1,18 @@
 from elasticsearch import Elasticsearch
 from neo4j_client import Neo4jClient
 import os
+import sys
+import time
 import logging # Import logging module
 import logging_config # Import our logging configuration
+import metrics
+from entity_resolution import PARTY_CONSTRAINTS, EntityResolver, migrate_name_keyed_parties
+from graph_queries import mark_graph_updated
 
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
+# Per-process messages go through a rate-limited child logger
+record_logger = logging_config.get_record_logger(__name__)
 
 # Elasticsearch Configuration (same as ingest_cnj_data.py)
 ES_HOST = "localhost"
@@ -16,6 +23,8 @@ ES_INDEX = "cnj_processes"
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password") # IMPORTANT: Change this!
+# Blocking index that keeps party ids stable across runs (see entity_resolution)
+ENTITY_INDEX_PATH = os.getenv("ENTITY_INDEX_PATH", "entity_index.sqlite")
 
 # Initialize clients (moved inside main function or called once to handle potential connection errors)
 # For now, keep global for simplicity, but better error handling for init in main
@@ -36,7 +45,18 @@ except Exception as e:
     # neo4j_client remains None
 
 
-def extract_and_load_graph_data():
+def extract_and_load_graph_data(resolver: EntityResolver = None):
+    """
+    Loads processes from Elasticsearch into the graph.
+
+    Parties are merged on the canonical id assigned by the entity resolver instead of their raw
+    name, and each distinct party is merged at most once per run. Graphs loaded before canonical ids
+    must be migrated once with `python process_for_graph.py --migrate-parties`, otherwise every party
+    ends up duplicated next to its name-keyed node.
+
+    Args:
+        resolver (EntityResolver): Resolver to use; defaults to one on ENTITY_INDEX_PATH, closed at the end.
+    """
     logger.info("Starting graph data extraction and loading...")
     
     if not es_client:
@@ -57,18 +77,27 @@ def extract_and_load_graph_data():
     try:
         response = es_client.search(index=ES_INDEX, body=query)
         hits = response["hits"]["hits"]
+        metrics.DOCUMENTS_FETCHED.inc(len(hits), source="elasticsearch")
         logger.info(f"Fetched {len(hits)} documents from Elasticsearch for graph processing.")
     except Exception as e:
         logger.error(f"Error fetching documents from Elasticsearch: {e}", exc_info=True)
         return
 
+    own_resolver = resolver is None
+    if own_resolver:
+        resolver = EntityResolver(ENTITY_INDEX_PATH)
+    for constraint in PARTY_CONSTRAINTS:
+        neo4j_client.run_query(constraint)
+
     processed_count = 0
+    loaded_parties = set()
+    batch_start = time.perf_counter()
     for hit in hits:
         process_data = hit["_source"]
         process_id = process_data.get("numeroProcesso")
         
         if not process_id:
-            logger.warning(f"Skipping record due to missing 'numeroProcesso': {process_data}")
+            logger.warning("Skipping record due to missing 'numeroProcesso': %s", process_data)
             continue
 
         try:
@@ -119,17 +148,19 @@ def extract_and_load_graph_data():
                     tipo_pessoa = pessoa.get("tipoPessoa") # FISICA or JURIDICA
                     documento = pessoa.get("documento") # CPF/CNPJ, often masked or sensitive
 
-                    if nome_parte:
+                    parte_id = resolver.resolve(nome_parte, tipo_pessoa, documento)
+                    if parte_id:
                         label = "PessoaFisica" if tipo_pessoa == "FISICA" else "PessoaJuridica"
-                        parte_node_props = {"nome": nome_parte, "tipoPessoa": tipo_pessoa}
-                        if documento:
-                            parte_node_props["documento"] = documento # Store if not sensitive
-
-                        neo4j_client.merge_node(label, "nome", parte_node_props)
+                        if parte_id not in loaded_parties:
+                            parte_node_props = {"id": parte_id, "nome": nome_parte, "tipoPessoa": tipo_pessoa}
+                            if documento:
+                                parte_node_props["documento"] = documento # Store if not sensitive
+                            neo4j_client.merge_node(label, "id", parte_node_props)
+                            loaded_parties.add(parte_id)
 
                         neo4j_client.create_relationship(
                             "Processo", "numeroProcesso", process_id,
-                            label, "nome", nome_parte,
+                            label, "id", parte_id,
                             "TEM_PARTE", {"tipoParticipacao": parte.get("tipoParticipacao")}
                         )
 
@@ -145,7 +176,7 @@ def extract_and_load_graph_data():
 
                                 neo4j_client.create_relationship(
                                     "Advogado", "oab", oab,
-                                    label, "nome", nome_parte,
+                                    label, "id", parte_id,
                                     "REPRESENTA"
                                 )
                                 neo4j_client.create_relationship(
@@ -154,19 +185,46 @@ def extract_and_load_graph_data():
                                     "ATUA_EM"
                                 )
             processed_count += 1
-            logger.info(f"Successfully processed process {process_id} for graph.")
+            metrics.DOCUMENTS_PROCESSED.inc(stage="process_for_graph", outcome="success")
+            record_logger.info("Successfully processed process %s for graph.", process_id)
         except Exception as e:
-            logger.error(f"Error processing process {process_id} for graph: {e}", exc_info=True)
+            metrics.DOCUMENTS_PROCESSED.inc(stage="process_for_graph", outcome="error")
+            logger.error("Error processing process %s for graph: %s", process_id, e, exc_info=True)
+    metrics.NEO4J_BATCH_SECONDS.observe(time.perf_counter() - batch_start, stage="process_for_graph")
+    if own_resolver:
+        resolver.close()
+    else:
+        resolver.flush()
+    if processed_count:
+        # Invalidates the API's graph query cache
+        mark_graph_updated(neo4j_client.run_query)
     
     logger.info(f"Graph data extraction and loading completed. Total processes processed: {processed_count}")
 
+def migrate_parties():
+    """One-off migration of name-keyed party nodes onto canonical ids (see entity_resolution)."""
+    if not neo4j_client:
+        logger.error("Neo4j client not available. Cannot migrate party nodes.")
+        return
+    for constraint in PARTY_CONSTRAINTS:
+        neo4j_client.run_query(constraint)
+    with EntityResolver(ENTITY_INDEX_PATH) as resolver:
+        migrated = migrate_name_keyed_parties(neo4j_client.run_query, resolver)
+    if migrated:
+        mark_graph_updated(neo4j_client.run_query)
+    logger.info(f"Party migration completed. Legacy nodes migrated: {migrated}")
+
 if __name__ == "__main__":
     logger.info("Starting process_for_graph.py script.")
     try:
-        extract_and_load_graph_data()
+        if "--migrate-parties" in sys.argv[1:]:
+            migrate_parties()
+        else:
+            extract_and_load_graph_data()
     except Exception as e:
         logger.critical(f"Script terminated due to unhandled error: {e}", exc_info=True)
     finally:
         if neo4j_client:
             neo4j_client.close()
+        metrics.dump_batch_metrics("process_for_graph")
     logger.info("Finished process_for_graph.py script.")
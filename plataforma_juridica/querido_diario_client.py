@@ -1,20 +1,60 @@
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import metrics
+
+TAMANHO_PAGINA = 100  # Máximo permitido pela API
+TAMANHO_BLOCO_DOWNLOAD = 1 << 20
+# Respostas que valem nova tentativa: limite de requisições e falhas temporárias do servidor
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+class FalhaConsulta(RuntimeError):
+    """Uma página de busca não pôde ser obtida, mesmo após as novas tentativas."""
 
 class QueridoDiarioClient:
     """
     Um cliente para interagir com a API do Querido Diário.
     """
-    def __init__(self, base_url, api_key):
+    def __init__(self, base_url, api_key, max_paralelo=8, limitador=None, tentativas=3, espera_base=1.0):
         """
         Inicializa o cliente da API do Querido Diário.
 
         :param base_url: A URL base da API do Querido Diário.
         :param api_key: A chave da API para autenticação.
+        :param max_paralelo: Máximo de requisições simultâneas de paginação, compartilhado por todas as buscas.
+        :param limitador: Objeto com aguardar(url) chamado antes de cada requisição
+                          (ex: agendador_diarios.LimitadorPorHost); None não limita.
+        :param tentativas: Total de tentativas por requisição em erros de conexão, 429 e 5xx.
+        :param espera_base: Espera antes da segunda tentativa, em segundos; dobra a cada nova tentativa.
         """
+        self.limitador = limitador
+        self.tentativas = tentativas
+        self.espera_base = espera_base
         self.base_url = base_url
         self.api_key = api_key
         self.headers = {'Authorization': f'Token {self.api_key}', 'Accept': 'application/json'}
+        self.max_paralelo = max_paralelo
+        # Sessão com pool de conexões do tamanho do paralelismo, para reaproveitar as conexões TLS
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_paralelo, pool_maxsize=max_paralelo)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix='querido-diario')
+
+    def fechar(self):
+        """Encerra o pool de requisições e a sessão HTTP."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
 
     def _fazer_requisicao(self, endpoint, params=None):
         """
@@ -25,44 +65,99 @@ class QueridoDiarioClient:
         :return: O JSON da resposta da API ou None em caso de erro.
         """
         url = f"{self.base_url}{endpoint}"
-        try:
-            response = requests.get(url, params=params, headers=self.headers)
-            response.raise_for_status()  # Lança uma exceção para erros HTTP (4xx ou 5xx)
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Erro ao fazer a requisição para {url}: {e}")
-            return None
+        for tentativa in range(1, self.tentativas + 1):
+            espera = self.espera_base * 2 ** (tentativa - 1)
+            try:
+                if self.limitador is not None:
+                    self.limitador.aguardar(url)
+                with metrics.time_http_request('querido_diario'):
+                    response = self.session.get(url, params=params, headers=self.headers)
+                    response.raise_for_status()  # Lança uma exceção para erros HTTP (4xx ou 5xx)
+                return response.json()
+            except requests.exceptions.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                repetivel = status is None or status in STATUS_REPETIVEIS
+                if not repetivel or tentativa == self.tentativas:
+                    print(f"Erro ao fazer a requisição para {url}: {e}")
+                    return None
+                retry_after = e.response.headers.get('Retry-After') if e.response is not None else None
+                if retry_after and retry_after.isdigit():
+                    espera = max(espera, int(retry_after))
+                print(f"  [Aviso] Tentativa {tentativa} para {url} falhou ({e}); nova tentativa em {espera:.1f}s.")
+                time.sleep(espera)
+
+    def _paginar(self, endpoint, params, ignorar_falhas=True):
+        """
+        Percorre todas as páginas de uma busca, gerando os resultados à medida que chegam.
+
+        O total informado na primeira página determina quantas páginas faltam; elas são buscadas em
+        paralelo (no máximo max_paralelo requisições ao mesmo tempo) e geradas na ordem das páginas.
+        Se a API não informar o total, as páginas são buscadas uma a uma até a última.
+
+        :param endpoint: O endpoint da API (ex: '/gazettes').
+        :param params: Parâmetros da busca, sem 'page' e 'size'.
+        :param ignorar_falhas: Se False, uma página que não pôde ser obtida levanta FalhaConsulta
+                               em vez de ser pulada.
+        :return: Um gerador de dicionários, um por resultado.
+        """
+        primeira = self._fazer_requisicao(endpoint, params={**params, 'page': 1, 'size': TAMANHO_PAGINA})
+        if primeira is None and not ignorar_falhas:
+            raise FalhaConsulta(f"Página 1 de {endpoint} não pôde ser obtida.")
+        if not primeira or not primeira.get('results'):
+            return
+        yield from primeira['results']
+
+        total = primeira.get('total_gazettes', primeira.get('count'))
+        if total is None:
+            yield from self._paginar_em_sequencia(endpoint, params, primeira, ignorar_falhas)
+            return
 
-    def buscar_diarios_por_municipio_e_data(self, municipality_id, start_date, end_date=None):
+        ultima_pagina = math.ceil(total / TAMANHO_PAGINA)
+        pendentes = deque()
+        proxima = 2
+        while proxima <= ultima_pagina or pendentes:
+            # Janela limitada de páginas em voo, para não enfileirar milhares de requisições de uma vez
+            while proxima <= ultima_pagina and len(pendentes) < 2 * self.max_paralelo:
+                pendentes.append((proxima, self._executor.submit(
+                    self._fazer_requisicao, endpoint, {**params, 'page': proxima, 'size': TAMANHO_PAGINA}
+                )))
+                proxima += 1
+            pagina, futuro = pendentes.popleft()
+            data = futuro.result()
+            if data is None:
+                if not ignorar_falhas:
+                    raise FalhaConsulta(f"Página {pagina} de {endpoint} não pôde ser obtida.")
+                print(f"  [Aviso] Página {pagina} de {endpoint} não pôde ser obtida; seguindo para as demais.")
+                continue
+            yield from data.get('results') or []
+
+    def _paginar_em_sequencia(self, endpoint, params, data, ignorar_falhas=True):
+        page = 1
+        while data and data.get('results') and len(data['results']) >= data.get('size', TAMANHO_PAGINA):
+            page += 1
+            data = self._fazer_requisicao(endpoint, params={**params, 'page': page, 'size': TAMANHO_PAGINA})
+            if data is None and not ignorar_falhas:
+                raise FalhaConsulta(f"Página {page} de {endpoint} não pôde ser obtida.")
+            if data and data.get('results'):
+                yield from data['results']
+
+    def buscar_diarios_por_municipio_e_data(self, municipality_id, start_date, end_date=None, ignorar_falhas=True):
         """
         Busca diários por ID do município e período.
 
         :param municipality_id: O ID do município.
         :param start_date: Data de início no formato YYYY-MM-DD.
         :param end_date: Data de fim no formato YYYY-MM-DD (opcional).
-        :return: Uma lista de dicionários, cada um representando um diário.
+        :param ignorar_falhas: Se False, levanta FalhaConsulta quando alguma página não pôde ser obtida.
+        :return: Um gerador de dicionários, cada um representando um diário.
         """
-        all_results = []
-        page = 1
-        while True:
-            params = {
-                'municipality_id': municipality_id,
-                'published_since': start_date,
-                'page': page,
-                'size': 100  # Máximo permitido pela API
-            }
-            if end_date:
-                params['published_until'] = end_date
-
-            data = self._fazer_requisicao('/gazettes', params=params)
-            if data and data.get('results'):
-                all_results.extend(data['results'])
-                if len(data['results']) < data['size']:
-                    break
-                page += 1
-            else:
-                break
-        return all_results
+        params = {
+            'municipality_id': municipality_id,
+            'published_since': start_date,
+        }
+        if end_date:
+            params['published_until'] = end_date
+        return self._paginar('/gazettes', params, ignorar_falhas)
 
     def buscar_diarios_por_termo(self, query, municipality_id=None, start_date=None, end_date=None):
         """
@@ -72,32 +167,16 @@ class QueridoDiarioClient:
         :param municipality_id: ID do município (opcional).
         :param start_date: Data de início no formato YYYY-MM-DD (opcional).
         :param end_date: Data de fim no formato YYYY-MM-DD (opcional).
-        :return: Uma lista de dicionários, cada um representando um diário.
+        :return: Um gerador de dicionários, cada um representando um diário.
         """
-        all_results = []
-        page = 1
-        while True:
-            params = {
-                'query': query,
-                'page': page,
-                'size': 100  # Máximo permitido pela API
-            }
-            if municipality_id:
-                params['municipality_id'] = municipality_id
-            if start_date:
-                params['start_date'] = start_date
-            if end_date:
-                params['end_date'] = end_date
-
-            data = self._fazer_requisicao('/search', params=params)
-            if data and data.get('results'):
-                all_results.extend(data['results'])
-                if len(data['results']) < data['size']:
-                    break
-                page += 1
-            else:
-                break
-        return all_results
+        params = {'query': query}
+        if municipality_id:
+            params['municipality_id'] = municipality_id
+        if start_date:
+            params['start_date'] = start_date
+        if end_date:
+            params['end_date'] = end_date
+        return self._paginar('/search', params)
 
     def obter_conteudo_diario(self, file_url):
         """
@@ -107,9 +186,34 @@ class QueridoDiarioClient:
         :return: O conteúdo binário do arquivo ou None em caso de erro.
         """
         try:
-            response = requests.get(file_url, headers=self.headers)
-            response.raise_for_status()
+            with metrics.time_http_request('querido_diario'):
+                response = self.session.get(file_url, headers=self.headers)
+                response.raise_for_status()
             return response.content  # Retorna o conteúdo binário
         except requests.exceptions.RequestException as e:
             print(f"Erro ao obter conteúdo do diário em {file_url}: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def iterar_conteudo_diario(self, file_url, tamanho_bloco=TAMANHO_BLOCO_DOWNLOAD):
+        """
+        Baixa um diário em blocos, sem carregar o arquivo inteiro em memória.
+
+        Diferente de obter_conteudo_diario, erros HTTP são propagados para quem consome os blocos.
+
+        :param file_url: URL para o arquivo PDF do diário.
+        :param tamanho_bloco: Tamanho de cada bloco em bytes.
+        :return: Um gerador de blocos de bytes.
+        """
+        if self.limitador is not None:
+            self.limitador.aguardar(file_url)
+        # Só a requisição (até os cabeçalhos) é medida; o corpo é lido no ritmo de quem consome os
+        # blocos, e esse tempo de processamento não é latência do Querido Diário.
+        with metrics.time_http_request('querido_diario'):
+            response = self.session.get(file_url, headers=self.headers, stream=True)
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                response.close()
+                raise
+        with response:
+            yield from response.iter_content(chunk_size=tamanho_bloco)
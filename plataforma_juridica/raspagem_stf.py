@@ -0,0 +1,215 @@
+import os
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import NamedTuple
+
+try:
+    import lxml.html
+except ImportError:  # lxml é opcional; sem ele as tabelas são lidas com o html.parser da biblioteca padrão
+    lxml = None
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+# Só o documento e os scripts/XHR que montam a tabela são necessários
+TIPOS_BLOQUEADOS = frozenset({"image", "media", "font", "stylesheet", "imageset", "manifest", "texttrack"})
+TIMEOUT_NAVEGACAO_MS = 60000
+TIMEOUT_TABELA_MS = 15000
+
+
+class Listagem(NamedTuple):
+    nome: str
+    url: str
+    # Seletor CSS da tabela da listagem; só ela é lida, mesmo que a página tenha outras tabelas
+    seletor: str = "table"
+
+
+LISTAGENS = {
+    "sumulas_vinculantes": Listagem(
+        "sumulas_vinculantes", "https://www.stf.jus.br/portal/jurisprudencia/listarSumulaVinculante.asp"
+    ),
+    "sumulas": Listagem(
+        "sumulas", "https://www.stf.jus.br/portal/jurisprudencia/listarSumula.asp", "#conteudo table"
+    ),
+    "temas_repercussao_geral": Listagem(
+        "temas_repercussao_geral",
+        "https://portal.stf.jus.br/jurisprudenciaRepercussao/abrirTemasComRG.asp",
+        "#conteudo table",
+    ),
+}
+
+
+def _texto(partes):
+    return " ".join("".join(partes).split())
+
+
+class _LeitorTabela(HTMLParser):
+    """Coleta o texto das células da primeira <table> do documento."""
+
+    def __init__(self):
+        super().__init__()
+        self.linhas = []
+        self._profundidade = 0
+        self._terminou = False
+        self._linha = None
+        self._celula = None
+
+    def handle_starttag(self, tag, attrs):
+        if self._terminou:
+            return
+        if tag == "table":
+            self._profundidade += 1
+        elif self._profundidade == 1 and tag == "tr":
+            self._linha = []
+        elif self._profundidade == 1 and tag in ("td", "th") and self._linha is not None:
+            self._celula = []
+        elif self._celula is not None and tag in ("br", "p"):
+            self._celula.append(" ")
+
+    def handle_endtag(self, tag):
+        if self._terminou:
+            return
+        if tag == "table":
+            self._profundidade -= 1
+            self._terminou = self._profundidade == 0
+        elif self._profundidade == 1 and tag in ("td", "th") and self._celula is not None:
+            self._linha.append(_texto(self._celula))
+            self._celula = None
+        elif self._profundidade == 1 and tag == "tr" and self._linha is not None:
+            self.linhas.append(self._linha)
+            self._linha = None
+
+    def handle_data(self, data):
+        if self._celula is not None:
+            self._celula.append(data)
+
+
+def linhas_da_tabela(html):
+    """
+    Retorna o texto das células de cada linha da primeira tabela do HTML.
+
+    Usa lxml quando instalado e o html.parser da biblioteca padrão caso contrário; os dois
+    normalizam os espaços do texto de cada célula da mesma forma.
+
+    :param html: HTML da página.
+    :return: Lista de linhas, cada uma uma lista de textos de células (<td> e <th>).
+    """
+    if lxml is not None:
+        documento = lxml.html.fromstring(html)
+        tabelas = documento.xpath("//table")
+        if not tabelas:
+            return []
+        for br in tabelas[0].xpath(".//br"):
+            br.tail = " " + (br.tail or "")
+        return [
+            [" ".join(celula.text_content().split()) for celula in linha.xpath("./td|./th")]
+            for linha in tabelas[0].xpath("./tr|./thead/tr|./tbody/tr|./tfoot/tr")
+        ]
+    leitor = _LeitorTabela()
+    leitor.feed(html)
+    leitor.close()
+    return leitor.linhas
+
+
+def sumulas_da_tabela(html, data=None):
+    """
+    Converte a tabela de uma listagem de súmulas em tuplas (numero, texto, data).
+
+    A primeira linha é o cabeçalho; linhas com menos de duas células são ignoradas.
+    """
+    data = data or datetime.now()
+    return [(linha[0], linha[1], data) for linha in linhas_da_tabela(html)[1:] if len(linha) >= 2]
+
+
+def bloquear_recursos(route, request):
+    """Handler de rota do Playwright que descarta imagens, fontes, folhas de estilo e mídia."""
+    if request.resource_type in TIPOS_BLOQUEADOS:
+        route.abort()
+    else:
+        route.continue_()
+
+
+class RaspadorStf:
+    """
+    Navegador headless reaproveitado entre as listagens do STF.
+
+    Abre um contexto persistente do Chromium (cookies e cache ficam em `diretorio_perfil` entre
+    execuções), bloqueia recursos que não afetam o conteúdo e usa uma única aba para todas as páginas.
+    """
+
+    def __init__(self, diretorio_perfil="cache/perfil_stf", headless=True, contexto=None):
+        """
+        :param diretorio_perfil: Diretório do perfil persistente do navegador.
+        :param headless: False abre a janela (útil para depurar ou resolver um CAPTCHA).
+        :param contexto: BrowserContext do Playwright já aberto; se informado, não é fechado por este objeto.
+        """
+        self.diretorio_perfil = diretorio_perfil
+        self.headless = headless
+        self._contexto = contexto
+        self._proprio = contexto is None
+        self._playwright = None
+        self._pagina = None
+
+    def __enter__(self):
+        if self._contexto is None:
+            try:
+                from playwright.sync_api import sync_playwright
+            except ImportError as e:
+                raise ImportError("A raspagem do STF requer o pacote 'playwright', que não está instalado.") from e
+            os.makedirs(self.diretorio_perfil, exist_ok=True)
+            self._playwright = sync_playwright().start()
+            self._contexto = self._playwright.chromium.launch_persistent_context(
+                self.diretorio_perfil, headless=self.headless, user_agent=USER_AGENT,
+            )
+        self._contexto.route("**/*", bloquear_recursos)
+        return self
+
+    def __exit__(self, *exc):
+        if self._proprio:
+            self._contexto.close()
+            if self._playwright is not None:
+                self._playwright.stop()
+            self._contexto = None
+        self._pagina = None
+
+    @property
+    def pagina(self):
+        if self._pagina is None:
+            self._pagina = self._contexto.new_page()
+        return self._pagina
+
+    def html(self, listagem):
+        """Carrega uma listagem e retorna o HTML da tabela indicada pelo seletor, depois que ela aparece."""
+        resposta = self.pagina.goto(listagem.url, wait_until="domcontentloaded", timeout=TIMEOUT_NAVEGACAO_MS)
+        if resposta is not None and resposta.status != 200:
+            print(f"⚠️ {listagem.nome}: página retornou status {resposta.status}")
+        self.pagina.wait_for_selector(listagem.seletor, timeout=TIMEOUT_TABELA_MS)
+        return self.pagina.eval_on_selector(listagem.seletor, "tabela => tabela.outerHTML")
+
+    def extrair(self, listagem):
+        """Extrai as súmulas de uma listagem como tuplas (numero, texto, data)."""
+        sumulas = sumulas_da_tabela(self.html(listagem))
+        print(f"✅ {listagem.nome}: {len(sumulas)} súmulas extraídas.")
+        return sumulas
+
+    def extrair_todas(self, listagens=None):
+        """
+        Extrai várias listagens com o mesmo navegador.
+
+        Uma listagem que falha é informada e não interrompe as demais.
+
+        :return: Dicionário nome da listagem -> lista de (numero, texto, data).
+        """
+        resultado = {}
+        for listagem in (listagens or LISTAGENS.values()):
+            try:
+                resultado[listagem.nome] = self.extrair(listagem)
+            except Exception as e:
+                print(f"❌ {listagem.nome}: erro durante a navegação: {e}")
+        return resultado
+
+    def cookies(self):
+        """Cookies da sessão do navegador, para reaproveitar em clientes HTTP."""
+        return self._contexto.cookies()
@@ -5,7 +5,8 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import sqlite3
+from contextlib import closing
+from armazenamento_sumulas import abrir_banco, sincronizar_sumulas
 from datetime import datetime
 
 # --- NOVA FUNÇÃO DE EXTRAÇÃO COM SELENIUM ---
@@ -60,25 +61,19 @@ def extrair_sumulas_vinculantes():
 
     return sumulas
 
-# --- FUNÇÕES DE BANCO DE DADOS (sem alteração) ---
+# --- FUNÇÕES DE BANCO DE DADOS ---
 def criar_banco_dados():
-    conn = sqlite3.connect('conteudo_juridico.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS sumulas_vinculantes (numero TEXT PRIMARY KEY, texto TEXT, data_atualizacao DATETIME)''')
-    conn.commit()
-    conn.close()
+    abrir_banco().close()
 
 def atualizar_sumulas_bd(sumulas):
-    if not sumulas: 
+    if not sumulas:
         print("Nenhuma súmula encontrada para atualizar no banco de dados.")
-        return
-    conn = sqlite3.connect('conteudo_juridico.db')
-    c = conn.cursor()
-    for numero, texto, data in sumulas:
-        c.execute('''INSERT OR REPLACE INTO sumulas_vinculantes (numero, texto, data_atualizacao) VALUES (?, ?, ?)''', (numero, texto, data))
-    conn.commit()
-    conn.close()
-    print(f"{len(sumulas)} súmulas salvas/atualizadas no banco de dados.")
+        return []
+    # Só as súmulas novas ou com texto alterado são regravadas (ver armazenamento_sumulas)
+    with closing(abrir_banco()) as conn:
+        alteradas = sincronizar_sumulas(conn, sumulas)
+    print(f"{len(sumulas)} súmulas verificadas, {len(alteradas)} novas ou alteradas no banco de dados.")
+    return alteradas
 
 # --- BLOCO DE EXECUÇÃO PRINCIPAL ---
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+from contextlib import closing
+import normalizacao
+from armazenamento_sumulas import CAMINHO_BANCO_PADRAO, abrir_banco
+
+TAMANHO_LOTE = 1000
+
+# Índice único em :Sumula(id): o MERGE por id desta sincronização e o de extrair_e_popular_grafo viram
+# buscas no índice em vez de varreduras de todos os nós :Sumula, e os dois sempre caem no mesmo nó.
+RESTRICAO_SUMULA = "CREATE CONSTRAINT sumula_id IF NOT EXISTS FOR (s:Sumula) REQUIRE s.id IS UNIQUE"
+
+# Só os nós cujo hash mudou são alterados; os demais são apenas encontrados pelo MERGE.
+CONSULTA_SUMULAS = """
+UNWIND $sumulas AS s
+MERGE (n:Sumula {id: s.id})
+WITH n, s
+WHERE n.hash_conteudo IS NULL OR n.hash_conteudo <> s.hash_conteudo
+SET n.numero = s.numero, n.vinculante = true, n.texto = s.texto, n.hash_conteudo = s.hash_conteudo
+RETURN count(n) AS alteradas
+"""
+
+
+def id_sumula_vinculante(numero):
+    """Id do nó :Sumula no formato de normalizar_entidade ("Súmula Vinculante 13")."""
+    return normalizacao.normalizar("SUMULA", f"Súmula Vinculante {numero}")
+
+
+def gravar_sumulas(neo4j_conn, sumulas):
+    """
+    Grava súmulas vinculantes no grafo em lotes UNWIND, alterando só as que têm hash diferente.
+
+    :param neo4j_conn: Conexão com execute_query (ver pipeline_extracao_grafo.Neo4jConnection).
+    :param sumulas: Iterável de (numero, texto, hash_conteudo).
+    :return: Número de nós criados ou alterados.
+    """
+    alteradas = 0
+    lote = []
+    for numero, texto, hash_conteudo in sumulas:
+        lote.append({"id": id_sumula_vinculante(numero), "numero": numero, "texto": texto,
+                     "hash_conteudo": hash_conteudo})
+        if len(lote) >= TAMANHO_LOTE:
+            alteradas += _gravar_lote(neo4j_conn, lote)
+            lote = []
+    if lote:
+        alteradas += _gravar_lote(neo4j_conn, lote)
+    return alteradas
+
+
+def _gravar_lote(neo4j_conn, lote):
+    registros = neo4j_conn.execute_query(CONSULTA_SUMULAS, {"sumulas": lote})
+    return registros[0]["alteradas"] if registros else 0
+
+
+def sincronizar_banco_com_grafo(neo4j_conn, conn_sumulas):
+    """
+    Envia ao grafo a tabela de súmulas inteira; no grafo só mudam os nós com hash diferente.
+
+    :param conn_sumulas: Conexão de armazenamento_sumulas.abrir_banco().
+    :return: Número de nós criados ou alterados.
+    """
+    neo4j_conn.execute_query(RESTRICAO_SUMULA)
+    cursor = conn_sumulas.execute(
+        "SELECT numero, texto, hash_conteudo FROM sumulas_vinculantes WHERE hash_conteudo IS NOT NULL"
+    )
+    alteradas = gravar_sumulas(neo4j_conn, cursor)
+    print(f"✅ {alteradas} nó(s) :Sumula criados ou atualizados no grafo.")
+    return alteradas
+
+
+def publicar_alteradas(neo4j_conn, alteradas):
+    """Envia ao grafo só as súmulas devolvidas por armazenamento_sumulas.sincronizar_sumulas."""
+    return gravar_sumulas(neo4j_conn, ((s.numero, s.texto, s.hash_conteudo) for s in alteradas))
+
+
+def main():
+    from graph_queries import mark_graph_updated
+    from pipeline_extracao_grafo import Neo4jConnection, ler_configuracoes
+
+    print("--- Sincronizando súmulas com o grafo ---")
+    try:
+        config = ler_configuracoes()
+        neo4j_conn = Neo4jConnection(config['NEO4J']['URI'], config['NEO4J']['USER'], config['NEO4J']['PASSWORD'])
+        caminho_banco = config.get('PATHS', 'BANCO_SUMULAS', fallback=CAMINHO_BANCO_PADRAO)
+    except (FileNotFoundError, KeyError) as e:
+        print(f"[ERRO] Erro ao ler o arquivo de configuração: {e}")
+        return
+
+    with closing(abrir_banco(caminho_banco)) as conn:
+        if sincronizar_banco_com_grafo(neo4j_conn, conn):
+            mark_graph_updated(neo4j_conn.execute_query)
+    neo4j_conn.close()
+
+
+if __name__ == "__main__":
+    main()
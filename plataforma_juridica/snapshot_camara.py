@@ -0,0 +1,168 @@
+import csv
+import json
+import os
+import sqlite3
+
+# Arquivos anuais do portal de dados abertos da Câmara:
+#   proposicoes-<ano>.json|csv        -> uma linha por proposição, com o último status
+#   proposicoesAutores-<ano>.json|csv -> uma linha por autor de proposição
+# No CSV os campos aninhados do JSON vêm achatados ("ultimoStatus_descricaoSituacao").
+TAMANHO_LOTE = 5000
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS proposicoes (
+    id INTEGER PRIMARY KEY, sigla_tipo TEXT NOT NULL, numero INTEGER NOT NULL, ano INTEGER NOT NULL,
+    ementa TEXT, situacao TEXT, url_inteiro_teor TEXT
+);
+CREATE INDEX IF NOT EXISTS proposicoes_sigla_numero_ano ON proposicoes (sigla_tipo, numero, ano);
+CREATE TABLE IF NOT EXISTS autores (
+    id_proposicao INTEGER NOT NULL, ordem INTEGER NOT NULL, nome TEXT NOT NULL, tipo TEXT, proponente INTEGER,
+    PRIMARY KEY (id_proposicao, ordem, nome)
+) WITHOUT ROWID;
+"""
+
+
+def _campo(registro, *caminho):
+    """Lê um campo aninhado do JSON ({"ultimoStatus": {...}}) ou achatado do CSV ("ultimoStatus_...")."""
+    valor = registro.get("_".join(caminho))
+    if valor is None and len(caminho) > 1:
+        valor = registro.get(caminho[0]) or {}
+        for chave in caminho[1:]:
+            valor = valor.get(chave) if isinstance(valor, dict) else None
+    return valor if valor != "" else None
+
+
+def _inteiro(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def ler_registros(caminho_arquivo):
+    """
+    Lê um arquivo anual da Câmara em JSON ({"dados": [...]}) ou CSV (separado por ';').
+
+    O CSV é lido linha a linha; o JSON é carregado por inteiro, um ano por vez.
+
+    :return: Gerador de dicionários, um por linha do arquivo.
+    """
+    if caminho_arquivo.lower().endswith(".csv"):
+        with open(caminho_arquivo, "r", encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f, delimiter=";")
+    else:
+        with open(caminho_arquivo, "r", encoding="utf-8-sig") as f:
+            yield from json.load(f).get("dados", [])
+
+
+class SnapshotCamara:
+    """
+    Cópia local e indexada dos arquivos de proposições e autores da Câmara.
+
+    Responde às mesmas consultas do ApiCamaraClient (buscar_proposicao, obter_detalhes_proposicao,
+    obter_autores_proposicao) no formato da API, retornando None para o que não estiver na cópia.
+    """
+
+    def __init__(self, caminho_banco):
+        """
+        :param caminho_banco: Arquivo SQLite da cópia local; é criado se não existir.
+        """
+        self._conn = sqlite3.connect(caminho_banco, check_same_thread=False)
+        self._conn.executescript(_ESQUEMA)
+
+    def importar_arquivo(self, caminho_arquivo):
+        """
+        Importa um arquivo de proposições ou de autores (identificado pelo nome) para a cópia local.
+
+        Reimportar o mesmo ano substitui as linhas já existentes.
+
+        :return: Número de linhas importadas.
+        """
+        if "autores" in os.path.basename(caminho_arquivo).lower():
+            sql = "INSERT OR REPLACE INTO autores VALUES (?, ?, ?, ?, ?)"
+            linhas = (
+                (_inteiro(_campo(r, "idProposicao")), _inteiro(_campo(r, "ordemAssinatura")) or 0,
+                 _campo(r, "nomeAutor"), _campo(r, "tipoAutor"), _inteiro(_campo(r, "proponente")))
+                for r in ler_registros(caminho_arquivo)
+            )
+        else:
+            sql = "INSERT OR REPLACE INTO proposicoes VALUES (?, ?, ?, ?, ?, ?, ?)"
+            linhas = (
+                (_inteiro(_campo(r, "id")), _campo(r, "siglaTipo"), _inteiro(_campo(r, "numero")),
+                 _inteiro(_campo(r, "ano")), _campo(r, "ementa"), _campo(r, "ultimoStatus", "descricaoSituacao"),
+                 _campo(r, "urlInteiroTeor"))
+                for r in ler_registros(caminho_arquivo)
+            )
+
+        total = 0
+        lote = []
+        with self._conn:
+            for linha in linhas:
+                if None in linha[:3]:
+                    continue
+                lote.append(linha)
+                if len(lote) >= TAMANHO_LOTE:
+                    self._conn.executemany(sql, lote)
+                    total += len(lote)
+                    lote = []
+            self._conn.executemany(sql, lote)
+            total += len(lote)
+        print(f"  - {total} linha(s) importada(s) de '{caminho_arquivo}'.")
+        return total
+
+    def importar_diretorio(self, diretorio):
+        """Importa todos os arquivos .json e .csv de proposições e autores de um diretório."""
+        total = 0
+        for nome in sorted(os.listdir(diretorio)):
+            if nome.lower().startswith("proposicoes") and nome.lower().endswith((".json", ".csv")):
+                total += self.importar_arquivo(os.path.join(diretorio, nome))
+        return total
+
+    def buscar_proposicao(self, sigla_tipo, numero, ano):
+        """Equivalente local de ApiCamaraClient.buscar_proposicao."""
+        numero, ano = _inteiro(numero), _inteiro(ano)
+        if numero is None or ano is None:
+            return None
+        linha = self._conn.execute(
+            "SELECT id, sigla_tipo, numero, ano, ementa FROM proposicoes "
+            "WHERE sigla_tipo = ? AND numero = ? AND ano = ? ORDER BY id LIMIT 1",
+            (sigla_tipo, numero, ano),
+        ).fetchone()
+        if linha is None:
+            return None
+        return {"id": linha[0], "siglaTipo": linha[1], "numero": linha[2], "ano": linha[3], "ementa": linha[4]}
+
+    def obter_detalhes_proposicao(self, id_proposicao):
+        """Equivalente local de ApiCamaraClient.obter_detalhes_proposicao."""
+        linha = self._conn.execute(
+            "SELECT id, sigla_tipo, numero, ano, ementa, situacao, url_inteiro_teor FROM proposicoes WHERE id = ?",
+            (_inteiro(id_proposicao),),
+        ).fetchone()
+        if linha is None:
+            return None
+        return {
+            "id": linha[0], "siglaTipo": linha[1], "numero": linha[2], "ano": linha[3], "ementa": linha[4],
+            "statusProposicao": {"descricaoSituacao": linha[5]}, "urlInteiroTeor": linha[6],
+        }
+
+    def obter_autores_proposicao(self, id_proposicao):
+        """Equivalente local de ApiCamaraClient.obter_autores_proposicao."""
+        linhas = self._conn.execute(
+            "SELECT nome, tipo, ordem, proponente FROM autores WHERE id_proposicao = ? ORDER BY ordem, nome",
+            (_inteiro(id_proposicao),),
+        ).fetchall()
+        if not linhas:
+            return None
+        return [{"nome": nome, "tipo": tipo, "ordemAssinatura": ordem, "proponente": proponente}
+                for nome, tipo, ordem, proponente in linhas]
+
+    def close(self):
+        self._conn.close()
+
+
+if __name__ == '__main__':
+    snapshot = SnapshotCamara('plataforma_juridica/snapshot_camara.sqlite')
+    print("Importando arquivos de dados abertos da Câmara...")
+    total = snapshot.importar_diretorio('plataforma_juridica/dados_camara')
+    print(f"Importação concluída: {total} linha(s).")
+    snapshot.close()
@@ -1,5 +1,10 @@
+import json
+import os
 from playwright.sync_api import sync_playwright
 
+# Lido por busca_stf.carregar_requisicao para repetir a busca sem navegador
+ARQUIVO_REQUISICAO = 'cache/requisicao_busca_stf.json'
+
 def capturar_requisicao_search():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False)
@@ -13,6 +18,11 @@ def capturar_requisicao_search():
                 print("Método:", request.method)
                 print("Headers:", request.headers)
                 print("Post data:", request.post_data)
+                os.makedirs(os.path.dirname(ARQUIVO_REQUISICAO), exist_ok=True)
+                with open(ARQUIVO_REQUISICAO, 'w', encoding='utf-8') as f:
+                    json.dump({"url": request.url, "headers": request.headers, "post_data": request.post_data},
+                              f, ensure_ascii=False, indent=2)
+                print(f"Requisição salva em '{ARQUIVO_REQUISICAO}'.")
                 route.continue_()
             else:
                 route.continue_()
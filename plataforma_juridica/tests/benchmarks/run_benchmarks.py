@@ -0,0 +1,320 @@
+"""
+Benchmarks for the extraction and loading hot paths.
+
+Run from plataforma_juridica/:
+
+    python tests/benchmarks/run_benchmarks.py                    # compare against baselines.json
+    python tests/benchmarks/run_benchmarks.py --update-baseline  # record new baselines
+    python tests/benchmarks/run_benchmarks.py --only ler_texto_de_pdf --repeat 10
+
+Neo4j, Elasticsearch and the Câmara API are replaced by recording fakes, so only local CPU work is
+measured. The exit status is 1 when a benchmark is slower than its baseline by more than --tolerance.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(os.path.dirname(BENCH_DIR))
+if PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, PACKAGE_DIR)
+if os.path.dirname(BENCH_DIR) not in sys.path:
+    sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from benchmarks import synthetic_data  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines.json")
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Registers a setup function returning (callable, items processed per call)."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# --- Fakes ---
+
+class RecordingNeo4jConnection:
+    """Stand-in for pipeline_extracao_grafo.Neo4jConnection."""
+    def __init__(self):
+        self.queries = 0
+        self.relationships = 0
+
+    def execute_query(self, query, parameters=None):
+        self.queries += 1
+        return []
+
+    def create_relationship(self, *args, **kwargs):
+        self.relationships += 1
+
+
+class RecordingNeo4jClient:
+    """Stand-in for neo4j_client.Neo4jClient."""
+    def __init__(self):
+        self.calls = 0
+
+    def run_query(self, query, parameters=None):
+        self.calls += 1
+        return []
+
+    def merge_node(self, *args, **kwargs):
+        self.calls += 1
+        return {}
+
+    def create_relationship(self, *args, **kwargs):
+        self.calls += 1
+        return [{}]
+
+
+class NullCamaraClient:
+    def buscar_proposicao(self, *args):
+        return None
+
+
+class FakeIndices:
+    def exists(self, index):
+        return True
+
+
+class FakeElasticsearch:
+    """Serves pre-built hits and records indexing calls."""
+    def __init__(self, documents=()):
+        self.hits = [{"_source": doc, "sort": [i]} for i, doc in enumerate(documents)]
+        self.indexed = 0
+        self.indices = FakeIndices()
+
+    def search(self, index, body):
+        return {"hits": {"hits": self.hits[:body.get("size", len(self.hits))]}}
+
+    def exists(self, index, id):
+        return False
+
+    def index(self, index, id, document):
+        self.indexed += 1
+
+
+class FakeCNJClient:
+    """Returns all documents in a single page, then nothing."""
+    def __init__(self, documents):
+        self.page = {"hits": {"hits": [{"_source": doc, "sort": [i]} for i, doc in enumerate(documents)]}}
+
+    def search(self, tribunal_endpoint, query):
+        return self.page if "search_after" not in query else None
+
+
+# --- Benchmarks ---
+
+def _carregar_nlp():
+    import spacy
+    model = os.getenv("BENCH_SPACY_MODEL", "blank")
+    return spacy.blank("pt") if model == "blank" else spacy.load(model)
+
+
+@benchmark("ler_texto_de_pdf")
+def bench_ler_texto_de_pdf(scale, workdir):
+    import pipeline_extracao_grafo
+    pages = int(100 * scale)
+    path = synthetic_data.gerar_pdf_juridico(os.path.join(workdir, "processo.pdf"), pages)
+    return (lambda: pipeline_extracao_grafo.ler_texto_de_pdf(path)), pages
+
+
+@benchmark("extrair_e_popular_grafo")
+def bench_extrair_e_popular_grafo(scale, workdir):
+    import pipeline_extracao_grafo
+    nlp = _carregar_nlp()
+    paragraphs = int(500 * scale)
+    text = synthetic_data.gerar_texto_juridico(paragraphs)
+
+    def run():
+        pipeline_extracao_grafo.extrair_e_popular_grafo(
+            nlp, RecordingNeo4jConnection(), NullCamaraClient(), {}, "processo.pdf", text
+        )
+    return run, paragraphs
+
+
+@benchmark("citacoes_spacy_prefiltro")
+def bench_citacoes_spacy_prefiltro(scale, workdir):
+    from extracao_citacoes import MotorSpacy
+    motor = MotorSpacy(_carregar_nlp(), prefiltro=True)
+    paragraphs = int(200 * scale)
+    text = synthetic_data.gerar_decisao(paragraphs)
+    return (lambda: list(motor.citacoes(text))), paragraphs
+
+
+@benchmark("citacoes_regex")
+def bench_citacoes_regex(scale, workdir):
+    from extracao_citacoes import MotorRegex
+    motor = MotorRegex()
+    paragraphs = int(200 * scale)
+    text = synthetic_data.gerar_decisao(paragraphs)
+    return (lambda: list(motor.citacoes(text))), paragraphs
+
+
+@benchmark("normalizar_entidade")
+def bench_normalizar_entidade(scale, workdir):
+    import pipeline_extracao_grafo
+    spans = synthetic_data.gerar_spans_para_normalizacao(int(50000 * scale))
+
+    def run():
+        for rule_id, text in spans:
+            pipeline_extracao_grafo.normalizar_entidade(rule_id, text)
+    return run, len(spans)
+
+
+@benchmark("normalizar_lote")
+def bench_normalizar_lote(scale, workdir):
+    import normalizacao
+    spans = synthetic_data.gerar_spans_para_normalizacao(int(50000 * scale))
+    return (lambda: normalizacao.normalizar_lote(spans)), len(spans)
+
+
+@benchmark("normalizar_sem_memo")
+def bench_normalizar_sem_memo(scale, workdir):
+    # Custo de cada normalização sem o memo: referência para medir o ganho do lru_cache
+    import normalizacao
+    spans = synthetic_data.gerar_spans_para_normalizacao(int(50000 * scale))
+    normalizar = normalizacao.normalizar.__wrapped__
+
+    def run():
+        for rule_id, text in spans:
+            normalizar(rule_id, text)
+    return run, len(spans)
+
+
+@benchmark("process_for_graph")
+def bench_process_for_graph(scale, workdir):
+    import process_for_graph
+    from entity_resolution import EntityResolver
+    documents = synthetic_data.gerar_documentos_datajud(int(100 * scale))
+    fake_es = FakeElasticsearch(documents)
+
+    def run():
+        with patch.object(process_for_graph, "es_client", fake_es), \
+             patch.object(process_for_graph, "neo4j_client", RecordingNeo4jClient()):
+            process_for_graph.extract_and_load_graph_data(EntityResolver(":memory:"))
+    return run, len(documents)
+
+
+@benchmark("ingest_cnj_data")
+def bench_ingest_cnj_data(scale, workdir):
+    import ingest_cnj_data
+    documents = synthetic_data.gerar_documentos_datajud(int(1000 * scale))
+    fake_cnj = FakeCNJClient(documents)
+
+    def run():
+        with patch.object(ingest_cnj_data, "es_client", FakeElasticsearch()), \
+             patch.object(ingest_cnj_data, "cnj_client", fake_cnj):
+            ingest_cnj_data.ingest_data_for_tribunal("api_publica_bench/_search")
+    return run, len(documents)
+
+
+# --- Runner ---
+
+def measure(fn, repeat, warmup=1):
+    """Runs fn warmup + repeat times with stdout silenced and returns the timings of the measured runs."""
+    timings = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(warmup + repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                timings.append(elapsed)
+    return timings
+
+
+def run_benchmarks(names=None, repeat=5, scale=1.0):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, setup in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            fn, items = setup(scale, workdir)
+            timings = measure(fn, repeat)
+            median = statistics.median(timings)
+            results[name] = {
+                "median_s": median,
+                "min_s": min(timings),
+                "items": items,
+                "items_per_s": items / median if median else None,
+                "repeat": repeat,
+                "scale": scale,
+            }
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+
+
+def compare(results, baseline, tolerance):
+    """Returns (name, current median, baseline median) for benchmarks slower than baseline * (1 + tolerance)."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference or reference.get("scale") != result["scale"]:
+            continue
+        if result["median_s"] > reference["median_s"] * (1 + tolerance):
+            regressions.append((name, result["median_s"], reference["median_s"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", help="Benchmarks to run (default: all).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for fixture sizes.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown before failing (0.3 = 30%%).")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Also write the results of this run to this JSON file.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, args.repeat, args.scale)
+    for name, result in results.items():
+        print(f"{name:<28} median {result['median_s'] * 1000:10.2f} ms  ({result['items_per_s']:,.0f} items/s)")
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {"environment": environment(), "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline["environment"] = environment()
+        baseline["results"].update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != environment():
+        print(f"Warning: baseline recorded on {baseline.get('environment')}, running on {environment()}.")
+    regressions = compare(results, baseline, args.tolerance)
+    for name, current, reference in regressions:
+        print(f"REGRESSION {name}: {current * 1000:.2f} ms vs baseline {reference * 1000:.2f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
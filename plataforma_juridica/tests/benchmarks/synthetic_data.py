@@ -0,0 +1,203 @@
+"""Deterministic synthetic fixtures for the benchmark suite: legal texts, PDFs and DataJud documents."""
+import random
+
+CITACOES = [
+    "art. {art}º da Constituição Federal",
+    "artigo {art} do Código de Processo Civil",
+    "Art. {art} da CF",
+    "Lei nº {lei}",
+    "Decreto-Lei nº {lei}",
+    "Súmula Vinculante nº {sumula}",
+    "Súmula {sumula} do STJ",
+    "SV {sumula}",
+    "Código Civil",
+    "Código Penal",
+    "Código de Defesa do Consumidor",
+    "Constituição da República Federativa do Brasil",
+    "Constituição de 1988",
+    "CRFB",
+]
+
+FRASES = [
+    "Trata-se de recurso de apelação interposto contra sentença que julgou procedente o pedido",
+    "A parte autora sustenta a violação ao",
+    "Nos termos do",
+    "conforme entendimento consolidado e em observância ao disposto no",
+    "O Tribunal de origem afastou a aplicação do",
+    "Não há que se falar em ofensa ao",
+    "Ante o exposto, com fundamento no",
+    "Ressalte-se que a matéria foi pacificada pela",
+]
+
+# Frases sem citação, para aproximar a densidade de uma decisão real (poucas citações por página)
+FRASES_NEUTRAS = [
+    "O recorrente alegou em suas razões que a decisão merece reforma.",
+    "Os fatos narrados na inicial não foram comprovados pela parte autora.",
+    "A prova documental juntada aos autos é suficiente para o deslinde da controvérsia.",
+    "Intimadas, as partes não se manifestaram no prazo assinalado.",
+    "O laudo pericial concluiu pela existência de nexo causal entre a conduta e o dano.",
+    "Não houve oposição de embargos de declaração contra o acórdão recorrido.",
+]
+
+NOMES = ["MARIA", "JOSÉ", "ANA", "JOÃO", "ANTÔNIO", "FRANCISCA", "CARLOS", "PAULO", "LUCAS", "LUIZA"]
+SOBRENOMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA", "LIMA", "GOMES"]
+EMPRESAS = ["BANCO DO BRASIL S.A.", "Banco do Brasil SA", "ITAÚ UNIBANCO S.A.", "TELEFÔNICA BRASIL S/A",
+            "CLARO S.A.", "MUNICÍPIO DE SÃO PAULO", "ESTADO DE SÃO PAULO", "VIA VAREJO LTDA"]
+
+
+def gerar_citacao(rng):
+    return rng.choice(CITACOES).format(
+        art=rng.randint(1, 1200),
+        lei=f"{rng.randint(1, 14)}.{rng.randint(0, 999):03d}/{rng.randint(1940, 2024)}",
+        sumula=rng.randint(1, 700),
+    )
+
+
+def gerar_paragrafo(rng, citacoes=3):
+    partes = []
+    for _ in range(citacoes):
+        partes.append(f"{rng.choice(FRASES)} {gerar_citacao(rng)}.")
+    return " ".join(partes)
+
+
+def gerar_texto_juridico(paragrafos, seed=42, citacoes_por_paragrafo=3):
+    """Returns a decision-like text with `paragrafos` paragraphs dense with citations."""
+    rng = random.Random(seed)
+    return "\n".join(gerar_paragrafo(rng, citacoes_por_paragrafo) for _ in range(paragrafos))
+
+
+def gerar_decisao(paragrafos, seed=42, frases_por_paragrafo=20):
+    """Returns a decision-like text where citations are sparse: 3 per paragraph among neutral sentences."""
+    rng = random.Random(seed)
+    return "\n".join(
+        " ".join([gerar_paragrafo(rng)] + [rng.choice(FRASES_NEUTRAS) for _ in range(frases_por_paragrafo)])
+        for _ in range(paragrafos)
+    )
+
+
+def gerar_linhas_de_pagina(rng, linhas=60, largura=95):
+    """Returns one page of text wrapped to `largura` columns, like a decision printed to PDF."""
+    palavras = gerar_paragrafo(rng, citacoes=12).split()
+    resultado = []
+    linha = ""
+    while len(resultado) < linhas:
+        if not palavras:
+            palavras = gerar_paragrafo(rng, citacoes=12).split()
+        palavra = palavras.pop(0)
+        if len(linha) + len(palavra) + 1 > largura:
+            resultado.append(linha)
+            linha = palavra
+        else:
+            linha = f"{linha} {palavra}".strip()
+    return resultado
+
+
+def _escape_pdf(texto):
+    return texto.encode("cp1252", "replace").replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def construir_pdf(paginas):
+    """Builds a minimal PDF (Helvetica, WinAnsiEncoding) with one text line per entry of each page."""
+    objetos = []
+
+    def adicionar(corpo):
+        objetos.append(corpo)
+        return len(objetos)
+
+    fonte = adicionar(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    id_paginas = adicionar(b"")  # Preenchido depois que os ids das páginas forem conhecidos
+    ids = []
+    for linhas in paginas:
+        stream = b"BT /F1 9 Tf 11 TL 40 800 Td " + b" ".join(b"(" + _escape_pdf(l) + b") Tj T*" for l in linhas) + b" ET"
+        conteudo = adicionar(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        ids.append(adicionar(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (id_paginas, conteudo, fonte)
+        ))
+    objetos[id_paginas - 1] = (
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in ids) + b"] /Count %d >>" % len(ids)
+    )
+    catalogo = adicionar(b"<< /Type /Catalog /Pages %d 0 R >>" % id_paginas)
+
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for numero, corpo in enumerate(objetos, 1):
+        offsets.append(len(saida))
+        saida += b"%d 0 obj\n" % numero + corpo + b"\nendobj\n"
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for offset in offsets:
+        saida += b"%010d 00000 n \n" % offset
+    saida += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, catalogo, inicio_xref)
+    return bytes(saida)
+
+
+def gerar_pdf_juridico(caminho, paginas, seed=42):
+    """Writes a `paginas`-page PDF dense with citations to `caminho` and returns the path."""
+    rng = random.Random(seed)
+    with open(caminho, "wb") as f:
+        f.write(construir_pdf([gerar_linhas_de_pagina(rng) for _ in range(paginas)]))
+    return caminho
+
+
+def _gerar_pessoa(rng):
+    if rng.random() < 0.4:
+        return {
+            "nome": rng.choice(EMPRESAS),
+            "tipoPessoa": "JURIDICA",
+            "documento": f"{rng.randint(0, 99):02d}.{rng.randint(0, 999):03d}.{rng.randint(0, 999):03d}/0001-{rng.randint(0, 99):02d}",
+        }
+    return {
+        "nome": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+        "tipoPessoa": "FISICA",
+        "documento": f"{rng.randint(0, 999):03d}.{rng.randint(0, 999):03d}.{rng.randint(0, 999):03d}-{rng.randint(0, 99):02d}",
+    }
+
+
+def gerar_documentos_datajud(quantidade, seed=42, partes_por_processo=4, advogados_por_parte=2):
+    """Returns `quantidade` DataJud `_source` documents with parties and lawyers."""
+    rng = random.Random(seed)
+    documentos = []
+    for i in range(quantidade):
+        partes = []
+        for j in range(partes_por_processo):
+            partes.append({
+                "pessoa": _gerar_pessoa(rng),
+                "tipoParticipacao": "AUTOR" if j % 2 == 0 else "REU",
+                "advogados": [
+                    {"nome": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}", "oab": f"SP{rng.randint(10000, 499999)}"}
+                    for _ in range(advogados_por_parte)
+                ],
+            })
+        documentos.append({
+            "numeroProcesso": f"{i:07d}{rng.randint(10, 99)}2023826{rng.randint(1000, 9999)}",
+            "dataAjuizamento": f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00.000Z",
+            "uf": "SP",
+            "grau": rng.choice(["G1", "G2"]),
+            "orgaoJulgador": {"nome": f"{rng.randint(1, 40)}ª VARA CÍVEL", "codigo": rng.randint(1000, 9999)},
+            "classe": {"nome": rng.choice(["Procedimento Comum Cível", "Apelação Cível", "Execução Fiscal"]),
+                       "codigo": rng.choice([7, 198, 1116])},
+            "assuntos": [{"nome": "Indenização por Dano Moral", "codigo": 10433}],
+            "movimentos": [{"nome": "Distribuição", "dataHora": "2023-01-01T00:00:00.000Z"}],
+            "partes": partes,
+        })
+    return documentos
+
+
+def gerar_spans_para_normalizacao(quantidade, seed=42):
+    """Returns (rule_id, surface_text) pairs with the repetition profile of a real corpus."""
+    rng = random.Random(seed)
+    artigos = [f"{rng.choice(['art.', 'Art.', 'artigo'])} {rng.choice(range(1, 60))}" for _ in range(200)]
+    sumulas = [f"{rng.choice(['Súmula', 'Súmula Vinculante', 'SV'])} {rng.randint(1, 60)}" for _ in range(100)]
+    codigos = ["Código Civil", "Código de Processo Civil", "Código Penal", "Código de Processo Penal",
+               "código tributário", "Código de Defesa do Consumidor", "Código Eleitoral"]
+    constituicoes = ["Constituição Federal", "CF", "CRFB", "CF/88", "Constituição de 1988"]
+    leis = [f"Lei nº {rng.randint(1, 14)}.{rng.randint(0, 999):03d}/{rng.randint(1990, 2024)}" for _ in range(100)]
+    populacao = (
+        [("ARTIGO", t) for t in artigos] + [("SUMULA", t) for t in sumulas] +
+        [("CODIGO", t) for t in codigos] + [("CONSTITUICAO", t) for t in constituicoes] + [("LEI", t) for t in leis]
+    )
+    # Zipf-like repetition: a few surface forms ("art. 5") dominate the corpus
+    pesos = [1 / (rank + 1) for rank in range(len(populacao))]
+    rng.shuffle(populacao)
+    return rng.choices(populacao, weights=pesos, k=quantidade)
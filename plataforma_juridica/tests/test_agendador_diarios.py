@@ -0,0 +1,152 @@
+import datetime
+import threading
+import pytest
+import requests
+from agendador_diarios import LimitadorPorHost, MarcasDagua, Tarefa, dividir_tarefas, executar_tarefas
+from querido_diario_client import FalhaConsulta, QueridoDiarioClient
+
+D = datetime.date
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+        self.esperas = []
+
+    def __call__(self):
+        return self.agora
+
+    def dormir(self, segundos):
+        self.esperas.append(round(segundos, 6))
+
+class ClienteFalso:
+    """Retorna um diário por dia do intervalo; municípios em `falhas` levantam FalhaConsulta."""
+
+    def __init__(self, falhas=()):
+        self.falhas = set(falhas)
+        self.buscas = []
+        self._lock = threading.Lock()
+
+    def buscar_diarios_por_municipio_e_data(self, municipio, inicio, fim, ignorar_falhas=True):
+        with self._lock:
+            self.buscas.append((municipio, inicio, fim))
+        if (municipio, inicio) in self.falhas:
+            raise FalhaConsulta("Página 1 de /gazettes não pôde ser obtida.")
+        dias = (D.fromisoformat(fim) - D.fromisoformat(inicio)).days + 1
+        return [{"url": f"https://qd/{municipio}/{D.fromisoformat(inicio) + datetime.timedelta(days=i)}.pdf"}
+                for i in range(dias)]
+
+@pytest.fixture
+def marcas(tmp_path):
+    marcas = MarcasDagua(str(tmp_path / "marcas.sqlite"))
+    yield marcas
+    marcas.close()
+
+def test_rate_limit_is_per_host():
+    relogio = RelogioFalso()
+    limitador = LimitadorPorHost(2.0, por_host={"arquivos": 10.0}, relogio=relogio, dormir=relogio.dormir)
+
+    for _ in range(3):
+        limitador.aguardar("https://api/gazettes")
+    limitador.aguardar("https://arquivos/a.pdf")
+    limitador.aguardar("https://arquivos/b.pdf")
+
+    assert relogio.esperas == [0.5, 1.0, 0.1]
+
+def test_window_is_sharded_after_each_watermark(marcas):
+    marcas.avancar("3550308", D(2024, 1, 20))
+
+    tarefas = dividir_tarefas(["3550308", "3304557"], D(2024, 1, 1), D(2024, 2, 10), marcas, dias_por_tarefa=31)
+
+    assert tarefas == [
+        Tarefa("3550308", D(2024, 1, 21), D(2024, 2, 10)),
+        Tarefa("3304557", D(2024, 1, 1), D(2024, 1, 31)),
+        Tarefa("3304557", D(2024, 2, 1), D(2024, 2, 10)),
+    ]
+
+def test_up_to_date_municipalities_produce_no_tasks(marcas):
+    marcas.avancar("3550308", D(2024, 3, 1))
+
+    assert dividir_tarefas(["3550308"], D(2024, 1, 1), D(2024, 3, 1), marcas) == []
+
+def test_recent_days_before_the_watermark_are_scanned_again(marcas):
+    marcas.avancar("3550308", D(2024, 3, 1))
+
+    tarefas = dividir_tarefas(["3550308"], D(2024, 1, 1), D(2024, 3, 1), marcas, dias_revisao=7)
+
+    assert tarefas == [Tarefa("3550308", D(2024, 2, 24), D(2024, 3, 1))]
+
+def test_task_results_are_streamed_to_the_consumer():
+    lidos = []
+
+    class ClientePaginado:
+        def buscar_diarios_por_municipio_e_data(self, municipio, inicio, fim, ignorar_falhas=True):
+            for pagina in range(3):
+                lidos.append(pagina)
+                yield {"url": f"https://qd/{municipio}/{pagina}.pdf"}
+
+    def ao_concluir(tarefa, diarios):
+        # Só a primeira página foi lida pelo pool; as demais são lidas sob demanda
+        assert lidos == [0]
+        assert next(diarios)["url"] == "https://qd/A/0.pdf"
+        assert list(diarios) and lidos == [0, 1, 2]
+
+    totais = executar_tarefas(ClientePaginado(), [Tarefa("A", D(2024, 1, 1), D(2024, 1, 2))], ao_concluir)
+
+    assert totais == {"concluidas": 1, "erros": 0, "diarios": 3}
+
+def test_watermark_stops_at_the_first_failed_task(marcas):
+    tarefas = dividir_tarefas(["A", "B"], D(2024, 1, 1), D(2024, 1, 9), dias_por_tarefa=3)
+    cliente = ClienteFalso(falhas={("A", "2024-01-04")})
+    recebidos = []
+
+    totais = executar_tarefas(cliente, tarefas, lambda t, d: recebidos.extend(d), marcas, workers=3)
+
+    assert totais == {"concluidas": 5, "erros": 1, "diarios": 15}
+    assert marcas.obter("A") == D(2024, 1, 3)
+    assert marcas.obter("B") == D(2024, 1, 9)
+    assert dividir_tarefas(["A", "B"], D(2024, 1, 1), D(2024, 1, 9), marcas, dias_por_tarefa=3) == [
+        Tarefa("A", D(2024, 1, 4), D(2024, 1, 6)), Tarefa("A", D(2024, 1, 7), D(2024, 1, 9)),
+    ]
+
+def test_processing_failure_does_not_advance_the_watermark(marcas):
+    def ao_concluir(tarefa, diarios):
+        raise RuntimeError("1 diário(s) com erro")
+
+    executar_tarefas(ClienteFalso(), [Tarefa("A", D(2024, 1, 1), D(2024, 1, 2))], ao_concluir, marcas)
+
+    assert marcas.obter("A") is None
+
+class RespostaFalsa:
+    def __init__(self, status, corpo=None, headers=None):
+        self.status_code = status
+        self.corpo = corpo
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+    def json(self):
+        return self.corpo
+
+def test_client_retries_rate_limited_and_server_errors(monkeypatch):
+    respostas = [RespostaFalsa(429, headers={"Retry-After": "0"}), RespostaFalsa(503),
+                 RespostaFalsa(200, {"results": [{"id": 1}], "total_gazettes": 1})]
+    with QueridoDiarioClient("https://qd", "chave", espera_base=0) as client:
+        monkeypatch.setattr(client.session, "get", lambda *a, **k: respostas.pop(0))
+
+        assert list(client.buscar_diarios_por_municipio_e_data("A", "2024-01-01", ignorar_falhas=False)) == [{"id": 1}]
+
+def test_client_does_not_retry_client_errors_and_reports_failure(monkeypatch):
+    chamadas = []
+
+    def get(*args, **kwargs):
+        chamadas.append(args)
+        return RespostaFalsa(404)
+
+    with QueridoDiarioClient("https://qd", "chave", espera_base=0) as client:
+        monkeypatch.setattr(client.session, "get", get)
+
+        with pytest.raises(FalhaConsulta):
+            list(client.buscar_diarios_por_municipio_e_data("A", "2024-01-01", ignorar_falhas=False))
+    assert len(chamadas) == 1
@@ -0,0 +1,51 @@
+import sqlite3
+from datetime import datetime
+import pytest
+from armazenamento_sumulas import abrir_banco, hash_sumula, sincronizar_sumulas
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = abrir_banco(str(tmp_path / "conteudo_juridico.db"))
+    yield conn
+    conn.close()
+
+def datas(conn):
+    return dict(conn.execute("SELECT numero, data_atualizacao FROM sumulas_vinculantes"))
+
+def test_database_uses_wal(conn):
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_only_new_or_changed_sumulas_are_rewritten(conn):
+    primeira = [("1", "Texto da SV 1.", datetime(2024, 1, 1)), ("2", "Texto da SV 2.", datetime(2024, 1, 1))]
+    assert [(s.numero, s.nova) for s in sincronizar_sumulas(conn, primeira)] == [("1", True), ("2", True)]
+
+    segunda = [("1", "Texto  da SV\n1.", datetime(2024, 2, 1)), ("2", "Texto revisado da SV 2.", datetime(2024, 2, 1)),
+               ("3", "Texto da SV 3.", datetime(2024, 2, 1))]
+    alteradas = sincronizar_sumulas(conn, segunda)
+
+    assert [(s.numero, s.nova) for s in alteradas] == [("2", False), ("3", True)]
+    assert alteradas[0].hash_conteudo == hash_sumula("Texto revisado da SV 2.")
+    assert datas(conn) == {"1": "2024-01-01 00:00:00", "2": "2024-02-01 00:00:00", "3": "2024-02-01 00:00:00"}
+
+def test_unchanged_run_writes_nothing(conn):
+    sumulas = [("1", "Texto da SV 1.", datetime(2024, 1, 1))]
+    sincronizar_sumulas(conn, sumulas)
+    mudancas = conn.total_changes
+
+    assert sincronizar_sumulas(conn, sumulas) == []
+    assert conn.total_changes == mudancas
+
+def test_legacy_database_gains_hash_column(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    antigo = sqlite3.connect(caminho)
+    antigo.execute("CREATE TABLE sumulas_vinculantes (numero TEXT PRIMARY KEY, texto TEXT, data_atualizacao DATETIME)")
+    antigo.execute("INSERT INTO sumulas_vinculantes VALUES ('1', 'Texto da SV 1.', '2023-01-01')")
+    antigo.commit()
+    antigo.close()
+
+    conn = abrir_banco(caminho)
+    alteradas = sincronizar_sumulas(conn, [("1", "Texto da SV 1.", datetime(2024, 1, 1))])
+
+    assert [(s.numero, s.nova) for s in alteradas] == [("1", False)]
+    assert sincronizar_sumulas(conn, [("1", "Texto da SV 1.", datetime(2024, 2, 1))]) == []
+    conn.close()
@@ -0,0 +1,185 @@
+import asyncio
+import time
+import pytest
+import batch_analysis
+from batch_analysis import BatchAnalysisManager, render_process_text
+from llm_analysis import LLMAnalyzer, RateLimitedBackend, RateLimiter, StubBackend
+
+class FakeElasticsearch:
+    """Local stand-in recording mget/search/bulk calls."""
+    def __init__(self, documents):
+        self.documents = documents
+        self.bulk_calls = []
+
+    def mget(self, index, ids):
+        return {"docs": [
+            {"_id": i, "found": i in self.documents, "_source": self.documents.get(i)} for i in ids
+        ]}
+
+    def count(self, index, body):
+        return {"count": len(self.documents)}
+
+    def search(self, index, body):
+        ids = sorted(self.documents)
+        start = body.get("search_after", [-1])[0] + 1
+        page = ids[start:start + body["size"]]
+        return {"hits": {"hits": [
+            {"_id": i, "_source": self.documents[i], "sort": [start + n]} for n, i in enumerate(page)
+        ]}}
+
+    def bulk(self, operations):
+        self.bulk_calls.append(operations)
+        return {"errors": False, "items": []}
+
+def make_documents(n):
+    return {
+        f"proc{i}": {"numeroProcesso": f"proc{i}", "classe": {"nome": "Apelação"}, "movimentos": [{"nome": "Sentença", "dataHora": "2024-01-01"}]}
+        for i in range(n)
+    }
+
+def run_job(manager, **kwargs):
+    async def run():
+        job = manager.submit("resuma", "model", **kwargs)
+        await job.task
+        return job
+    return asyncio.run(run())
+
+def test_render_process_text_includes_metadata_and_movements():
+    text = render_process_text({
+        "numeroProcesso": "123",
+        "classe": {"nome": "Apelação"},
+        "assuntos": [{"nome": "Dano Moral"}],
+        "movimentos": [{"nome": "Sentença", "dataHora": "2024-02-01"}, {"nome": "Distribuição", "dataHora": "2024-01-01"}],
+    })
+    assert "Classe: Apelação" in text
+    assert "Assuntos: Dano Moral" in text
+    assert text.index("Distribuição") < text.index("Sentença")
+
+def test_job_by_ids_persists_results_on_process_documents():
+    es = FakeElasticsearch(make_documents(3))
+    manager = BatchAnalysisManager(LLMAnalyzer(StubBackend()), es, "cnj_processes", workers=2)
+
+    job = run_job(manager, numeros_processo=["proc0", "proc1", "proc1", "missing"])
+
+    status = job.to_dict()
+    assert status["status"] == "completed"
+    assert status["total"] == 3
+    assert status["processed"] == 3
+    assert status["succeeded"] == 2
+    assert status["failed"] == 1
+    assert status["errors"][0]["numeroProcesso"] == "missing"
+    operations = [op for call in es.bulk_calls for op in call]
+    assert {"update": {"_index": "cnj_processes", "_id": "proc0"}} in operations
+    assert all("ai_analysis" in op["doc"] for op in operations[1::2])
+
+def test_job_by_query_writes_to_side_index():
+    es = FakeElasticsearch(make_documents(7))
+    manager = BatchAnalysisManager(LLMAnalyzer(StubBackend()), es, "cnj_processes", result_index="ai_results")
+
+    job = run_job(manager, es_query={"match_all": {}}, max_documents=5)
+
+    assert job.status == "completed"
+    assert job.total == 5
+    assert job.succeeded == 5
+    operations = [op for call in es.bulk_calls for op in call]
+    assert operations[0] == {"index": {"_index": "ai_results", "_id": operations[1]["numeroProcesso"]}}
+
+class FlakyElasticsearch(FakeElasticsearch):
+    """Fails the first `failures` bulk requests and rejects the items listed in `rejected`."""
+    def __init__(self, documents, failures=0, rejected=()):
+        super().__init__(documents)
+        self.failures = failures
+        self.rejected = set(rejected)
+
+    def bulk(self, operations):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("bulk unavailable")
+        self.bulk_calls.append(operations)
+        items = [
+            {"update": {"_id": op["update"]["_id"], **({"error": "rejected"} if op["update"]["_id"] in self.rejected else {})}}
+            for op in operations[0::2]
+        ]
+        return {"errors": bool(self.rejected), "items": items}
+
+def persisted_ids(es):
+    return sorted(op["update"]["_id"] for call in es.bulk_calls for op in call[0::2])
+
+def test_results_of_a_failed_bulk_request_are_retried(monkeypatch):
+    monkeypatch.setattr(batch_analysis, "PERSIST_BATCH_SIZE", 2)
+    es = FlakyElasticsearch(make_documents(5), failures=1)
+    manager = BatchAnalysisManager(LLMAnalyzer(StubBackend()), es, "cnj_processes", workers=1)
+
+    job = run_job(manager, numeros_processo=[f"proc{i}" for i in range(5)])
+
+    assert job.status == "completed"
+    assert job.succeeded == 5 and job.failed == 0
+    assert persisted_ids(es) == [f"proc{i}" for i in range(5)]
+
+def test_bulk_item_errors_are_attributed_to_their_process():
+    es = FlakyElasticsearch(make_documents(3), rejected={"proc1"})
+    manager = BatchAnalysisManager(LLMAnalyzer(StubBackend()), es, "cnj_processes")
+
+    job = run_job(manager, numeros_processo=["proc0", "proc1", "proc2"])
+
+    assert job.succeeded == 2 and job.failed == 1
+    assert job.errors == [{"numeroProcesso": "proc1", "error": "rejected"}]
+
+def test_analyses_are_flushed_when_the_job_fails(monkeypatch):
+    class FailingSearch(FakeElasticsearch):
+        def search(self, index, body):
+            if "search_after" in body:
+                time.sleep(0.1) # Lets the workers analyze the first page
+                raise ConnectionError("search unavailable")
+            return super().search(index, body)
+
+    monkeypatch.setattr(batch_analysis, "FETCH_BATCH_SIZE", 2)
+    es = FailingSearch(make_documents(4))
+    manager = BatchAnalysisManager(LLMAnalyzer(StubBackend()), es, "cnj_processes")
+
+    job = run_job(manager, es_query={"match_all": {}})
+
+    assert job.status == "failed"
+    assert persisted_ids(es) == ["proc0", "proc1"]
+    assert job.succeeded == 2
+
+def test_finished_jobs_are_evicted(monkeypatch):
+    monkeypatch.setattr(batch_analysis, "MAX_FINISHED_JOBS_KEPT", 2)
+    manager = BatchAnalysisManager(LLMAnalyzer(StubBackend()), FakeElasticsearch(make_documents(1)), "cnj_processes")
+
+    jobs = [run_job(manager, numeros_processo=["proc0"]) for _ in range(4)]
+
+    assert list(manager.jobs) == [jobs[2].id, jobs[3].id]
+
+def test_submit_requires_ids_or_query():
+    manager = BatchAnalysisManager(LLMAnalyzer(StubBackend()), FakeElasticsearch({}), "cnj_processes")
+    with pytest.raises(ValueError):
+        manager.submit("resuma", "model")
+
+def test_rate_limiter_waits_for_request_budget():
+    now = [0.0]
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    limiter = RateLimiter(requests_per_minute=2, clock=lambda: now[0], sleep=sleep)
+
+    for _ in range(3):
+        limiter.acquire()
+
+    assert sleeps == [pytest.approx(30.0)]
+
+def test_rate_limited_backend_charges_estimated_tokens():
+    now = [0.0]
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    limiter = RateLimiter(tokens_per_minute=600, clock=lambda: now[0], sleep=sleep)
+    backend = RateLimitedBackend(StubBackend(), limiter)
+
+    backend.complete("", "x" * 400, "model", 0.7, 200) # 100 prompt tokens + 200 completion tokens
+    backend.complete("", "x" * 400, "model", 0.7, 200)
+    assert sleeps == []
+    backend.complete("", "x" * 400, "model", 0.7, 200)
+    assert sleeps == [pytest.approx(30.0)]
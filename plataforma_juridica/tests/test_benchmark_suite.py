@@ -0,0 +1,39 @@
+import pytest
+from pypdf import PdfReader
+from benchmarks import run_benchmarks, synthetic_data
+
+def test_synthetic_pdf_is_readable_and_dense_with_citations(tmp_path):
+    path = synthetic_data.gerar_pdf_juridico(str(tmp_path / "processo.pdf"), paginas=2)
+
+    reader = PdfReader(path)
+    text = reader.pages[0].extract_text()
+
+    assert len(reader.pages) == 2
+    assert "nº" in text or "Código" in text or "art" in text.lower()
+
+def test_synthetic_fixtures_are_deterministic():
+    assert synthetic_data.gerar_texto_juridico(5) == synthetic_data.gerar_texto_juridico(5)
+    documents = synthetic_data.gerar_documentos_datajud(3)
+    assert documents == synthetic_data.gerar_documentos_datajud(3)
+    assert all(parte["advogados"] for doc in documents for parte in doc["partes"])
+
+def test_every_benchmark_runs_at_small_scale():
+    results = run_benchmarks.run_benchmarks(repeat=1, scale=0.02)
+
+    assert set(results) == set(run_benchmarks.BENCHMARKS)
+    assert all(result["median_s"] > 0 for result in results.values())
+
+def test_compare_flags_only_slowdowns_beyond_tolerance():
+    baseline = {"results": {
+        "fast": {"median_s": 1.0, "scale": 1.0},
+        "slow": {"median_s": 1.0, "scale": 1.0},
+        "other_scale": {"median_s": 1.0, "scale": 2.0},
+    }}
+    results = {
+        "fast": {"median_s": 1.2, "scale": 1.0},
+        "slow": {"median_s": 1.5, "scale": 1.0},
+        "other_scale": {"median_s": 9.0, "scale": 1.0},
+        "new": {"median_s": 9.0, "scale": 1.0},
+    }
+
+    assert run_benchmarks.compare(results, baseline, tolerance=0.3) == [("slow", 1.5, 1.0)]
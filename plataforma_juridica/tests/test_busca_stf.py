@@ -0,0 +1,129 @@
+import os
+import threading
+from contextlib import closing
+import pytest
+import requests
+import busca_stf
+from armazenamento_sumulas import abrir_banco
+from busca_stf import ClienteBuscaStf, SessaoGravada, carregar_no_banco, carregar_requisicao
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "busca_stf")
+
+@pytest.fixture
+def requisicao():
+    return carregar_requisicao(os.path.join(FIXTURES, "requisicao.json"))
+
+def cliente_offline(requisicao, **kwargs):
+    return ClienteBuscaStf(requisicao, tamanho_pagina=2, sessao=SessaoGravada(FIXTURES), obter_cookies=None, **kwargs)
+
+class SessaoBloqueada(SessaoGravada):
+    """Recusa com 403 até receber o cookie do navegador."""
+
+    def __init__(self, diretorio):
+        super().__init__(diretorio)
+        self.posts = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        with self._lock:
+            self.posts += 1
+        if self.cookies.get("aws-waf-token") != "ok":
+            resposta = requests.Response()
+            resposta.status_code = 403
+            resposta._content = b"{}"
+            return resposta
+        return super().post(url, json=json, headers=headers, timeout=timeout)
+
+def test_captured_request_drops_session_headers(requisicao):
+    assert requisicao["url"] == "https://jurisprudencia.stf.jus.br/pages/search"
+    assert "Cookie" not in requisicao["headers"]
+    assert requisicao["corpo"]["query"]["bool"]["filter"][0] == {"term": {"base": "sumulas"}}
+
+def test_all_pages_are_replayed_in_order(requisicao):
+    with cliente_offline(requisicao) as cliente:
+        sumulas = list(cliente.sumulas())
+
+    assert [numero for numero, _, _ in sumulas] == ["1", "2", "3", "4", "5"]
+    assert sumulas[2][1] == "Nos processos perante o Tribunal de Contas da União asseguram-se o contraditório e a ampla defesa."
+
+def test_browser_is_used_only_to_refresh_cookies(requisicao):
+    chamadas = []
+
+    def obter_cookies():
+        chamadas.append(1)
+        return [{"name": "aws-waf-token", "value": "ok", "domain": "jurisprudencia.stf.jus.br", "path": "/"}]
+
+    sessao = SessaoBloqueada(FIXTURES)
+    with ClienteBuscaStf(requisicao, tamanho_pagina=2, sessao=sessao, obter_cookies=obter_cookies) as cliente:
+        assert len(list(cliente.resultados())) == 5
+
+    assert chamadas == [1]
+    assert sessao.posts == 4
+
+class SessaoExpirando(SessaoGravada):
+    """Aceita a primeira página e recusa as demais até o cookie ser renovado."""
+
+    def __init__(self, diretorio):
+        super().__init__(diretorio)
+        self.cookies.set("aws-waf-token", "expirado", domain="jurisprudencia.stf.jus.br", path="/")
+        self.posts = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        with self._lock:
+            self.posts += 1
+            primeira = self.posts == 1
+        if not primeira and self.cookies.get("aws-waf-token") != "ok":
+            resposta = requests.Response()
+            resposta.status_code = 403
+            resposta._content = b"{}"
+            return resposta
+        return super().post(url, json=json, headers=headers, timeout=timeout)
+
+def test_cookies_expiring_mid_search_are_renewed_on_the_caller_thread(requisicao):
+    threads = []
+
+    def obter_cookies():
+        threads.append(threading.current_thread())
+        return [{"name": "aws-waf-token", "value": "ok", "domain": "jurisprudencia.stf.jus.br", "path": "/"}]
+
+    with ClienteBuscaStf(requisicao, tamanho_pagina=2, sessao=SessaoExpirando(FIXTURES), obter_cookies=obter_cookies) as cliente:
+        resultados = list(cliente.resultados())
+
+    assert len(resultados) == 5
+    assert threads == [threading.current_thread()]
+
+def test_refused_session_without_browser_raises(requisicao):
+    with ClienteBuscaStf(requisicao, sessao=SessaoBloqueada(FIXTURES), obter_cookies=None) as cliente:
+        with pytest.raises(requests.exceptions.HTTPError):
+            list(cliente.resultados())
+
+def test_recorded_responses_can_be_replayed(requisicao, tmp_path):
+    with cliente_offline(requisicao, gravar_em=str(tmp_path)) as cliente:
+        original = list(cliente.resultados())
+
+    with ClienteBuscaStf(requisicao, tamanho_pagina=2, sessao=SessaoGravada(str(tmp_path)), obter_cookies=None) as cliente:
+        assert list(cliente.resultados()) == original
+    assert len(os.listdir(tmp_path)) == 3
+
+def test_results_are_loaded_into_the_sumulas_store(requisicao, tmp_path):
+    with cliente_offline(requisicao) as cliente, closing(abrir_banco(str(tmp_path / "sumulas.db"))) as conn:
+        alteradas = carregar_no_banco(cliente, conn)
+        novamente = carregar_no_banco(cliente, conn)
+
+    assert [s.numero for s in alteradas] == ["1", "2", "3", "4", "5"]
+    assert novamente == []
+
+@pytest.mark.parametrize("fonte, esperado", [
+    ({"numero": 13, "is_vinculante": True, "texto": "A nomeação de cônjuge..."}, ("13", "A nomeação de cônjuge...")),
+    ({"titulo": "Súmula Vinculante 7", "enunciado": "  Texto\n com quebras "}, ("7", "Texto com quebras")),
+    ({"titulo": "Súmula Vinculante", "texto": "x"}, None),
+    ({"titulo": "Súmula Vinculante 8"}, None),
+    ({"titulo": "Súmula 13", "texto": "Súmula comum com o mesmo número de uma vinculante."}, None),
+    ({"titulo": "Súmula 13", "is_vinculante": False, "numero": 13, "texto": "x"}, None),
+    ({"numero": 13, "texto": "Sem indicação de que é vinculante."}, None),
+])
+def test_mapear_sumula(fonte, esperado):
+    resultado = busca_stf.mapear_sumula(fonte, data="d")
+
+    assert (resultado[:2] if resultado else None) == esperado
@@ -0,0 +1,56 @@
+import os
+import pytest
+import extracao_pdf
+from cache_texto_pdf import CacheTextoPdf, hash_arquivo
+from benchmarks import synthetic_data
+
+@pytest.fixture
+def pdf(tmp_path):
+    return synthetic_data.gerar_pdf_juridico(str(tmp_path / "processo.pdf"), paginas=3)
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheTextoPdf(str(tmp_path / "cache"), compressao="gzip")
+
+def test_round_trip_preserves_page_texts(cache):
+    paginas = ["Art. 5º da CF", "", "Súmula nº 7 — ação"]
+
+    cache.gravar("ab" * 32, "pypdf-5.0-v1", paginas)
+
+    assert cache.obter("ab" * 32, "pypdf-5.0-v1") == paginas
+    assert cache.obter("ab" * 32, "pdfium-4.0-v1") is None
+
+def test_second_read_does_not_reopen_the_pdf(pdf, cache, monkeypatch):
+    primeira = extracao_pdf.extrair_texto(pdf, backend="pypdf", workers=1, cache=cache)
+
+    def falhar(*args):
+        raise AssertionError("o PDF não deveria ser reaberto")
+    monkeypatch.setattr(extracao_pdf.BackendPypdf, "contar_paginas", falhar)
+    monkeypatch.setattr(extracao_pdf.BackendPypdf, "extrair_paginas", falhar)
+
+    assert extracao_pdf.extrair_texto(pdf, backend="pypdf", workers=1, cache=cache) == primeira
+
+def test_key_is_content_not_path(pdf, tmp_path):
+    copia = tmp_path / "copia.pdf"
+    copia.write_bytes(open(pdf, "rb").read())
+
+    assert hash_arquivo(pdf) == hash_arquivo(str(copia))
+
+def test_partial_iteration_is_not_cached(pdf, cache):
+    for _ in extracao_pdf.iterar_paginas(pdf, backend="pypdf", workers=1, cache=cache):
+        break
+
+    versao = extracao_pdf.versao_extrator(extracao_pdf.obter_backend("pypdf"))
+    assert cache.obter(hash_arquivo(pdf), versao) is None
+
+def test_corrupted_entry_is_treated_as_miss(cache):
+    caminho = cache.gravar("cd" * 32, "pypdf-5.0-v1", ["texto"])
+    with open(caminho, "wb") as f:
+        f.write(b"truncado")
+
+    assert cache.obter("cd" * 32, "pypdf-5.0-v1") is None
+
+def test_writes_leave_no_temporary_files(cache):
+    caminho = cache.gravar("ef" * 32, "pypdf-5.0-v1", ["texto"])
+
+    assert os.listdir(os.path.dirname(caminho)) == [os.path.basename(caminho)]
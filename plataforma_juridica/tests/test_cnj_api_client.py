@@ -6,6 +6,7 @@ import logging # Import logging
 
 # Ensure logging is set up for tests
 import logging_config
+import metrics
 
 @pytest.fixture
 def cnj_client():
@@ -73,4 +74,11 @@ def test_search_generic_request_error(cnj_client, requests_mock, caplog_fixture)
     response = cnj_client.search("api_publica_tjsp/_search", query)
     assert response is None
     assert "An unexpected error occurred during CNJ API call" in caplog_fixture.text
-    assert caplog_fixture.records[0].levelname == "ERROR"
\ No newline at end of file
+    assert caplog_fixture.records[0].levelname == "ERROR"
+
+def test_http_errors_are_timed_as_errors(cnj_client, requests_mock):
+    requests_mock.post(f"{cnj_client.BASE_URL}api_publica_tjsp/_search", status_code=503)
+    before = metrics.HTTP_CLIENT_SECONDS.count(upstream="cnj", outcome="error")
+
+    assert cnj_client.search("api_publica_tjsp/_search", {"query": {"match_all": {}}}) is None
+    assert metrics.HTTP_CLIENT_SECONDS.count(upstream="cnj", outcome="error") == before + 1
@@ -0,0 +1,92 @@
+import pytest
+from entity_resolution import EntityResolver, migrate_name_keyed_parties, name_tokens, normalize_document, normalize_name
+
+@pytest.fixture
+def resolver():
+    resolver = EntityResolver(":memory:")
+    yield resolver
+    resolver.close()
+
+@pytest.mark.parametrize("name", ["BANCO DO BRASIL S.A.", "Banco do Brasil SA", "Banco do Brasil S/A", "banco do brasil s. a."])
+def test_normalize_name_canonicalizes_company_suffixes(name):
+    assert normalize_name(name) == "BANCO DO BRASIL SA"
+
+def test_name_tokens_ignore_accents_order_and_stopwords():
+    assert name_tokens("Silva, José da") == name_tokens("JOSE DA SILVA") == ["JOSE", "SILVA"]
+
+@pytest.mark.parametrize("document, expected", [
+    ("111.222.333-44", "11122233344"),
+    ("00.000.000/0001-91", "00000000000191"),
+    ("***.222.333-**", None),
+    ("123", None),
+    (None, None),
+])
+def test_normalize_document(document, expected):
+    assert normalize_document(document) == expected
+
+def test_name_variants_resolve_to_the_same_entity(resolver):
+    first = resolver.resolve("BANCO DO BRASIL S.A.", "JURIDICA")
+
+    assert resolver.resolve("Banco do Brasil SA", "JURIDICA") == first
+
+def test_company_branches_share_the_cnpj_root(resolver):
+    matriz = resolver.resolve("Banco do Brasil SA", "JURIDICA", "00.000.000/0001-91")
+    filial = resolver.resolve("Banco do Brasil SA - Agência Centro", "JURIDICA", "00.000.000/1234-56")
+
+    assert matriz == filial == "PJ-00000000"
+
+def test_homonyms_with_different_documents_stay_apart(resolver):
+    first = resolver.resolve("José da Silva", "FISICA", "111.222.333-44")
+    second = resolver.resolve("JOSE DA SILVA", "FISICA", "555.666.777-88")
+
+    assert first != second
+
+def test_mention_without_document_is_never_attached_by_name_alone(resolver):
+    documented = resolver.resolve("Maria Souza", "FISICA", "111.222.333-44")
+
+    undocumented = resolver.resolve("MARIA SOUZA", "FISICA")
+
+    assert undocumented != documented
+    assert resolver.candidates("Maria  Souza", "FISICA") == {documented, undocumented}
+
+def test_person_types_are_blocked_separately(resolver):
+    assert resolver.resolve("Silva", "FISICA") != resolver.resolve("Silva", "JURIDICA")
+
+def test_ids_do_not_depend_on_what_was_seen_before(tmp_path):
+    path = str(tmp_path / "entities.sqlite")
+    with EntityResolver(path) as resolver:
+        first = resolver.resolve("Maria Souza", "FISICA")
+        resolver.resolve("Maria Souza", "FISICA", "111.222.333-44")
+        resolver.resolve("Maria Souza", "FISICA", "555.666.777-88")
+
+    with EntityResolver(path) as resolver:
+        assert resolver.resolve("MARIA SOUZA", "FISICA") == first
+    assert EntityResolver(":memory:").resolve("Maria Souza", "FISICA") == first
+
+def test_parties_without_name_or_document_are_not_resolved(resolver):
+    assert resolver.resolve("", "FISICA") is None
+
+def test_legacy_name_keyed_parties_are_migrated_in_batches(resolver):
+    legacy = {
+        "PessoaFisica": [{"node": "4:a:1", "nome": "José da Silva", "documento": None},
+                         {"node": "4:a:2", "nome": "SILVA, JOSE", "documento": None},
+                         {"node": "4:a:3", "nome": None, "documento": None}],
+        "PessoaJuridica": [{"node": "4:a:4", "nome": "Banco do Brasil S.A.", "documento": "00.000.000/0001-91"}],
+    }
+    migrated_rows = []
+
+    def run_query(query, parameters=None):
+        label = "PessoaFisica" if "PessoaFisica" in query else "PessoaJuridica"
+        if "RETURN elementId(p)" in query:
+            pending = [r for r in legacy[label] if r["node"] not in {m["node"] for m in migrated_rows}]
+            return pending[parameters["skip"]:parameters["skip"] + parameters["limit"]]
+        migrated_rows.extend(parameters["rows"])
+        return []
+
+    migrated = migrate_name_keyed_parties(run_query, resolver, batch_size=2)
+
+    assert migrated == 3
+    ids = {row["node"]: row["id"] for row in migrated_rows}
+    assert ids["4:a:1"] == ids["4:a:2"] == resolver.resolve("Jose Silva", "FISICA")
+    assert ids["4:a:4"] == "PJ-00000000"
+    assert "4:a:3" not in ids
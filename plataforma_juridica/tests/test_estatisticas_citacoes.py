@@ -0,0 +1,156 @@
+import estatisticas_citacoes
+from estatisticas_citacoes import atualizar_estatisticas, propriedade_ano
+
+class FakeGraph:
+    """Responde às consultas do job a partir de uma lista de (documento, ano, rótulo, id, count)."""
+
+    def __init__(self, citacoes, desde=None, alterados=("novo.pdf",)):
+        self.citacoes = citacoes
+        self.desde = desde
+        self.alterados = alterados
+        self.removidas = {}
+        self.queries = []
+        self.propriedades = {}
+        self.cocitacoes = {}
+
+    def __call__(self, query, parameters=None):
+        parameters = parameters or {}
+        self.queries.append((query, parameters))
+        if query == estatisticas_citacoes.CONSULTA_MARCA:
+            return [{"desde": self.desde, "agora": "T2"}]
+        if query == estatisticas_citacoes.TODOS_DOCUMENTOS:
+            return [{"nome": d} for d in sorted({c[0] for c in self.citacoes})]
+        if query == estatisticas_citacoes.DOCUMENTOS_ALTERADOS:
+            return [{"nome": nome} for nome in self.alterados]
+        if query == estatisticas_citacoes.NOS_CITADOS:
+            chaves = {f"{c[2]}:{c[3]}" for c in self.citacoes if c[0] in parameters["nomes"]}
+            for nome in parameters["nomes"]:
+                chaves.update(self.removidas.get(nome, []))
+            return [{"chave": chave} for chave in sorted(chaves)]
+        if "AS propriedades" in query:
+            return [
+                {"id": i, "propriedades": [p for p in self.propriedades[i] if p.startswith("citacoes_")]}
+                for i in parameters["ids"] if i in self.propriedades
+            ]
+        if "RETURN n.id AS id, d.ano AS ano" in query:
+            por_ano = {}
+            for doc, ano, _, id_no, count in self.citacoes:
+                if id_no in parameters["ids"]:
+                    linha = por_ano.setdefault((id_no, ano), {"id": id_no, "ano": ano, "documentos": 0, "total": 0})
+                    linha["documentos"] += 1
+                    linha["total"] += count
+            return list(por_ano.values())
+        if "SET n += l.propriedades" in query:
+            for linha in parameters["linhas"]:
+                atuais = self.propriedades.setdefault(linha["id"], {})
+                atuais.update(linha["propriedades"])
+                for nome, valor in linha["propriedades"].items():
+                    if valor is None:
+                        del atuais[nome]
+        if "RETURN n.id AS id, pares" in query:
+            return [{"id": i, "pares": self._pares(i, parameters["k"])} for i in parameters["ids"]]
+        if "DELETE c" in query:
+            for i in parameters["ids"]:
+                self.cocitacoes.pop(i, None)
+        if "CREATE (a)-[:CO_CITADO_COM" in query:
+            for p in parameters["pares"]:
+                self.cocitacoes.setdefault(p["origem"], []).append((p["alvo"], p["peso"]))
+        return []
+
+    def _pares(self, id_no, k):
+        documentos = {c[0] for c in self.citacoes if c[3] == id_no}
+        pesos = {}
+        for doc, _, rotulo, outro, _ in self.citacoes:
+            if doc in documentos and outro != id_no:
+                pesos[(rotulo, outro)] = pesos.get((rotulo, outro), 0) + 1
+        ordenados = sorted(pesos.items(), key=lambda item: (-item[1], item[0][1]))
+        return [{"rotulo": r, "id": i, "peso": p} for (r, i), p in ordenados[:k]]
+
+CITACOES = [
+    ("a.pdf", 2023, "Sumula", "Súmula Vinculante 13", 2),
+    ("a.pdf", 2023, "Lei", "Lei nº 8.429/1992", 1),
+    ("b.pdf", 2024, "Sumula", "Súmula Vinculante 13", 3),
+    ("b.pdf", 2024, "Lei", "Lei nº 8.429/1992", 1),
+    ("b.pdf", 2024, "Artigo", "Art. 37", 1),
+    ("novo.pdf", 2024, "Artigo", "Art. 37", 4),
+]
+
+def test_first_run_materializes_totals_and_yearly_counts():
+    grafo = FakeGraph(CITACOES)
+
+    recalculados = atualizar_estatisticas(grafo)
+
+    assert recalculados == 3
+    assert grafo.propriedades["Súmula Vinculante 13"] == {
+        "total_citacoes": 5, "documentos_citantes": 2, "citacoes_2023": 2, "citacoes_2024": 3,
+    }
+    assert grafo.propriedades["Art. 37"]["citacoes_2024"] == 5
+    assert grafo.queries[-1] == (estatisticas_citacoes.AVANCAR_MARCA, {"ate": "T2"})
+
+def test_yearly_properties_are_indexed():
+    grafo = FakeGraph(CITACOES)
+
+    atualizar_estatisticas(grafo)
+
+    indices = [q for q, _ in grafo.queries if q.startswith("CREATE INDEX sumula_")]
+    assert any("ON (n.citacoes_2023)" in q for q in indices)
+    assert any("ON (n.total_citacoes)" in q for q in indices)
+
+def test_co_citations_keep_the_top_k_heaviest_pairs():
+    grafo = FakeGraph(CITACOES)
+
+    atualizar_estatisticas(grafo, k=1)
+
+    assert grafo.cocitacoes["Súmula Vinculante 13"] == [("Lei nº 8.429/1992", 2)]
+    assert all(len(pares) == 1 for pares in grafo.cocitacoes.values())
+
+def test_incremental_run_recomputes_only_nodes_cited_by_changed_documents():
+    grafo = FakeGraph(CITACOES, desde="T1")
+
+    recalculados = atualizar_estatisticas(grafo)
+
+    assert recalculados == 1
+    assert list(grafo.propriedades) == ["Art. 37"]
+    alterados = [p for q, p in grafo.queries if q == estatisticas_citacoes.DOCUMENTOS_ALTERADOS]
+    assert alterados == [{"desde": "T1", "ate": "T2", "margem": estatisticas_citacoes.MARGEM_MARCA_SEGUNDOS}]
+
+def test_watermark_window_overlaps_the_previous_run():
+    assert "$desde - duration({seconds: $margem})" in estatisticas_citacoes.DOCUMENTOS_ALTERADOS
+
+def test_citations_that_move_to_another_year_clear_the_old_year():
+    grafo = FakeGraph(CITACOES)
+    atualizar_estatisticas(grafo)
+
+    grafo.citacoes = [c if c[0] != "b.pdf" else (c[0], 2025) + c[2:] for c in CITACOES]
+    grafo.alterados = ("b.pdf",)
+    atualizar_estatisticas(grafo)
+
+    assert grafo.propriedades["Súmula Vinculante 13"] == {
+        "total_citacoes": 5, "documentos_citantes": 2, "citacoes_2023": 2, "citacoes_2025": 3,
+    }
+
+def test_nodes_a_document_stopped_citing_are_recomputed():
+    grafo = FakeGraph(CITACOES)
+    atualizar_estatisticas(grafo)
+
+    grafo.citacoes = [c for c in CITACOES if (c[0], c[3]) != ("b.pdf", "Lei nº 8.429/1992")]
+    grafo.removidas = {"b.pdf": ["Lei:Lei nº 8.429/1992"]}
+    grafo.alterados = ("b.pdf",)
+    atualizar_estatisticas(grafo)
+
+    assert grafo.propriedades["Lei nº 8.429/1992"] == {"total_citacoes": 1, "documentos_citantes": 1, "citacoes_2023": 1}
+    assert ("Art. 37", 1) not in grafo.cocitacoes["Lei nº 8.429/1992"]
+    assert all(alvo != "Lei nº 8.429/1992" for alvo, _ in grafo.cocitacoes["Art. 37"])
+
+def test_completo_ignores_the_watermark():
+    grafo = FakeGraph(CITACOES, desde="T1")
+
+    assert atualizar_estatisticas(grafo, completo=True) == 3
+
+def test_labels_that_are_not_identifiers_are_skipped():
+    grafo = FakeGraph([("a.pdf", 2024, "Lei`) DETACH DELETE (x", "x", 1)])
+
+    assert atualizar_estatisticas(grafo) == 0
+
+def test_propriedade_ano():
+    assert propriedade_ano("2024") == "citacoes_2024"
@@ -0,0 +1,103 @@
+import pytest
+import spacy
+import normalizacao
+from extracao_citacoes import MotorRegex, MotorSpacy, ReferenciaArtigo, janelas_candidatas, resolver_artigo
+from benchmarks import synthetic_data
+
+CASOS_DE_BORDA = [
+    "Nos termos do (art. 5º da CF/88), aplica-se a Lei nº 8.078/1990.",
+    "conforme\nartigo\n37\nda Constituição\nda República Federativa do Brasil",
+    "Súmula Vinculante nº 13; SV 14; súmula n. 7 do STJ e Código de Processo Civil",
+    "A parte pediu a anulação do leilão e a artificial divisão da CRFB",
+    "Decreto-Lei nº 4.657/1942 e Código de Defesa do Consumidor, art",
+    "",
+]
+
+# Casos em que o tokenizador do spaCy separa (ou não) pontuação colada ao número ou à sigla
+CASOS_DE_TOKENIZACAO = [
+    "art. 5º, art 12%, art 3°, art 7ª, art.5, art.: 5, art 12.5, art 12.a, art 12-A, art 12.)",
+    "Súmula 7/STJ, Súmula 7/2000, SV 14; súmula vinculante n. 13, SÚMULA 5, súmula n.º 7",
+    "«CF» \"CF\" CF, CF-88 CF/88. CF’ CFs cf crfb CRFB",
+    "Lei nº 8.078/1990-A, Lei nº 123/2000, Lei nº 1234/2000, lei n.º 8.078/90, Sub-Lei nº 1.000/2000",
+    "artigo\n37, artigo  37, Código\nCivil, CÓDIGO PENAL, Código Civil-, Constituição  Federal",
+    "art. 1.228. art. 1.228, art 5º. art 5º) art 5ºA art 5º/STJ art 5º% art 5º.. art 1.22 art 1.2345 art 1234",
+]
+
+@pytest.fixture(scope="module")
+def nlp():
+    return spacy.blank("pt")
+
+@pytest.mark.parametrize("texto", CASOS_DE_BORDA + [synthetic_data.gerar_texto_juridico(200)])
+def test_prefilter_finds_the_same_citations_as_full_tokenization(nlp, texto):
+    completo = list(MotorSpacy(nlp, prefiltro=False).citacoes(texto))
+    com_prefiltro = list(MotorSpacy(nlp, prefiltro=True).citacoes(texto))
+
+    assert com_prefiltro == completo
+
+def test_offsets_point_into_the_original_text(nlp):
+    texto = CASOS_DE_BORDA[0]
+
+    for citacao in MotorSpacy(nlp).citacoes(texto):
+        assert texto[citacao.inicio:citacao.fim] == citacao.texto
+
+def test_windows_skip_text_without_keywords():
+    texto = "O recorrente alegou que a parte contrária participou do leilão. " * 50 + "Art. 5 da CF"
+
+    janelas = janelas_candidatas(texto)
+
+    assert len(janelas) == 1
+    assert texto[janelas[0][0]:janelas[0][1]] == "Art. 5 da CF"
+
+def test_citations_are_reported_per_page(nlp):
+    paginas = ["Lei nº 8.078/1990", "sem citações", "Súmula 7"]
+
+    resultado = [(indice, citacao.regra) for indice, citacao in MotorSpacy(nlp).citacoes_por_pagina(paginas)]
+
+    assert resultado == [(0, "LEI"), (2, "SUMULA")]
+
+@pytest.mark.parametrize("texto", CASOS_DE_BORDA + CASOS_DE_TOKENIZACAO + [
+    synthetic_data.gerar_texto_juridico(100, seed=seed) for seed in range(3)
+] + [synthetic_data.gerar_decisao(20, seed=seed) for seed in range(3)])
+def test_regex_engine_matches_spacy_matcher(nlp, texto):
+    assert list(MotorRegex().citacoes(texto)) == list(MotorSpacy(nlp, prefiltro=False).citacoes(texto))
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 7, 300, 10_000])
+def test_streaming_over_chunks_matches_whole_text(tamanho_bloco):
+    texto = synthetic_data.gerar_texto_juridico(30)
+    blocos = (texto[i:i + tamanho_bloco] for i in range(0, len(texto), tamanho_bloco))
+
+    assert list(MotorRegex().citacoes_em_fluxo(blocos)) == list(MotorRegex().citacoes(texto))
+
+def test_regex_engine_reports_pages_like_spacy(nlp):
+    paginas = ["Lei nº 8.078/1990", "sem citações", "Súmula 7"]
+
+    assert list(MotorRegex().citacoes_por_pagina(paginas)) == list(MotorSpacy(nlp).citacoes_por_pagina(paginas))
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("art. 5º, inciso LV, da CF", ReferenciaArtigo("Constituição Federal de 1988", "Constituicao", "5", None, "LV")),
+    ("art. 5º, LV, da Constituição Federal",
+     ReferenciaArtigo("Constituição Federal de 1988", "Constituicao", "5", None, "LV")),
+    ("art. 186, CC", ReferenciaArtigo("Código Civil", "Codigo", "186")),
+    ("art. 927 do CPC", ReferenciaArtigo("Código de Processo Civil", "Codigo", "927")),
+    ("art. 1.228, § 1º, do Código Civil", ReferenciaArtigo("Código Civil", "Codigo", "1228", "1")),
+    ("artigo 37, parágrafo único, inciso II, da Constituição Federal",
+     ReferenciaArtigo("Constituição Federal de 1988", "Constituicao", "37", "único", "II")),
+    ("art. 6º da Lei nº 8.078/1990", ReferenciaArtigo("Lei nº 8.078/1990", "Lei", "6")),
+    ("art. 3º da Lei Complementar 123/2006", ReferenciaArtigo("Lei Complementar nº 123/2006", "Lei", "3")),
+    ("art. 14 CDC", ReferenciaArtigo("Código de Defesa do Consumidor", "Codigo", "14")),
+    ("art. 5 e seguintes", ReferenciaArtigo(None, None, "5")),
+    ("art. 3 da CFX", ReferenciaArtigo(None, None, "3")),
+])
+def test_resolver_artigo_links_article_to_its_diploma(texto, esperado):
+    citacao = next(c for c in MotorRegex().citacoes(texto) if c.regra == "ARTIGO")
+
+    assert resolver_artigo(texto, citacao) == esperado
+
+@pytest.mark.parametrize("texto, citacao_direta", [
+    ("art. 6º da Lei nº 8.078/90", "Lei nº 8.078/1990"),
+    ("art. 1º da Lei nº 13105/2015", "Lei nº 13.105/2015"),
+])
+def test_article_diploma_is_the_same_node_as_the_direct_law_citation(texto, citacao_direta):
+    citacao = next(c for c in MotorRegex().citacoes(texto) if c.regra == "ARTIGO")
+
+    assert resolver_artigo(texto, citacao).diploma == normalizacao.normalizar("LEI", citacao_direta)
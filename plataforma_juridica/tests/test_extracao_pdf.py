@@ -0,0 +1,61 @@
+import pytest
+import extracao_pdf
+from benchmarks import synthetic_data
+
+PAGINAS = [
+    ["Nos termos do art. 5º da Constituição Federal", "e da Lei nº 8.078/1990."],
+    [],
+    ["Súmula Vinculante nº 13 (nepotismo)."],
+]
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "decisao.pdf"
+    path.write_bytes(synthetic_data.construir_pdf(PAGINAS))
+    return str(path)
+
+@pytest.mark.parametrize("nome", extracao_pdf.backends_disponiveis())
+def test_backends_extract_the_same_page_texts(pdf, nome):
+    paginas = list(extracao_pdf.iterar_paginas(pdf, backend=nome, workers=1))
+
+    assert [numero for numero, _ in paginas] == [0, 1, 2]
+    assert "Lei nº 8.078/1990" in paginas[0][1]
+    assert paginas[1][1].strip() == ""
+    assert "Súmula Vinculante nº 13" in paginas[2][1]
+
+def test_parallel_extraction_preserves_page_order(tmp_path):
+    path = synthetic_data.gerar_pdf_juridico(str(tmp_path / "processo.pdf"), paginas=10)
+
+    sequencial = list(extracao_pdf.iterar_paginas(path, backend="pypdf", workers=1))
+    paralelo = list(extracao_pdf.iterar_paginas(path, backend="pypdf", workers=2,
+                                                paginas_por_lote=3, min_paginas_paralelo=4))
+
+    assert paralelo == sequencial
+
+def test_extrair_texto_matches_previous_pypdf_output(pdf):
+    from pypdf import PdfReader
+    esperado = ""
+    for page in PdfReader(pdf).pages:
+        extracted = page.extract_text()
+        if extracted:
+            esperado += extracted + "\n"
+
+    assert extracao_pdf.extrair_texto(pdf, backend="pypdf") == esperado
+
+def test_prefetch_stops_cleanly_when_consumer_breaks_early(tmp_path):
+    path = synthetic_data.gerar_pdf_juridico(str(tmp_path / "processo.pdf"), paginas=8)
+
+    for numero, _ in extracao_pdf.iterar_paginas(path, backend="pypdf", workers=1, prefetch=1):
+        if numero == 1:
+            break
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        extracao_pdf.obter_backend("ghostscript")
+
+def test_missing_backend_package_raises_import_error(monkeypatch):
+    monkeypatch.setattr(extracao_pdf.importlib.util, "find_spec", lambda nome: None)
+    with pytest.raises(ImportError):
+        extracao_pdf.obter_backend("pdfium")
+    with pytest.raises(ImportError):
+        extracao_pdf.obter_backend()
@@ -0,0 +1,136 @@
+import asyncio
+import neo4j
+import pytest
+import graph_queries
+from graph_queries import GraphQueryService, mark_graph_updated
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    async def data(self):
+        return self.records
+
+class FakeTransaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def run(self, query, parameters):
+        self.driver.queries.append((query, parameters))
+        if "GrafoMeta" in query:
+            return FakeResult([{"versao": self.driver.version}])
+        return FakeResult([{"id": "Lei nº 8.078/1990", "total_citacoes": 42, "documentos_citantes": 7}])
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute_read(self, work, *args):
+        return await work(FakeTransaction(self.driver), *args)
+
+class FakeDriver:
+    def __init__(self):
+        self.version = 1
+        self.queries = []
+        self.sessions = []
+
+    def session(self, **kwargs):
+        self.sessions.append(kwargs)
+        return FakeSession(self)
+
+    def data_queries(self):
+        return [q for q, _ in self.queries if "GrafoMeta" not in q]
+
+@pytest.fixture
+def driver():
+    return FakeDriver()
+
+def test_queries_run_in_read_sessions_with_parameters(driver):
+    service = GraphQueryService(driver)
+
+    result = asyncio.run(service.documents_citing("Lei", "Lei nº 8.078/1990", limit=5, skip=10))
+
+    assert result["skip"] == 10 and result["limit"] == 5
+    assert all(s["default_access_mode"] == neo4j.READ_ACCESS for s in driver.sessions)
+    query, parameters = driver.queries[-1]
+    assert "(n:Lei {id: $id})" in query and "SKIP $skip LIMIT $limit" in query
+    assert parameters == {"id": "Lei nº 8.078/1990", "skip": 10, "limit": 5}
+
+def test_results_are_cached_until_the_graph_version_changes(driver):
+    service = GraphQueryService(driver, version_check_seconds=0)
+
+    async def run():
+        first = await service.most_cited("Lei")
+        await service.most_cited("Lei")
+        driver.version = 2
+        await service.most_cited("Lei")
+        return first
+
+    first = asyncio.run(run())
+
+    assert first["items"][0]["total_citacoes"] == 42
+    assert len(driver.data_queries()) == 2
+
+def test_version_is_trusted_for_the_check_interval(driver):
+    service = GraphQueryService(driver, version_check_seconds=3600)
+
+    async def run():
+        await service.most_cited("Lei")
+        driver.version = 2
+        await service.most_cited("Lei")
+
+    asyncio.run(run())
+
+    assert len(driver.data_queries()) == 1
+
+def test_invalidate_forces_a_fresh_read(driver):
+    service = GraphQueryService(driver, version_check_seconds=3600)
+
+    asyncio.run(service.co_cited("Sumula", "Súmula Vinculante 13"))
+    service.invalidate()
+    asyncio.run(service.co_cited("Sumula", "Súmula Vinculante 13"))
+
+    assert len(driver.data_queries()) == 2
+
+def test_most_cited_reads_the_materialized_counts(driver):
+    asyncio.run(GraphQueryService(driver).most_cited("Artigo"))
+
+    query = driver.data_queries()[0]
+    assert "CITA" not in query
+    assert "ORDER BY n.total_citacoes DESC" in query
+
+def test_unknown_labels_are_rejected_before_querying(driver):
+    with pytest.raises(ValueError):
+        asyncio.run(GraphQueryService(driver).most_cited("Documento) DETACH DELETE (x"))
+    assert driver.queries == []
+
+def test_most_cited_by_year_orders_by_the_yearly_property(driver):
+    asyncio.run(GraphQueryService(driver).most_cited("Artigo", year=2024))
+
+    assert "ORDER BY n.citacoes_2024 DESC" in driver.data_queries()[0]
+
+def test_co_cited_reads_the_materialized_edges(driver):
+    asyncio.run(GraphQueryService(driver).co_cited("Sumula", "Súmula Vinculante 13"))
+
+    query = driver.data_queries()[0]
+    assert "CO_CITADO_COM" in query and "CITA]" not in query
+
+def test_mark_graph_updated_refreshes_statistics_and_bumps_version():
+    executed = []
+
+    def run_query(query, parameters=None):
+        executed.append(query)
+        if query == graph_queries.estatisticas_citacoes.CONSULTA_MARCA:
+            return [{"desde": None, "agora": "T1"}]
+        return []
+
+    mark_graph_updated(run_query)
+
+    assert graph_queries.estatisticas_citacoes.AVANCAR_MARCA in executed
+    assert executed[-1] == graph_queries.BUMP_GRAPH_VERSION_QUERY
@@ -0,0 +1,119 @@
+import json
+import pytest
+import indice_leis
+from gerar_mapeamento_leis import gerar_indice, gerar_mapeamento, iterar_registros
+
+REPOSITORIO = """Lei: Lei nº 13.105/2015
+Origem: Projeto de Lei (PL) nº 8046/2010
+---
+Lei: Lei nº 8.078/1990
+Origem: Projeto de Lei (PL) nº 3.683/1989
+---
+registro sem origem
+---
+Lei: Lei nº 10.406/2002
+Origem: Projeto de Lei (PL) nº 634/1975
+"""
+
+@pytest.fixture
+def repositorio(tmp_path):
+    path = tmp_path / "repositorio_leis.txt"
+    path.write_text(REPOSITORIO, encoding="utf-8")
+    return str(path)
+
+@pytest.fixture
+def indice(repositorio, tmp_path):
+    caminho = str(tmp_path / "indice_leis.sqlite")
+    gerar_indice(repositorio, caminho)
+    indice = indice_leis.IndiceLeis(caminho)
+    yield indice
+    indice.close()
+
+@pytest.mark.parametrize("texto", [
+    "Lei nº 13.105/2015", "Lei n. 13105/2015", "LEI Nº 13.105 / 2015", "lei 13.105/15", "Lei nº 13.105/2015,",
+])
+def test_spelling_variants_share_the_same_key(texto):
+    assert indice_leis.chave_lei(texto) == ("LEI", "13105", 2015)
+
+def test_two_digit_years_before_current_century_resolve_to_1900s():
+    assert indice_leis.chave_lei("Decreto-Lei nº 4.657/42") == ("DECRETO-LEI", "4657", 1942)
+    assert indice_leis.chave_lei("Lei Complementar 123/06") == ("LEI COMPLEMENTAR", "123", 2006)
+
+def test_law_types_are_not_confused():
+    assert indice_leis.chave_lei("Lei Complementar nº 123/2006") != indice_leis.chave_lei("Lei nº 123/2006")
+    assert indice_leis.chave_lei("Constituição Federal") is None
+
+def test_streaming_parser_skips_malformed_records(repositorio):
+    registros = list(iterar_registros(repositorio))
+
+    assert [r["lei"] for r in registros] == ["Lei nº 13.105/2015", "Lei nº 8.078/1990", "Lei nº 10.406/2002"]
+    assert registros[1]["projeto_origem"] == {"sigla": "PL", "numero": "3683", "ano": "1989"}
+
+def test_json_output_keeps_the_original_format(repositorio, tmp_path):
+    saida = tmp_path / "mapeamento_leis.json"
+
+    gerar_mapeamento(repositorio, str(saida))
+
+    assert json.loads(saida.read_text(encoding="utf-8")) == list(iterar_registros(repositorio))
+
+def test_index_lookup_tolerates_spelling_variants(indice):
+    assert len(indice) == 3
+    assert indice.get("lei n. 8078/90") == {"sigla": "PL", "numero": "3683", "ano": "1989"}
+    assert indice.get("Lei nº 9.999/1999") is None
+    assert "Lei nº 13.105/2015" in indice
+
+def test_json_fallback_answers_like_the_index(indice, repositorio, tmp_path):
+    saida = tmp_path / "mapeamento_leis.json"
+    gerar_mapeamento(repositorio, str(saida))
+
+    mapa = indice_leis.abrir_mapa_leis(str(tmp_path / "inexistente.sqlite"), str(saida))
+
+    for texto in ["Lei nº 13.105/2015", "lei 10406/02", "Lei nº 1/2000"]:
+        assert mapa.get(texto) == indice.get(texto)
+
+def test_large_repository_is_indexed_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(indice_leis, "TAMANHO_LOTE", 100)
+    path = tmp_path / "grande.txt"
+    path.write_text("---\n".join(
+        f"Lei: Lei nº {n}/2000\nOrigem: Projeto de Lei (PL) nº {n}/1999\n" for n in range(1, 1001)
+    ), encoding="utf-8")
+    caminho = str(tmp_path / "grande.sqlite")
+
+    total = indice_leis.construir_indice(iterar_registros(str(path)), caminho)
+
+    indice = indice_leis.IndiceLeis(caminho)
+    assert total == len(indice) == 1000
+    assert indice.get("Lei nº 750/2000")["numero"] == "750"
+    indice.close()
+
+def test_missing_input_keeps_the_existing_outputs(tmp_path):
+    saida = tmp_path / "mapeamento_leis.json"
+    saida.write_text('[{"lei": "Lei nº 8.078/1990"}]', encoding="utf-8")
+    caminho = tmp_path / "indice.sqlite"
+
+    gerar_mapeamento(str(tmp_path / "inexistente.txt"), str(saida))
+    gerar_indice(str(tmp_path / "inexistente.txt"), str(caminho))
+
+    assert saida.read_text(encoding="utf-8") == '[{"lei": "Lei nº 8.078/1990"}]'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["mapeamento_leis.json"]
+
+def test_index_total_counts_repeated_laws_once(tmp_path):
+    path = tmp_path / "repetido.txt"
+    path.write_text("---\n".join(
+        ["Lei: Lei nº 8.078/1990\nOrigem: Projeto de Lei (PL) nº 3.683/1989\n"] * 3
+    ), encoding="utf-8")
+
+    total = indice_leis.construir_indice(iterar_registros(str(path)), str(tmp_path / "indice.sqlite"))
+
+    assert total == 1
+
+def test_failed_build_removes_the_temporary_index(tmp_path):
+    caminho = tmp_path / "indice.sqlite"
+
+    def registros():
+        yield {"lei": "Lei nº 8.078/1990", "projeto_origem": {"sigla": "PL", "numero": "3683", "ano": "1989"}}
+        raise OSError("leitura interrompida")
+
+    with pytest.raises(OSError):
+        indice_leis.construir_indice(registros(), str(caminho))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+import pytest
+from llm_analysis import AnalysisCache, LLMAnalyzer, make_cache_key, split_text
+
+class StubBackend:
+    """Records calls and answers with a summary of the input size."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def complete(self, system_prompt, text, model, temperature, max_tokens):
+        with self._lock:
+            self.calls.append((system_prompt, text))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return f"summary of {len(text)} chars"
+
+def test_cache_key_depends_on_every_field():
+    base = make_cache_key("text", "prompt", "model", 0.7)
+    assert base == make_cache_key("text", "prompt", "model", 0.7)
+    assert base != make_cache_key("text2", "prompt", "model", 0.7)
+    assert base != make_cache_key("text", "prompt2", "model", 0.7)
+    assert base != make_cache_key("text", "prompt", "model2", 0.7)
+    assert base != make_cache_key("text", "prompt", "model", 0.2)
+
+def test_null_temperature_has_its_own_cache_key():
+    assert make_cache_key("text", "prompt", "model", None) == make_cache_key("text", "prompt", "model", None)
+    assert make_cache_key("text", "prompt", "model", None) != make_cache_key("text", "prompt", "model", 0.7)
+
+def test_null_temperature_reaches_the_backend():
+    backend = StubBackend()
+    temperatures = []
+    complete = backend.complete
+    backend.complete = lambda system_prompt, text, model, temperature, max_tokens: (
+        temperatures.append(temperature) or complete(system_prompt, text, model, temperature, max_tokens))
+
+    asyncio.run(LLMAnalyzer(backend).analyze("acórdão", "resuma", "model", None))
+
+    assert temperatures == [None]
+
+def test_cache_evicts_least_recently_used_and_expired_entries():
+    cache = AnalysisCache(max_entries=2, ttl_seconds=None)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+    expiring = AnalysisCache(ttl_seconds=0.01)
+    expiring.set("a", "1")
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+
+def test_split_text_prefers_paragraph_breaks():
+    text = "a" * 60 + "\n\n" + "b" * 60
+    chunks = split_text(text, 100)
+    assert chunks == ["a" * 60, "b" * 60]
+    assert split_text("short", 100) == ["short"]
+
+def test_repeated_request_is_served_from_cache():
+    backend = StubBackend()
+    analyzer = LLMAnalyzer(backend)
+
+    first = asyncio.run(analyzer.analyze("acórdão", "resuma", "model"))
+    second = asyncio.run(analyzer.analyze("acórdão", "resuma", "model"))
+
+    assert len(backend.calls) == 1
+    assert first.cached is False
+    assert second.cached is True
+    assert second.analysis == first.analysis
+
+def test_concurrent_identical_requests_share_one_call():
+    backend = StubBackend(delay=0.05)
+    analyzer = LLMAnalyzer(backend)
+
+    async def run():
+        return await asyncio.gather(*(analyzer.analyze("acórdão", "resuma", "model") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(backend.calls) == 1
+    assert len({r.analysis for r in results}) == 1
+    assert analyzer._inflight == {}
+
+def test_long_text_is_map_reduced_with_bounded_parallelism():
+    backend = StubBackend(delay=0.02)
+    analyzer = LLMAnalyzer(backend, chunk_chars=100, max_concurrency=2)
+    text = "\n\n".join(["x" * 90] * 6)
+
+    result = asyncio.run(analyzer.analyze(text, "resuma", "model"))
+
+    assert result.chunks == 6
+    map_calls = [c for c in backend.calls if c[0] == "resuma"]
+    reduce_calls = [c for c in backend.calls if c[0] != "resuma"]
+    assert len(map_calls) == 6
+    assert reduce_calls
+    assert all(len(text) <= 100 for _, text in map_calls)
+    assert backend.max_active <= 2
+
+def test_backend_errors_propagate_and_are_not_cached():
+    class FailingBackend:
+        calls = 0
+        def complete(self, *args):
+            FailingBackend.calls += 1
+            raise RuntimeError("rate limited")
+
+    analyzer = LLMAnalyzer(FailingBackend())
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(analyzer.analyze("texto", "resuma", "model"))
+    assert FailingBackend.calls == 2
@@ -24,8 +24,9 @@ def test_setup_logging_default_info_level(caplog):
 
         root_logger = logging.getLogger()
         assert root_logger.level == logging.INFO
-        assert any(isinstance(h, logging.StreamHandler) for h in root_logger.handlers)
-        assert any(isinstance(h, logging.handlers.RotatingFileHandler) for h in root_logger.handlers)
+        assert any(isinstance(h, logging.handlers.QueueHandler) for h in root_logger.handlers)
+        assert any(isinstance(h, logging.StreamHandler) for h in logging_config.get_handlers())
+        assert any(isinstance(h, logging.handlers.RotatingFileHandler) for h in logging_config.get_handlers())
         
         root_logger.info("Test info message")
         root_logger.debug("Test debug message") # Should not be captured by INFO level
@@ -56,8 +57,7 @@ def test_setup_logging_file_handler_config():
         import logging_config
         logging_config.setup_logging()
 
-        root_logger = logging.getLogger()
-        file_handler = next(h for h in root_logger.handlers if isinstance(h, logging.handlers.RotatingFileHandler))
+        file_handler = next(h for h in logging_config.get_handlers() if isinstance(h, logging.handlers.RotatingFileHandler))
         
         assert file_handler.baseFilename.endswith(os.path.join('plataforma_juridica', 'app.log'))
         assert file_handler.maxBytes == 1024 * 1024 * 5
@@ -71,3 +71,85 @@ def test_setup_logging_specific_module_debug_levels():
         assert logging.getLogger("httpx").level == logging.DEBUG
         assert logging.getLogger("elasticsearch").level == logging.DEBUG
         assert logging.getLogger("neo4j").level == logging.DEBUG
+
+def test_setup_logging_without_queue_attaches_handlers_directly():
+    with patch.dict(os.environ, {"LOG_QUEUE": "False"}, clear=True):
+        import logging_config
+        logging_config.setup_logging()
+
+        root_logger = logging.getLogger()
+        assert logging_config.queue_listener is None
+        assert any(isinstance(h, logging.handlers.RotatingFileHandler) for h in root_logger.handlers)
+        assert not any(isinstance(h, logging.handlers.QueueHandler) for h in root_logger.handlers)
+
+def test_setup_logging_twice_does_not_duplicate_handlers():
+    with patch.dict(os.environ, {}, clear=True):
+        import logging_config
+        logging_config.setup_logging()
+        logging_config.setup_logging()
+
+        root_logger = logging.getLogger()
+        assert sum(isinstance(h, logging.handlers.QueueHandler) for h in root_logger.handlers) == 1
+
+def test_json_formatter_includes_extra_fields():
+    import json
+    import logging_config
+    record = logging.LogRecord("pipeline", logging.INFO, __file__, 1, "Indexed %s", ("proc1",), None)
+    record.tribunal = "tjsp"
+
+    payload = json.loads(logging_config.JsonFormatter().format(record))
+
+    assert payload["message"] == "Indexed proc1"
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "pipeline"
+    assert payload["tribunal"] == "tjsp"
+
+def test_queued_json_records_keep_exc_info(tmp_path):
+    import json
+    import logging_config
+    with patch.dict(os.environ, {"LOG_FORMAT": "json"}, clear=True):
+        logging_config.setup_logging()
+        stream_handler = next(h for h in logging_config.get_handlers() if type(h) is logging.StreamHandler)
+        with open(tmp_path / "out.log", "w+") as stream:
+            stream_handler.setStream(stream)
+            try:
+                raise ValueError("boom")
+            except ValueError:
+                logging.getLogger("pipeline").error("Failed %s", "proc1", exc_info=True)
+            logging_config.setup_logging()  # stops the listener, flushing the queue
+            stream.seek(0)
+            payload = json.loads(stream.readlines()[-1])
+
+    assert payload["message"] == "Failed proc1"
+    assert "ValueError: boom" in payload["exc_info"]
+
+def test_rate_limit_filter_suppresses_and_reports_bursts():
+    import logging_config
+    rate_filter = logging_config.RateLimitFilter(per_second=0.001, burst=2)
+    records = [logging.LogRecord("hot", logging.INFO, __file__, 1, "Processed %s", (i,), None) for i in range(5)]
+
+    passed = [r for r in records if rate_filter.filter(r)]
+
+    assert len(passed) == 2
+    rate_filter._allowance = 1 # Simulate the bucket refilling
+    late = logging.LogRecord("hot", logging.INFO, __file__, 1, "Processed %s", (99,), None)
+    assert rate_filter.filter(late)
+    assert late.getMessage() == "Processed 99 [3 similar messages suppressed]"
+
+def test_sampling_filter_keeps_one_in_n():
+    import logging_config
+    sampling_filter = logging_config.SamplingFilter(every_n=3)
+    records = [logging.LogRecord("hot", logging.INFO, __file__, 1, "Processed %s", (i,), None) for i in range(7)]
+
+    passed = [r.args[0] for r in records if sampling_filter.filter(r)]
+
+    assert passed == [0, 3, 6]
+
+def test_record_logger_is_rate_limited_child():
+    with patch.dict(os.environ, {"LOG_RECORDS_PER_SECOND": "5"}, clear=True):
+        import logging_config
+        record_logger = logging_config.get_record_logger("test_module_rate")
+
+        assert record_logger.name == "test_module_rate.records"
+        assert len(record_logger.filters) == 1
+        assert logging_config.get_record_logger("test_module_rate").filters == record_logger.filters
@@ -0,0 +1,89 @@
+import os
+import pytest
+import requests
+import metrics
+
+@pytest.fixture
+def registry():
+    return metrics.Registry()
+
+def test_counter_renders_labels_in_exposition_format(registry):
+    counter = metrics.Counter("docs_total", "Documents.", ["source"], registry=registry)
+    counter.inc(source="cnj")
+    counter.inc(2, source="cnj")
+    counter.inc(source='quote"d')
+
+    text = registry.render()
+
+    assert "# HELP docs_total Documents." in text
+    assert "# TYPE docs_total counter" in text
+    assert 'docs_total{source="cnj"} 3' in text
+    assert 'docs_total{source="quote\\"d"} 1' in text
+    assert counter.value(source="cnj") == 3
+
+def test_counter_rejects_unknown_labels(registry):
+    counter = metrics.Counter("docs_total", "Documents.", ["source"], registry=registry)
+    with pytest.raises(ValueError):
+        counter.inc(upstream="cnj")
+
+def test_duplicate_metric_names_are_rejected(registry):
+    metrics.Counter("docs_total", "Documents.", registry=registry)
+    with pytest.raises(ValueError):
+        metrics.Counter("docs_total", "Documents.", registry=registry)
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = metrics.Histogram("latency_seconds", "Latency.", ["upstream"], buckets=(0.1, 1.0), registry=registry)
+    histogram.observe(0.05, upstream="cnj")
+    histogram.observe(0.5, upstream="cnj")
+    histogram.observe(5, upstream="cnj")
+
+    text = registry.render()
+
+    assert 'latency_seconds_bucket{upstream="cnj",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{upstream="cnj",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{upstream="cnj",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{upstream="cnj"} 5.55' in text
+    assert 'latency_seconds_count{upstream="cnj"} 3' in text
+
+def test_time_http_request_labels_errors():
+    before = metrics.HTTP_CLIENT_SECONDS.count(upstream="test_upstream", outcome="error")
+    with pytest.raises(requests.exceptions.Timeout):
+        with metrics.time_http_request("test_upstream"):
+            raise requests.exceptions.Timeout("slow")
+    assert metrics.HTTP_CLIENT_SECONDS.count(upstream="test_upstream", outcome="error") == before + 1
+
+def test_write_textfile_is_atomic(registry, tmp_path):
+    metrics.Counter("docs_total", "Documents.", registry=registry).inc()
+    path = tmp_path / "job.prom"
+
+    registry.write_textfile(str(path))
+
+    assert "docs_total 1" in path.read_text()
+    assert os.listdir(tmp_path) == ["job.prom"]
+
+def test_dump_batch_metrics_writes_textfile_and_pushes(registry, tmp_path, requests_mock, monkeypatch):
+    monkeypatch.setenv("METRICS_TEXTFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PUSHGATEWAY_URL", "http://pushgateway:9091/")
+    metrics.Counter("docs_total", "Documents.", registry=registry).inc()
+    requests_mock.put("http://pushgateway:9091/metrics/job/ingest", status_code=200)
+
+    metrics.dump_batch_metrics("ingest", registry=registry)
+
+    assert "docs_total 1" in (tmp_path / "ingest.prom").read_text()
+    assert requests_mock.last_request.text.startswith("# HELP docs_total")
+
+def test_dump_batch_metrics_never_raises(registry, requests_mock, monkeypatch):
+    monkeypatch.delenv("METRICS_TEXTFILE_DIR", raising=False)
+    monkeypatch.setenv("PUSHGATEWAY_URL", "http://pushgateway:9091")
+    requests_mock.put("http://pushgateway:9091/metrics/job/ingest", status_code=500)
+
+    metrics.dump_batch_metrics("ingest", registry=registry)
+
+def test_dump_batch_metrics_stamps_the_registry_it_exports(registry, tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_TEXTFILE_DIR", str(tmp_path))
+    monkeypatch.delenv("PUSHGATEWAY_URL", raising=False)
+
+    metrics.dump_batch_metrics("isolated_job", registry=registry)
+
+    assert 'pipeline_last_run_timestamp_seconds{job="isolated_job"}' in (tmp_path / "isolated_job.prom").read_text()
+    assert metrics.LAST_RUN_TIMESTAMP.value(job="isolated_job") == 0
@@ -0,0 +1,39 @@
+import pytest
+import normalizacao
+
+@pytest.mark.parametrize("rule_id, texto, esperado", [
+    ("ARTIGO", "art. 5", "Art. 5"),
+    ("ARTIGO", "Art. 1.228", "Art. 1228"),
+    ("ARTIGO", "art", "art"),
+    ("LEI", " Lei nº 8.078/1990 ", "Lei nº 8.078/1990"),
+    ("LEI", "lei n. 8078/90", "Lei nº 8.078/1990"),
+    ("LEI", "Lei 13105 / 2015", "Lei nº 13.105/2015"),
+    ("LEI", "decreto-lei nº 4.657/1942", "Decreto-Lei nº 4.657/1942"),
+    ("SUMULA", "Súmula Vinculante nº 13", "Súmula Vinculante 13"),
+    ("SUMULA", "SV 14", "Súmula Vinculante 14"),
+    ("SUMULA", "súmula 7", "Súmula 7"),
+    ("CONSTITUICAO", "CRFB", "Constituição Federal de 1988"),
+    ("CODIGO", "código de processo civil", "Código de Processo Civil"),
+    ("CODIGO", "Código Civil", "Código Civil"),
+    ("CODIGO", "código eleitoral", "Código Eleitoral"),
+    ("DESCONHECIDA", "  texto ", "texto"),
+])
+def test_normalizar(rule_id, texto, esperado):
+    assert normalizacao.normalizar(rule_id, texto) == esperado
+
+def test_repeated_forms_are_served_from_the_memo():
+    normalizacao.normalizar.cache_clear()
+
+    for _ in range(100):
+        normalizacao.normalizar("ARTIGO", "art. 5")
+
+    estatisticas = normalizacao.estatisticas_memo()
+    assert (estatisticas["misses"], estatisticas["hits"]) == (1, 99)
+
+def test_batch_preserves_order_and_matches_single_calls():
+    spans = [("ARTIGO", "art. 5"), ("SUMULA", "SV 14"), ("ARTIGO", "art. 5"), ("CONSTITUICAO", "CF")]
+
+    assert normalizacao.normalizar_lote(spans) == [normalizacao.normalizar(*span) for span in spans]
+
+def test_limpar_texto_strips_trailing_punctuation():
+    assert normalizacao.limpar_texto(" Código Civil., ") == "Código Civil"
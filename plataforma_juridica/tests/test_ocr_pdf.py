@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import extracao_pdf
+import ocr_pdf
+from cache_texto_pdf import CacheTextoPdf
+from benchmarks import synthetic_data
+
+TEXTO_PAGINA = "Nos termos do art. 5º da Constituição Federal e da Lei nº 8.078/1990, " * 4
+
+@pytest.fixture
+def pdf_com_pagina_digitalizada(tmp_path):
+    path = tmp_path / "digitalizado.pdf"
+    path.write_bytes(synthetic_data.construir_pdf([[TEXTO_PAGINA], [], [TEXTO_PAGINA]]))
+    return str(path)
+
+def ocr_falso(caminho, numero_pagina, dpi, idioma):
+    return f"Súmula Vinculante nº 13 reconhecida por OCR na página {numero_pagina}. " * 3
+
+@pytest.fixture
+def fila():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        yield ocr_pdf.FilaOcr(workers=1, motor=ocr_falso, executor=executor)
+
+def test_low_density_pages_need_ocr():
+    assert ocr_pdf.precisa_ocr("")
+    assert ocr_pdf.precisa_ocr("Assinado digitalmente por JOSÉ SILVA - 01/02/2023")
+    assert not ocr_pdf.precisa_ocr(TEXTO_PAGINA)
+
+def test_only_scanned_pages_go_to_the_ocr_lane(pdf_com_pagina_digitalizada, fila):
+    paginas = dict(extracao_pdf.iterar_paginas(pdf_com_pagina_digitalizada, backend="pypdf", workers=1, ocr=fila))
+
+    assert "reconhecida por OCR na página 1" in paginas[1]
+    assert "OCR" not in paginas[0] and "OCR" not in paginas[2]
+
+def test_text_pages_are_not_held_back_by_slow_ocr(pdf_com_pagina_digitalizada):
+    liberar = threading.Event()
+
+    def ocr_lento(caminho, numero_pagina, dpi, idioma):
+        liberar.wait(timeout=5)
+        return ocr_falso(caminho, numero_pagina, dpi, idioma)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        fila = ocr_pdf.FilaOcr(workers=1, motor=ocr_lento, executor=executor)
+        paginas = extracao_pdf.iterar_paginas(pdf_com_pagina_digitalizada, backend="pypdf", workers=1, ocr=fila)
+        primeiras = [next(paginas)[0], next(paginas)[0]]
+        liberar.set()
+        restantes = [numero for numero, _ in paginas]
+
+    assert primeiras == [0, 2]
+    assert restantes == [1]
+
+def test_full_queue_defers_pages_instead_of_blocking(tmp_path):
+    path = tmp_path / "todo_digitalizado.pdf"
+    path.write_bytes(synthetic_data.construir_pdf([[] for _ in range(5)]))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        fila = ocr_pdf.FilaOcr(workers=1, max_pendentes=1, motor=ocr_falso, executor=executor)
+        paginas = dict(extracao_pdf.iterar_paginas(str(path), backend="pypdf", workers=1, ocr=fila))
+
+    assert sorted(paginas) == [0, 1, 2, 3, 4]
+    assert all("OCR" in texto for texto in paginas.values())
+
+def test_ocr_failure_keeps_text_layer(pdf_com_pagina_digitalizada):
+    def ocr_com_erro(*args):
+        raise RuntimeError("tesseract saiu com código 1")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        fila = ocr_pdf.FilaOcr(workers=1, motor=ocr_com_erro, executor=executor)
+        paginas = dict(extracao_pdf.iterar_paginas(pdf_com_pagina_digitalizada, backend="pypdf", workers=1, ocr=fila))
+
+    assert paginas[1] == ""
+
+def test_ocr_output_is_cached_in_page_order(pdf_com_pagina_digitalizada, fila, tmp_path):
+    cache = CacheTextoPdf(str(tmp_path / "cache"), compressao="gzip")
+
+    texto = extracao_pdf.extrair_texto(pdf_com_pagina_digitalizada, backend="pypdf", workers=1, cache=cache, ocr=fila)
+    em_cache = extracao_pdf.extrair_texto(pdf_com_pagina_digitalizada, backend="pypdf", workers=1, cache=cache, ocr=fila)
+
+    assert em_cache == texto
+    assert texto.index("Constituição") < texto.index("OCR na página 1")
+
+def test_failed_ocr_is_not_cached(pdf_com_pagina_digitalizada, tmp_path):
+    cache = CacheTextoPdf(str(tmp_path / "cache"), compressao="gzip")
+    chamadas = []
+
+    def ocr_com_erro(caminho, numero_pagina, dpi, idioma):
+        chamadas.append(numero_pagina)
+        raise RuntimeError("tesseract saiu com código 1")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        fila = ocr_pdf.FilaOcr(workers=1, motor=ocr_com_erro, executor=executor)
+        for _ in range(2):
+            extracao_pdf.extrair_texto(pdf_com_pagina_digitalizada, backend="pypdf", workers=1, cache=cache, ocr=fila)
+
+    assert chamadas == [1, 1]
+
+def test_ocr_needs_pypdfium2_to_render_pages(monkeypatch):
+    monkeypatch.setattr(ocr_pdf.shutil, "which", lambda nome: f"/usr/bin/{nome}")
+    monkeypatch.setattr(ocr_pdf.importlib.util, "find_spec", lambda nome: None if nome == "pypdfium2" else object())
+
+    assert not ocr_pdf.ocr_disponivel()
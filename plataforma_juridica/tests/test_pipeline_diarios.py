@@ -0,0 +1,137 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import pipeline_extracao_grafo
+from extracao_citacoes import MotorRegex
+from pipeline_diarios import ArmazemDiarios, nome_documento, processar_diarios
+from querido_diario_client import QueridoDiarioClient
+from benchmarks import synthetic_data
+
+DIARIOS = {
+    "/sp/2024-03-01.pdf": synthetic_data.construir_pdf([["Decreto municipal com base na Lei nº 8.666/1993."]]),
+    "/sp/2024-03-02.pdf": synthetic_data.construir_pdf([["Nomeação nos termos do art. 37 da CF."]]),
+    # Mesmo arquivo publicado em outra URL
+    "/sp/espelho/2024-03-02.pdf": synthetic_data.construir_pdf([["Nomeação nos termos do art. 37 da CF."]]),
+}
+
+class RecordingConnection:
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, parameters=None):
+        self.queries.append((query, parameters or {}))
+        return []
+
+class NullCamaraClient:
+    def buscar_proposicao(self, *args):
+        return None
+
+@pytest.fixture
+def servidor():
+    pedidos = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            pedidos.append(self.path)
+            corpo = DIARIOS.get(self.path)
+            if corpo is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", pedidos
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def client(servidor):
+    with QueridoDiarioClient(servidor[0], "chave") as client:
+        yield client
+
+def diarios(base_url, *caminhos):
+    return [{"url": f"{base_url}{caminho}", "territory_name": "São Paulo", "date": caminho[-14:-4]}
+            for caminho in caminhos]
+
+def test_gazettes_are_streamed_into_the_graph(servidor, client, tmp_path):
+    base_url, _ = servidor
+    armazem = ArmazemDiarios(str(tmp_path / "diarios"))
+    conn = RecordingConnection()
+
+    def processar(caminho, diario):
+        paginas = pipeline_extracao_grafo.ler_paginas_de_pdf(caminho)
+        pipeline_extracao_grafo.extrair_e_popular_grafo(
+            None, conn, NullCamaraClient(), {}, nome_documento(diario), paginas, motor=MotorRegex())
+
+    totais = processar_diarios(client, diarios(base_url, "/sp/2024-03-01.pdf", "/sp/2024-03-02.pdf"),
+                               armazem, processar, workers=2)
+
+    assert totais == {"baixados": 2, "processados": 2, "ignorados": 0, "erros": 0}
+    citados = {c["id"] for _, params in conn.queries for c in params.get("citacoes", [])}
+    assert {"Lei nº 8.666/1993", "Constituição Federal de 1988, art. 37"} <= citados
+    documentos = {params["nome"] for _, params in conn.queries if "nome" in params}
+    assert f"São Paulo - 2024-03-01 - {base_url}/sp/2024-03-01.pdf" in documentos
+
+def test_known_urls_and_duplicate_content_are_skipped(servidor, client, tmp_path):
+    base_url, pedidos = servidor
+    armazem = ArmazemDiarios(str(tmp_path / "diarios"))
+    processados = []
+
+    def processar(caminho, diario):
+        processados.append(diario["url"])
+
+    processar_diarios(client, diarios(base_url, "/sp/2024-03-01.pdf", "/sp/2024-03-02.pdf"), armazem, processar)
+    totais = processar_diarios(
+        client, diarios(base_url, "/sp/2024-03-01.pdf", "/sp/2024-03-02.pdf", "/sp/espelho/2024-03-02.pdf"),
+        armazem, processar,
+    )
+
+    assert totais == {"baixados": 1, "processados": 0, "ignorados": 3, "erros": 0}
+    assert pedidos.count("/sp/2024-03-01.pdf") == 1
+    assert len(processados) == 2
+
+def test_failed_downloads_leave_no_partial_file(servidor, client, tmp_path):
+    base_url, _ = servidor
+    armazem = ArmazemDiarios(str(tmp_path / "diarios"))
+
+    totais = processar_diarios(client, diarios(base_url, "/sp/inexistente.pdf"), armazem, lambda *a: None)
+
+    assert totais["erros"] == 1
+    assert [p.name for p in (tmp_path / "diarios").iterdir()] == ["indice.sqlite"]
+
+def test_interrupted_run_processes_the_stored_file_without_downloading(servidor, client, tmp_path):
+    base_url, pedidos = servidor
+    armazem = ArmazemDiarios(str(tmp_path / "diarios"))
+
+    def falhar(caminho, diario):
+        raise RuntimeError("neo4j indisponível")
+
+    processar_diarios(client, diarios(base_url, "/sp/2024-03-01.pdf"), armazem, falhar)
+    totais = processar_diarios(client, diarios(base_url, "/sp/2024-03-01.pdf"), armazem, lambda *a: None)
+
+    assert totais["processados"] == 1
+    assert pedidos == ["/sp/2024-03-01.pdf"]
+
+def test_unreadable_gazettes_are_not_marked_processed(servidor, client, tmp_path):
+    base_url, _ = servidor
+    armazem = ArmazemDiarios(str(tmp_path / "diarios"))
+
+    def processar(caminho, diario):
+        with open(caminho, "r+b") as f:
+            f.truncate(20)
+        list(pipeline_extracao_grafo.ler_paginas_de_pdf(caminho, workers=1))
+
+    totais = processar_diarios(client, diarios(base_url, "/sp/2024-03-01.pdf"), armazem, processar)
+
+    assert totais["erros"] == 1 and totais["processados"] == 0
+    novamente = processar_diarios(client, diarios(base_url, "/sp/2024-03-01.pdf"), armazem, lambda *a: None)
+    assert novamente["processados"] == 1
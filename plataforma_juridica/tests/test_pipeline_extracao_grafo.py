@@ -0,0 +1,181 @@
+import pytest
+import pipeline_extracao_grafo
+from extracao_citacoes import MotorRegex, ReferenciaArtigo
+from benchmarks import synthetic_data
+
+class RecordingConnection:
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, parameters=None):
+        self.queries.append((query, parameters or {}))
+        return []
+
+class NullCamaraClient:
+    def buscar_proposicao(self, *args):
+        return None
+
+def test_mesclar_dispositivo_builds_the_hierarchy():
+    conn = RecordingConnection()
+    referencia = ReferenciaArtigo("Constituição Federal de 1988", "Constituicao", "37", "único", "II")
+
+    rotulo, id_dispositivo = pipeline_extracao_grafo.mesclar_dispositivo(conn, referencia)
+
+    query, params = conn.queries[0]
+    assert (rotulo, id_dispositivo) == ("Inciso", "Constituição Federal de 1988, art. 37, parágrafo único, inciso II")
+    assert "MERGE (n0:Constituicao {id: $diploma})" in query
+    assert "[:TEM_ARTIGO]" in query and "[:TEM_PARAGRAFO]" in query and "[:TEM_INCISO]" in query
+    assert params["id1"] == "Constituição Federal de 1988, art. 37"
+
+def cita_writes(conn):
+    return [(query, params) for query, params in conn.queries if "[r:CITA]" in query]
+
+def test_resolved_articles_are_cited_instead_of_the_generic_article_node():
+    conn = RecordingConnection()
+
+    pipeline_extracao_grafo.extrair_e_popular_grafo(
+        None, conn, NullCamaraClient(), {}, "decisao.pdf",
+        ["Nos termos do art. 927 do CPC.", "Ver art. 7."], motor=MotorRegex(),
+    )
+
+    ids = [c["id"] for _, params in cita_writes(conn) for c in params["citacoes"]]
+    assert ids == ["Código de Processo Civil, art. 927", "Art. 7"]
+
+def test_citations_are_aggregated_into_one_write_per_label():
+    conn = RecordingConnection()
+    paginas = [
+        "Súmula 7 e Súmula 7 e art. 927 do CPC.",
+        "Sem citações nesta página.",
+        "Ainda a Súmula 7, agora com a Súmula 83 e o art. 927 do CPC.",
+    ]
+
+    pipeline_extracao_grafo.extrair_e_popular_grafo(
+        None, conn, NullCamaraClient(), {}, "decisao.pdf", paginas, motor=MotorRegex(),
+    )
+
+    writes = cita_writes(conn)
+    assert len(writes) == 2
+    query, params = writes[0]
+    assert "UNWIND $citacoes" in query
+    sumula_7, sumula_83 = params["citacoes"]
+    assert sumula_7 == {
+        "id": "Súmula 7", "count": 3, "paginas": [1, 3],
+        "primeira_pagina": 1, "primeira_posicao": 0, "ultima_pagina": 3, "ultima_posicao": 8,
+    }
+    assert sumula_83["count"] == 1
+    artigo = writes[1][1]["citacoes"][0]
+    assert (artigo["id"], artigo["count"]) == ("Código de Processo Civil, art. 927", 2)
+    hierarchy_writes = [q for q, _ in conn.queries if "[:TEM_ARTIGO]" in q]
+    assert len(hierarchy_writes) == 1
+
+def test_blank_pages_do_not_shift_the_page_numbers(tmp_path):
+    caminho = tmp_path / "decisao.pdf"
+    caminho.write_bytes(synthetic_data.construir_pdf([["capa"], [], [], ["Aplica-se a Súmula 7."]]))
+    conn = RecordingConnection()
+
+    paginas = pipeline_extracao_grafo.ler_paginas_de_pdf(str(caminho), workers=1)
+    pipeline_extracao_grafo.extrair_e_popular_grafo(None, conn, NullCamaraClient(), {}, "decisao.pdf",
+                                                    paginas, motor=MotorRegex())
+
+    (_, params), = cita_writes(conn)
+    sumula, = params["citacoes"]
+    assert sumula["paginas"] == [4]
+    assert sumula["primeira_pagina"] == sumula["ultima_pagina"] == 4
+
+@pytest.mark.parametrize("conteudo", [None, b"%PDF-1.4 truncado", b"nao e um pdf"])
+def test_unreadable_pdfs_raise_instead_of_yielding_no_pages(tmp_path, conteudo):
+    caminho = tmp_path / "decisao.pdf"
+    if conteudo is not None:
+        caminho.write_bytes(conteudo)
+
+    with pytest.raises(Exception):
+        list(pipeline_extracao_grafo.ler_paginas_de_pdf(str(caminho), workers=1))
+
+def test_pages_arriving_out_of_order_are_aggregated_by_page_number():
+    conn = RecordingConnection()
+    # Páginas reconhecidas por OCR chegam quando ficam prontas
+    paginas = [(4, "Súmula 7."), (0, "Súmula 7."), (2, "Súmula 7 e Súmula 7.")]
+
+    pipeline_extracao_grafo.extrair_e_popular_grafo(None, conn, NullCamaraClient(), {}, "decisao.pdf",
+                                                    paginas, motor=MotorRegex())
+
+    (_, params), = cita_writes(conn)
+    sumula, = params["citacoes"]
+    assert sumula["count"] == 4
+    assert sumula["paginas"] == [1, 3, 5]
+    assert (sumula["primeira_pagina"], sumula["primeira_posicao"]) == (1, 0)
+    assert (sumula["ultima_pagina"], sumula["ultima_posicao"]) == (5, 0)
+
+def test_each_law_is_enriched_once_per_document():
+    class CountingCamaraClient(NullCamaraClient):
+        calls = 0
+
+        def buscar_proposicao(self, *args):
+            self.calls += 1
+            return None
+
+    camara = CountingCamaraClient()
+    mapa_leis = {"Lei nº 8.078/1990": {"sigla": "PL", "numero": "3683", "ano": "1989"}}
+
+    pipeline_extracao_grafo.extrair_e_popular_grafo(
+        None, RecordingConnection(), camara, mapa_leis, "decisao.pdf",
+        "Lei nº 8.078/1990, Lei nº 8.078/1990 e novamente Lei nº 8.078/1990.", motor=MotorRegex(),
+    )
+
+    assert camara.calls == 1
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("art. 5º", "Art. 5"),
+    ("art. 1.228", "Art. 1228"),
+])
+def test_normalizar_artigo_handles_ordinals_and_thousands(texto, esperado):
+    assert pipeline_extracao_grafo.normalizar_entidade("ARTIGO", texto) == esperado
+
+def test_rewritten_document_drops_citations_it_no_longer_has():
+    conn = RecordingConnection()
+
+    pipeline_extracao_grafo.extrair_e_popular_grafo(
+        None, conn, NullCamaraClient(), {}, "decisao.pdf", ["Súmula 7 e art. 927 do CPC."], motor=MotorRegex(),
+    )
+
+    remocoes = [p for q, p in conn.queries if q == pipeline_extracao_grafo.REMOVER_CITACOES_ANTIGAS]
+    assert sorted(remocoes[0]["chaves"]) == ["Artigo:Código de Processo Civil, art. 927", "Sumula:Súmula 7"]
+
+def test_document_without_citations_still_drops_the_old_ones():
+    conn = RecordingConnection()
+
+    pipeline_extracao_grafo.extrair_e_popular_grafo(
+        None, conn, NullCamaraClient(), {}, "decisao.pdf", ["Sem citações."], motor=MotorRegex(),
+    )
+
+    remocoes = [p for q, p in conn.queries if q == pipeline_extracao_grafo.REMOVER_CITACOES_ANTIGAS]
+    assert remocoes == [{"nome": "decisao.pdf", "chaves": []}]
+    assert "SET d.atualizado_em" in conn.queries[-1][0]
+
+def test_extraction_failure_keeps_the_stored_citations(tmp_path, monkeypatch):
+    caminho = tmp_path / "decisao.pdf"
+    caminho.write_bytes(synthetic_data.construir_pdf([["Aplica-se a Súmula 7."], ["Súmula 83."]]))
+    conn = RecordingConnection()
+
+    def falha_apos_primeira_pagina(*args, **kwargs):
+        yield 0, "Aplica-se a Súmula 7."
+        raise OSError("arquivo truncado")
+
+    monkeypatch.setattr(pipeline_extracao_grafo.extracao_pdf, "iterar_paginas", falha_apos_primeira_pagina)
+    paginas = pipeline_extracao_grafo.ler_paginas_de_pdf(str(caminho), workers=1)
+    with pytest.raises(OSError):
+        pipeline_extracao_grafo.extrair_e_popular_grafo(None, conn, NullCamaraClient(), {}, "decisao.pdf",
+                                                        paginas, motor=MotorRegex())
+
+    assert not cita_writes(conn)
+    assert all(q != pipeline_extracao_grafo.REMOVER_CITACOES_ANTIGAS for q, _ in conn.queries)
+    assert all("atualizado_em" not in q for q, _ in conn.queries)
+
+def test_documents_without_a_year_are_not_bucketed_in_the_ingestion_year():
+    conn = RecordingConnection()
+
+    pipeline_extracao_grafo.extrair_e_popular_grafo(None, conn, NullCamaraClient(), {}, "decisao.pdf",
+                                                    ["Súmula 7."], motor=MotorRegex())
+
+    query, params = conn.queries[0]
+    assert "date()" not in query and params["ano"] is None
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from process_for_graph import extract_and_load_graph_data, ES_INDEX
+from entity_resolution import EntityResolver, document_entity_id
 import logging # Import logging
 
 # Ensure logging is set up for tests
@@ -13,17 +14,21 @@ def mock_clients():
          patch('process_for_graph.neo4j_client') as mock_neo4j_client:
         yield mock_es_client, mock_neo4j_client
 
+@pytest.fixture
+def resolver():
+    return EntityResolver(":memory:")
+
 # Fixture to capture logs
-@pytest.pytest.fixture
+@pytest.fixture
 def caplog_fixture(caplog):
     caplog.set_level(logging.DEBUG) # Capture all levels
     return caplog
 
-def test_extract_and_load_graph_data_no_es_data(mock_clients, caplog_fixture):
+def test_extract_and_load_graph_data_no_es_data(mock_clients, resolver, caplog_fixture):
     mock_es_client, mock_neo4j_client = mock_clients
     mock_es_client.search.return_value = {"hits": {"hits": []}} # No hits from ES
 
-    extract_and_load_graph_data()
+    extract_and_load_graph_data(resolver)
 
     mock_es_client.search.assert_called_once_with(index=ES_INDEX, body={"query": {"match_all": {}}, "size": 100})
     mock_neo4j_client.merge_node.assert_not_called()
@@ -32,7 +37,7 @@ def test_extract_and_load_graph_data_no_es_data(mock_clients, caplog_fixture):
     assert "Fetched 0 documents from Elasticsearch for graph processing." in caplog_fixture.text
     assert "Graph data extraction and loading completed." in caplog_fixture.text
 
-def test_extract_and_load_graph_data_single_process(mock_clients, caplog_fixture):
+def test_extract_and_load_graph_data_single_process(mock_clients, resolver, caplog_fixture):
     mock_es_client, mock_neo4j_client = mock_clients
     sample_process_data = {
         "numeroProcesso": "12345",
@@ -48,7 +53,7 @@ def test_extract_and_load_graph_data_single_process(mock_clients, caplog_fixture
     }
     mock_es_client.search.return_value = {"hits": {"hits": [{"_source": sample_process_data}]}}
 
-    extract_and_load_graph_data()
+    extract_and_load_graph_data(resolver)
 
     # Assert Process node creation
     mock_neo4j_client.merge_node.assert_any_call("Processo", "numeroProcesso", {
@@ -72,19 +77,23 @@ def test_extract_and_load_graph_data_single_process(mock_clients, caplog_fixture
         "PERTENCE_A_CLASSE"
     )
 
+    # Parties are merged on their canonical ids
+    alice_id = document_entity_id("FISICA", "11122233344")
+    bob_id = resolver.resolve("Bob", "FISICA")
+
     # Assert Parte (Alice) node and relationship
-    mock_neo4j_client.merge_node.assert_any_call("PessoaFisica", "nome", {"nome": "Alice", "tipoPessoa": "FISICA", "documento": "111.222.333-44"})
+    mock_neo4j_client.merge_node.assert_any_call("PessoaFisica", "id", {"id": alice_id, "nome": "Alice", "tipoPessoa": "FISICA", "documento": "111.222.333-44"})
     mock_neo4j_client.create_relationship.assert_any_call(
         "Processo", "numeroProcesso", "12345",
-        "PessoaFisica", "nome", "Alice",
+        "PessoaFisica", "id", alice_id,
         "TEM_PARTE", {"tipoParticipacao": "AUTOR"}
     )
 
     # Assert Parte (Bob) node and relationship
-    mock_neo4j_client.merge_node.assert_any_call("PessoaFisica", "nome", {"nome": "Bob", "tipoPessoa": "FISICA"})
+    mock_neo4j_client.merge_node.assert_any_call("PessoaFisica", "id", {"id": bob_id, "nome": "Bob", "tipoPessoa": "FISICA"})
     mock_neo4j_client.create_relationship.assert_any_call(
         "Processo", "numeroProcesso", "12345",
-        "PessoaFisica", "nome", "Bob",
+        "PessoaFisica", "id", bob_id,
         "TEM_PARTE", {"tipoParticipacao": "REU"}
     )
 
@@ -92,7 +101,7 @@ def test_extract_and_load_graph_data_single_process(mock_clients, caplog_fixture
     mock_neo4j_client.merge_node.assert_any_call("Advogado", "oab", {"nome": "Advogado X", "oab": "SP12345"})
     mock_neo4j_client.create_relationship.assert_any_call(
         "Advogado", "oab", "SP12345",
-        "PessoaFisica", "nome", "Bob",
+        "PessoaFisica", "id", bob_id,
         "REPRESENTA"
     )
     mock_neo4j_client.create_relationship.assert_any_call(
@@ -101,14 +110,36 @@ def test_extract_and_load_graph_data_single_process(mock_clients, caplog_fixture
         "ATUA_EM"
     )
 
-def test_extract_and_load_graph_data_missing_process_number(mock_clients, caplog_fixture):
+def test_party_name_variants_are_merged_once(mock_clients, resolver, caplog_fixture):
+    mock_es_client, mock_neo4j_client = mock_clients
+    hits = [
+        {"_source": {"numeroProcesso": numero, "partes": [
+            {"pessoa": {"nome": nome, "tipoPessoa": "JURIDICA"}, "tipoParticipacao": "REU"}
+        ]}}
+        for numero, nome in (("1", "BANCO DO BRASIL S.A."), ("2", "Banco do Brasil SA"))
+    ]
+    mock_es_client.search.return_value = {"hits": {"hits": hits}}
+
+    extract_and_load_graph_data(resolver)
+
+    party_merges = [c for c in mock_neo4j_client.merge_node.call_args_list if c.args[0] == "PessoaJuridica"]
+    assert len(party_merges) == 1
+    party_id = party_merges[0].args[2]["id"]
+    for numero in ("1", "2"):
+        mock_neo4j_client.create_relationship.assert_any_call(
+            "Processo", "numeroProcesso", numero,
+            "PessoaJuridica", "id", party_id,
+            "TEM_PARTE", {"tipoParticipacao": "REU"}
+        )
+
+def test_extract_and_load_graph_data_missing_process_number(mock_clients, resolver, caplog_fixture):
     mock_es_client, mock_neo4j_client = mock_clients
     sample_process_data = {
         "dataAjuizamento": "2023-01-01" # Missing numeroProcesso
     }
     mock_es_client.search.return_value = {"hits": {"hits": [{"_source": sample_process_data}]}}
 
-    extract_and_load_graph_data()
+    extract_and_load_graph_data(resolver)
 
     mock_neo4j_client.merge_node.assert_not_called()
     mock_neo4j_client.create_relationship.assert_not_called()
@@ -0,0 +1,127 @@
+import threading
+from contextlib import contextmanager
+import time
+import pytest
+import querido_diario_client
+from querido_diario_client import QueridoDiarioClient, TAMANHO_PAGINA
+
+class ApiFalsa:
+    """Responde /gazettes com `total` diários paginados e registra o paralelismo observado."""
+
+    def __init__(self, total, informa_total=True, atraso=0.0, paginas_com_erro=()):
+        self.total = total
+        self.informa_total = informa_total
+        self.atraso = atraso
+        self.paginas_com_erro = set(paginas_com_erro)
+        self.paginas = []
+        self.em_voo = 0
+        self.max_em_voo = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, endpoint, params=None):
+        with self._lock:
+            self.paginas.append(params['page'])
+            self.em_voo += 1
+            self.max_em_voo = max(self.max_em_voo, self.em_voo)
+        time.sleep(self.atraso)
+        with self._lock:
+            self.em_voo -= 1
+        if params['page'] in self.paginas_com_erro:
+            return None
+        inicio = (params['page'] - 1) * params['size']
+        resultados = [{'id': i} for i in range(inicio, min(inicio + params['size'], self.total))]
+        resposta = {'results': resultados, 'size': params['size']}
+        if self.informa_total:
+            resposta['total_gazettes'] = self.total
+        return resposta
+
+@pytest.fixture
+def client():
+    with QueridoDiarioClient('https://api.queridodiario.ok.org.br', 'chave', max_paralelo=4) as client:
+        yield client
+
+def test_remaining_pages_are_fetched_concurrently_in_page_order(client, monkeypatch):
+    api = ApiFalsa(total=10 * TAMANHO_PAGINA + 5, atraso=0.02)
+    monkeypatch.setattr(client, '_fazer_requisicao', api)
+
+    ids = [d['id'] for d in client.buscar_diarios_por_municipio_e_data('3550308', '2024-01-01')]
+
+    assert ids == list(range(10 * TAMANHO_PAGINA + 5))
+    assert sorted(api.paginas) == list(range(1, 12))
+    assert 1 < api.max_em_voo <= 4
+
+def test_results_are_available_before_all_pages_arrive(client, monkeypatch):
+    api = ApiFalsa(total=50 * TAMANHO_PAGINA, atraso=0.01)
+    monkeypatch.setattr(client, '_fazer_requisicao', api)
+
+    diarios = client.buscar_diarios_por_termo('licitação')
+    next(diarios)
+
+    assert api.paginas == [1]
+    diarios.close()
+
+def test_without_total_pages_are_followed_until_a_short_page(client, monkeypatch):
+    api = ApiFalsa(total=2 * TAMANHO_PAGINA + 1, informa_total=False)
+    monkeypatch.setattr(client, '_fazer_requisicao', api)
+
+    assert len(list(client.buscar_diarios_por_termo('licitação'))) == 2 * TAMANHO_PAGINA + 1
+    assert api.paginas == [1, 2, 3]
+
+def test_failed_page_is_skipped_without_losing_the_rest(client, monkeypatch):
+    api = ApiFalsa(total=3 * TAMANHO_PAGINA, paginas_com_erro={2})
+    monkeypatch.setattr(client, '_fazer_requisicao', api)
+
+    ids = [d['id'] for d in client.buscar_diarios_por_municipio_e_data('3550308', '2024-01-01')]
+
+    assert ids == list(range(TAMANHO_PAGINA)) + list(range(2 * TAMANHO_PAGINA, 3 * TAMANHO_PAGINA))
+
+def test_empty_search_makes_a_single_request(client, monkeypatch):
+    api = ApiFalsa(total=0)
+    monkeypatch.setattr(client, '_fazer_requisicao', api)
+
+    assert list(client.buscar_diarios_por_termo('inexistente')) == []
+    assert api.paginas == [1]
+
+class RespostaEmBlocos:
+    status_code = 200
+
+    def __init__(self):
+        self.fechada = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=None):
+        yield b"%PDF-"
+        yield b"fim"
+
+    def close(self):
+        self.fechada = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def test_streamed_download_times_only_the_request(client, monkeypatch):
+    medindo = []
+
+    @contextmanager
+    def medir(upstream):
+        medindo.append(True)
+        try:
+            yield
+        finally:
+            medindo[-1] = False
+
+    resposta = RespostaEmBlocos()
+    monkeypatch.setattr(querido_diario_client.metrics, "time_http_request", medir)
+    monkeypatch.setattr(client.session, "get", lambda *args, **kwargs: resposta)
+
+    blocos = []
+    for bloco in client.iterar_conteudo_diario("https://diarios/1.pdf"):
+        blocos.append((bloco, medindo[-1]))
+
+    assert blocos == [(b"%PDF-", False), (b"fim", False)]
+    assert resposta.fechada
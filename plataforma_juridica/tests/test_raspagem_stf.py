@@ -0,0 +1,138 @@
+import pytest
+import raspagem_stf
+from raspagem_stf import Listagem, RaspadorStf, bloquear_recursos, linhas_da_tabela, sumulas_da_tabela
+
+HTML_LISTAGEM = """<html><head><link rel="stylesheet" href="x.css"></head><body>
+<table>
+  <tr><th>Número</th><th>Enunciado</th></tr>
+  <tr><td> 1 </td><td>Ofende a garantia constitucional do ato jurídico <b>perfeito</b><br>a decisão...</td></tr>
+  <tr><td>2</td><td>É inconstitucional a lei ou ato normativo estadual
+      ou distrital que disponha sobre sistemas de consórcios.</td></tr>
+  <tr><td colspan="2">Canceladas</td></tr>
+</table>
+<table><tr><td>99</td><td>outra tabela</td></tr></table>
+</body></html>"""
+
+class RotaFalsa:
+    def __init__(self):
+        self.acao = None
+
+    def abort(self):
+        self.acao = "abort"
+
+    def continue_(self):
+        self.acao = "continue"
+
+class RequisicaoFalsa:
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+
+class RespostaFalsa:
+    status = 200
+
+class PaginaFalsa:
+    def __init__(self, contexto):
+        self.contexto = contexto
+        self.url = None
+
+    def goto(self, url, wait_until=None, timeout=None):
+        self.contexto.visitas.append(url)
+        self.url = url
+        return RespostaFalsa()
+
+    def wait_for_selector(self, seletor, timeout=None):
+        if self.url.endswith("/fora-do-ar"):
+            raise TimeoutError("Timeout 15000ms exceeded.")
+
+    def eval_on_selector(self, seletor, expressao):
+        return self.contexto.tabelas.get(seletor, HTML_LISTAGEM)
+
+class ContextoFalso:
+    def __init__(self, tabelas=None):
+        self.tabelas = tabelas or {}
+        self.rotas = []
+        self.paginas = []
+        self.visitas = []
+        self.fechado = False
+
+    def route(self, padrao, handler):
+        self.rotas.append((padrao, handler))
+
+    def new_page(self):
+        self.paginas.append(PaginaFalsa(self))
+        return self.paginas[-1]
+
+    def close(self):
+        self.fechado = True
+
+def test_first_table_cells_are_read_with_normalized_whitespace():
+    linhas = linhas_da_tabela(HTML_LISTAGEM)
+
+    assert linhas[0] == ["Número", "Enunciado"]
+    assert linhas[1] == ["1", "Ofende a garantia constitucional do ato jurídico perfeito a decisão..."]
+    assert linhas[2][1].startswith("É inconstitucional a lei ou ato normativo estadual ou distrital")
+    assert len(linhas) == 4
+
+def test_stdlib_parser_matches_lxml():
+    pytest.importorskip("lxml")
+    com_lxml = linhas_da_tabela(HTML_LISTAGEM)
+    lxml = raspagem_stf.lxml
+    try:
+        raspagem_stf.lxml = None
+        assert linhas_da_tabela(HTML_LISTAGEM) == com_lxml
+    finally:
+        raspagem_stf.lxml = lxml
+
+def test_header_and_short_rows_are_skipped():
+    sumulas = sumulas_da_tabela(HTML_LISTAGEM, data="2024-01-01")
+
+    assert [(numero, data) for numero, _, data in sumulas] == [("1", "2024-01-01"), ("2", "2024-01-01")]
+
+def test_page_without_table_yields_nothing():
+    assert sumulas_da_tabela("<html><body>Manutenção</body></html>") == []
+
+@pytest.mark.parametrize("tipo, acao", [
+    ("image", "abort"), ("font", "abort"), ("stylesheet", "abort"), ("media", "abort"),
+    ("document", "continue"), ("script", "continue"), ("xhr", "continue"), ("fetch", "continue"),
+])
+def test_non_essential_resources_are_blocked(tipo, acao):
+    rota = RotaFalsa()
+
+    bloquear_recursos(rota, RequisicaoFalsa(tipo))
+
+    assert rota.acao == acao
+
+def test_one_page_is_reused_across_listings():
+    contexto = ContextoFalso()
+    listagens = [Listagem("sumulas_vinculantes", "https://stf/sv"), Listagem("fora", "https://stf/fora-do-ar"),
+                 Listagem("sumulas", "https://stf/sumulas")]
+
+    with RaspadorStf(contexto=contexto) as raspador:
+        resultado = raspador.extrair_todas(listagens)
+
+    assert sorted(resultado) == ["sumulas", "sumulas_vinculantes"]
+    assert len(resultado["sumulas"]) == 2
+    assert contexto.visitas == ["https://stf/sv", "https://stf/fora-do-ar", "https://stf/sumulas"]
+    assert len(contexto.paginas) == 1
+    assert contexto.rotas == [("**/*", bloquear_recursos)]
+    assert not contexto.fechado
+
+def test_each_listing_reads_the_table_of_its_selector():
+    contexto = ContextoFalso({
+        "#sumulas table": "<table><tr><th>Súmula</th><th>Enunciado</th></tr><tr><td>473</td><td>A administração pode anular seus próprios atos.</td></tr></table>",
+        "#temas table": "<table><tr><th>Tema</th><th>Título</th></tr><tr><td>1046</td><td>Validade de norma coletiva.</td></tr></table>",
+    })
+    listagens = [Listagem("sumulas_vinculantes", "https://stf/listagens"),
+                 Listagem("sumulas", "https://stf/listagens", "#sumulas table"),
+                 Listagem("temas_repercussao_geral", "https://stf/listagens", "#temas table")]
+
+    with RaspadorStf(contexto=contexto) as raspador:
+        resultado = raspador.extrair_todas(listagens)
+
+    assert [numero for numero, _, _ in resultado["sumulas_vinculantes"]] == ["1", "2"]
+    assert [(numero, texto) for numero, texto, _ in resultado["sumulas"]] == [("473", "A administração pode anular seus próprios atos.")]
+    assert [(numero, texto) for numero, texto, _ in resultado["temas_repercussao_geral"]] == [("1046", "Validade de norma coletiva.")]
+
+def test_default_listings_cover_sumulas_and_temas():
+    assert {"sumulas_vinculantes", "sumulas", "temas_repercussao_geral"} <= set(raspagem_stf.LISTAGENS)
+    assert all(nome == listagem.nome and listagem.seletor for nome, listagem in raspagem_stf.LISTAGENS.items())
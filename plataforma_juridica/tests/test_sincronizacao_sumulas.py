@@ -0,0 +1,64 @@
+from datetime import datetime
+import pytest
+import sincronizacao_sumulas
+from armazenamento_sumulas import abrir_banco, sincronizar_sumulas
+from extracao_citacoes import MotorRegex
+from pipeline_extracao_grafo import normalizar_entidade
+
+class GrafoFalso:
+    """Aplica a consulta de súmulas em memória: só conta como alterado o nó com hash diferente."""
+
+    def __init__(self):
+        self.nos = {}
+        self.consultas = []
+
+    def execute_query(self, query, parameters=None):
+        self.consultas.append(query)
+        if "UNWIND $sumulas" not in query:
+            return []
+        alteradas = 0
+        for s in parameters["sumulas"]:
+            if self.nos.get(s["id"], {}).get("hash_conteudo") != s["hash_conteudo"]:
+                self.nos[s["id"]] = dict(s)
+                alteradas += 1
+        return [{"alteradas": alteradas}]
+
+@pytest.fixture
+def banco(tmp_path):
+    conn = abrir_banco(str(tmp_path / "sumulas.db"))
+    sincronizar_sumulas(conn, [("13", "A nomeação de cônjuge...", datetime(2024, 1, 1)),
+                               ("14", "É direito do defensor...", datetime(2024, 1, 1))])
+    yield conn
+    conn.close()
+
+@pytest.mark.parametrize("citacao", ["Súmula Vinculante nº 13", "SV 13", "súmula vinculante 13"])
+def test_ids_match_the_nodes_created_by_citations(citacao):
+    regra = next(MotorRegex().citacoes(citacao)).regra
+
+    assert sincronizacao_sumulas.id_sumula_vinculante("13") == normalizar_entidade(regra, citacao)
+
+def test_only_changed_sumulas_are_written(banco):
+    grafo = GrafoFalso()
+
+    assert sincronizacao_sumulas.sincronizar_banco_com_grafo(grafo, banco) == 2
+    assert sincronizacao_sumulas.sincronizar_banco_com_grafo(grafo, banco) == 0
+    assert grafo.nos["Súmula Vinculante 13"]["texto"] == "A nomeação de cônjuge..."
+    assert grafo.consultas[0] == sincronizacao_sumulas.RESTRICAO_SUMULA
+
+def test_rows_emitted_by_the_store_are_published(banco):
+    grafo = GrafoFalso()
+    sincronizacao_sumulas.sincronizar_banco_com_grafo(grafo, banco)
+
+    alteradas = sincronizar_sumulas(banco, [("14", "Texto revisado.", datetime(2024, 2, 1))])
+
+    assert sincronizacao_sumulas.publicar_alteradas(grafo, alteradas) == 1
+    assert grafo.nos["Súmula Vinculante 14"]["texto"] == "Texto revisado."
+
+def test_large_tables_are_sent_in_batches(monkeypatch):
+    monkeypatch.setattr(sincronizacao_sumulas, "TAMANHO_LOTE", 10)
+    grafo = GrafoFalso()
+
+    total = sincronizacao_sumulas.gravar_sumulas(grafo, ((str(n), f"Texto {n}", f"h{n}") for n in range(25)))
+
+    assert total == 25
+    assert sum("UNWIND" in q for q in grafo.consultas) == 3
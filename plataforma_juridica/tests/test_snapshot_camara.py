@@ -0,0 +1,75 @@
+import json
+import pytest
+from api_camara_client import ApiCamaraClient
+from snapshot_camara import SnapshotCamara
+
+PROPOSICOES_JSON = {"dados": [
+    {"id": 21209, "siglaTipo": "PL", "numero": 3683, "ano": 1989, "ementa": "Dispõe sobre a proteção do consumidor.",
+     "urlInteiroTeor": "https://camara.leg.br/21209.pdf",
+     "ultimoStatus": {"descricaoSituacao": "Transformado em Norma Jurídica"}},
+]}
+PROPOSICOES_CSV = (
+    '"id";"siglaTipo";"numero";"ano";"ementa";"urlInteiroTeor";"ultimoStatus_descricaoSituacao"\n'
+    '"490267";"PL";"8046";"2010";"Código de Processo Civil.";"";"Transformado em Norma Jurídica"\n'
+)
+AUTORES_CSV = (
+    '"idProposicao";"nomeAutor";"tipoAutor";"ordemAssinatura";"proponente"\n'
+    '"21209";"Geraldo Alckmin";"Deputado";"1";"1"\n'
+    '"490267";"Senado Federal";"Órgão do Poder Legislativo";"1";"1"\n'
+)
+
+@pytest.fixture
+def snapshot(tmp_path):
+    dados = tmp_path / "dados_camara"
+    dados.mkdir()
+    (dados / "proposicoes-1989.json").write_text(json.dumps(PROPOSICOES_JSON), encoding="utf-8")
+    (dados / "proposicoes-2010.csv").write_text(PROPOSICOES_CSV, encoding="utf-8")
+    (dados / "proposicoesAutores-2010.csv").write_text(AUTORES_CSV, encoding="utf-8")
+    (dados / "leiame.txt").write_text("ignorado", encoding="utf-8")
+    snapshot = SnapshotCamara(str(tmp_path / "snapshot.sqlite"))
+    snapshot.importar_diretorio(str(dados))
+    yield snapshot
+    snapshot.close()
+
+def test_json_and_csv_files_answer_like_the_api(snapshot):
+    assert snapshot.buscar_proposicao("PL", "3683", "1989")["id"] == 21209
+    assert snapshot.buscar_proposicao("PL", 8046, 2010)["ementa"] == "Código de Processo Civil."
+
+    detalhes = snapshot.obter_detalhes_proposicao(21209)
+    assert detalhes["statusProposicao"]["descricaoSituacao"] == "Transformado em Norma Jurídica"
+    assert detalhes["urlInteiroTeor"] == "https://camara.leg.br/21209.pdf"
+    assert snapshot.obter_detalhes_proposicao(490267)["urlInteiroTeor"] is None
+
+    assert snapshot.obter_autores_proposicao(490267) == [
+        {"nome": "Senado Federal", "tipo": "Órgão do Poder Legislativo", "ordemAssinatura": 1, "proponente": 1}
+    ]
+
+def test_missing_items_return_none(snapshot):
+    assert snapshot.buscar_proposicao("PL", "1", "2000") is None
+    assert snapshot.obter_detalhes_proposicao(1) is None
+    assert snapshot.obter_autores_proposicao(1) is None
+
+def test_reimporting_a_year_does_not_duplicate_rows(snapshot, tmp_path):
+    caminho = tmp_path / "dados_camara" / "proposicoesAutores-2010.csv"
+
+    snapshot.importar_arquivo(str(caminho))
+
+    assert len(snapshot.obter_autores_proposicao(21209)) == 1
+
+def test_client_goes_to_the_api_only_for_what_the_snapshot_lacks(snapshot, monkeypatch):
+    client = ApiCamaraClient("https://dadosabertos.camara.leg.br/api/v2", snapshot=snapshot)
+    chamadas = []
+
+    def requisicao(endpoint, params=None):
+        chamadas.append(endpoint)
+        return {"dados": [{"nome": "Autor da API"}]}
+
+    monkeypatch.setattr(client, "_fazer_requisicao", requisicao)
+
+    assert client.buscar_proposicao("PL", "3683", "1989")["id"] == 21209
+    assert client.obter_detalhes_proposicao(21209)["ementa"].startswith("Dispõe")
+    assert client.obter_autores_proposicao(21209)[0]["nome"] == "Geraldo Alckmin"
+    assert chamadas == []
+
+    assert client.obter_autores_proposicao(999) == [{"nome": "Autor da API"}]
+    assert chamadas == ["/proposicoes/999/autores"]